@@ -0,0 +1,82 @@
+"""
+Compares the CPU time and peak memory of building the Connector API request for HL7 CDA
+messages of various sizes by decoding, validating and encoding them again (as before) with
+passing the document through (see pass_through_cda_message).
+
+Run from the repository root, with the environment variables from tox.ini set:
+    PYTHONPATH=. python benchmarks/cda_pass_through_benchmark.py
+"""
+
+import json
+import timeit
+import tracemalloc
+from typing import Callable, Dict, List
+
+from dhos_async_adapter.callbacks.begin_process_hl7_cda_message import (
+    pass_through_cda_message,
+)
+from dhos_async_adapter.helpers import json_codec
+from dhos_async_adapter.helpers.actions import HL7CDAMessage
+from dhos_async_adapter.helpers.validation import validate_message_body_dict
+
+SIZES_KB: List[int] = [100, 500, 2000]
+NUMBER = 20
+
+SECTION = """<component>
+  <section>
+    <code code="8716-3" codeSystem="2.16.840.1.113883.6.1" displayName="Vital signs"/>
+    <title>Vital Signs</title>
+    <text>Observation recorded by "Nurse Zoë" at 12:00 &amp; reviewed.</text>
+  </section>
+</component>
+"""
+
+
+def make_message(size_kb: int) -> bytes:
+    document: str = (
+        '<?xml version="1.0" encoding="UTF-8"?>\n<ClinicalDocument>\n'
+        + SECTION * (size_kb * 1024 // len(SECTION))
+        + "</ClinicalDocument>\n"
+    )
+    return json.dumps({"content": document}).encode("utf-8")
+
+
+def decode_and_encode(body: bytes) -> bytes:
+    message_body: Dict = validate_message_body_dict(body=body, schema=HL7CDAMessage)
+    return json_codec.dumps({"type": "HL7v3CDA", "content": message_body["content"]})
+
+
+def pass_through(body: bytes) -> bytes:
+    result = pass_through_cda_message(body)
+    assert result is not None
+    return result
+
+
+def measure(fn: Callable[[bytes], bytes], body: bytes) -> Dict[str, float]:
+    seconds: float = min(timeit.repeat(lambda: fn(body), number=NUMBER, repeat=3))
+    tracemalloc.start()
+    fn(body)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return {"ms": seconds / NUMBER * 1e3, "peak_kb": peak / 1024}
+
+
+def main() -> None:
+    print(f"JSON codec: {json_codec.get_codec().name}")
+    print(
+        f"{'size (KB)':>10}{'before (ms)':>13}{'after (ms)':>12}"
+        f"{'before peak (KB)':>18}{'after peak (KB)':>17}"
+    )
+    for size_kb in SIZES_KB:
+        body: bytes = make_message(size_kb)
+        assert json.loads(decode_and_encode(body)) == json.loads(pass_through(body))
+        before: Dict[str, float] = measure(decode_and_encode, body)
+        after: Dict[str, float] = measure(pass_through, body)
+        print(
+            f"{len(body) // 1024:>10}{before['ms']:>13.2f}{after['ms']:>12.2f}"
+            f"{before['peak_kb']:>18.0f}{after['peak_kb']:>17.0f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
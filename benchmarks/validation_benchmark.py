@@ -0,0 +1,131 @@
+"""
+Compares the cost of validating a message for a few routing keys when schemas are built
+for every message (as before) with using the shared instances from get_schema.
+
+Run from the repository root, with the environment variables from tox.ini set:
+    PYTHONPATH=. python benchmarks/validation_benchmark.py
+"""
+
+import json
+import timeit
+from typing import Any, Dict, List, Optional, Tuple, Type
+
+from marshmallow import EXCLUDE, INCLUDE, Schema
+
+from dhos_async_adapter.callbacks import (
+    create_oru_message,
+    encounter_obs_set_notification,
+    encounter_update,
+    patient_update,
+)
+from dhos_async_adapter.helpers.actions import (
+    ActionsMessage,
+    ActionsMessageNoConnectorId,
+)
+from dhos_async_adapter.helpers.validation import get_schema
+
+NUMBER = 2000
+
+# Each schema load done when processing a message: schema, unknown, many, data.
+Load = Tuple[Type[Schema], Optional[str], bool, Any]
+
+
+def _actions_message(name: str, data: Dict, connector_id: bool = True) -> Dict:
+    message: Dict = {"actions": [{"name": name, "data": data}]}
+    if connector_id:
+        message["dhos_connector_message_uuid"] = "message-uuid"
+    return message
+
+
+PATIENT = {"mrn": "1234567", "nhs_number": "9999999999", "date_of_birth": "1970-01-01"}
+LOCATIONS = {"location": {"epr_ward_code": "WARD1", "epr_bed_code": "BED1"}}
+ENCOUNTER = {
+    "patient_uuid": "patient-uuid",
+    "location_uuid": "location-uuid",
+    "dh_product_uuid": "product-uuid",
+    "patient_record_uuid": "record-uuid",
+    "epr_encounter_id": "2020L83137665",
+    "encounter_type": "INPATIENT",
+    "admitted_at": "2020-01-01T00:00:00.000Z",
+    "score_system_default_for_location": "news2",
+}
+OBS_SET = {
+    "observation_set": {
+        "created_by": "clinician-uuid",
+        "encounter_id": "encounter-uuid",
+    },
+    "encounter": {"patient_record_uuid": "record-uuid", "location_uuid": "l-uuid"},
+    "patient": {"uuid": "patient-uuid"},
+}
+
+CASES: Dict[str, List[Load]] = {
+    patient_update.ROUTING_KEY: [
+        (ActionsMessage, EXCLUDE, False, _actions_message("process_patient", PATIENT)),
+        (patient_update.PatientUpdate, INCLUDE, False, PATIENT),
+        (patient_update.LocationUpdate, INCLUDE, False, LOCATIONS),
+    ],
+    encounter_update.ROUTING_KEY: [
+        (
+            ActionsMessage,
+            EXCLUDE,
+            False,
+            _actions_message("process_encounter", ENCOUNTER),
+        ),
+        (encounter_update.EncounterUpdateMessage, EXCLUDE, False, ENCOUNTER),
+    ],
+    create_oru_message.ROUTING_KEY: [
+        (
+            ActionsMessageNoConnectorId,
+            INCLUDE,
+            False,
+            _actions_message("process_observation_set", OBS_SET, connector_id=False),
+        ),
+        (create_oru_message.ProcessObservationSetAction, INCLUDE, False, OBS_SET),
+    ],
+    encounter_obs_set_notification.ROUTING_KEY: [
+        (
+            ActionsMessageNoConnectorId,
+            INCLUDE,
+            False,
+            _actions_message("process_observation_set", OBS_SET, connector_id=False),
+        ),
+        (
+            encounter_obs_set_notification.ProcessObservationSetAction,
+            INCLUDE,
+            False,
+            OBS_SET,
+        ),
+    ],
+}
+
+
+def validate_per_message(loads: List[Load], body: str) -> None:
+    json.loads(body)
+    for schema, unknown, many, data in loads:
+        schema().load(data, unknown=unknown, many=many)
+
+
+def validate_precompiled(loads: List[Load], body: str) -> None:
+    json.loads(body)
+    for schema, unknown, many, data in loads:
+        get_schema(schema, unknown=unknown, many=many).load(data)
+
+
+def main() -> None:
+    print(f"{'routing key':<24}{'before (us)':>14}{'after (us)':>14}{'speedup':>10}")
+    for routing_key, loads in CASES.items():
+        body: str = json.dumps(loads[0][3])
+        before: float = min(
+            timeit.repeat(lambda: validate_per_message(loads, body), number=NUMBER)
+        )
+        after: float = min(
+            timeit.repeat(lambda: validate_precompiled(loads, body), number=NUMBER)
+        )
+        print(
+            f"{routing_key:<24}{before / NUMBER * 1e6:>14.1f}"
+            f"{after / NUMBER * 1e6:>14.1f}{before / after:>9.1f}x"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -1,4 +1,7 @@
-from dhos_async_adapter import app
+from dhos_async_adapter import app, config, supervisor
 
 if __name__ == "__main__":
-    app.run()
+    if config.SUPERVISOR_PROCESSES > 1:
+        supervisor.run()
+    else:
+        app.run()
@@ -0,0 +1,133 @@
+import time
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional
+
+from kombu import Message
+from she_logging import logger
+
+
+class _PendingAck:
+    def __init__(self, message: Message) -> None:
+        self.message = message
+        # When processing of the message finished successfully, if it has.
+        self.completed_at: Optional[float] = None
+        # Whether the caller is settling the message itself, and hasn't yet.
+        self.held = False
+
+
+class AckCoalescer:
+    """
+    Batches acknowledgements of successfully processed messages. Delivery tags increase
+    within a channel, so once every message up to a tag has been processed they can all be
+    acknowledged with a single ack of that tag with multiple=True.
+
+    Every delivered message is tracked until it is settled. A multiple ack never reaches past
+    a message that is still being processed, or that is held while the caller settles it
+    itself (for example, once a copy published for retry has been confirmed); the caller
+    releases such messages only after settling them. Processed messages stuck behind a slow
+    one are acked individually once they have waited too long, so a slow message can't hold
+    up the prefetch window.
+
+    Not thread-safe: must only be used from the connection thread.
+    """
+
+    def __init__(self, batch_size: int, max_delay_sec: float) -> None:
+        self.batch_size = batch_size
+        self.max_delay_sec = max_delay_sec
+        self._pending: Dict[Any, "OrderedDict[int, _PendingAck]"] = {}
+
+    @property
+    def enabled(self) -> bool:
+        return self.batch_size > 1
+
+    def track(self, message: Message) -> None:
+        """Starts tracking a delivered message."""
+        if not self.enabled:
+            return
+        self._pending.setdefault(message.channel, OrderedDict())[
+            message.delivery_tag
+        ] = _PendingAck(message)
+
+    def hold(self, message: Message) -> None:
+        """
+        Marks a message as being settled by the caller, keeping any multiple ack from
+        covering it until it is released (or completed, if it is to be acked after all).
+        """
+        pending: Optional[_PendingAck] = self._pending.get(message.channel, {}).get(
+            message.delivery_tag
+        )
+        if pending is not None:
+            pending.held = True
+
+    def release(self, message: Message) -> None:
+        """Stops tracking a message that the caller has settled itself."""
+        pending: "OrderedDict[int, _PendingAck]" = self._pending.get(
+            message.channel, OrderedDict()
+        )
+        pending.pop(message.delivery_tag, None)
+        if not pending:
+            self._pending.pop(message.channel, None)
+
+    def complete(self, message: Message) -> None:
+        """Records that a message was processed successfully, acknowledging it in due course."""
+        pending: Optional[_PendingAck] = self._pending.get(message.channel, {}).get(
+            message.delivery_tag
+        )
+        if pending is None:
+            message.ack()
+            return
+        pending.held = False
+        pending.completed_at = time.monotonic()
+        completed: int = sum(
+            p.completed_at is not None for p in self._pending[message.channel].values()
+        )
+        if completed >= self.batch_size:
+            self._flush_channel(message.channel, force=False)
+
+    def flush_due(self) -> None:
+        """Acknowledges messages that have been waiting longer than the maximum delay."""
+        for channel in list(self._pending):
+            self._flush_channel(channel, force=False)
+
+    def flush_all(self) -> None:
+        """Acknowledges every processed message, for example before shutting down."""
+        for channel in list(self._pending):
+            self._flush_channel(channel, force=True)
+
+    def _flush_channel(self, channel: Any, force: bool) -> None:
+        pending: "OrderedDict[int, _PendingAck]" = self._pending[channel]
+        # The longest run of processed messages from the oldest delivery.
+        prefix: List[_PendingAck] = []
+        for p in pending.values():
+            if p.completed_at is None:
+                break
+            prefix.append(p)
+        now: float = time.monotonic()
+        # Processed messages behind one still in progress, that have waited too long.
+        stragglers: List[_PendingAck] = [
+            p
+            for p in list(pending.values())[len(prefix) :]
+            if p.completed_at is not None
+            and (force or now - p.completed_at >= self.max_delay_sec)
+        ]
+        prefix_due: bool = bool(prefix) and (
+            force
+            or len(prefix) >= self.batch_size
+            or now - min(p.completed_at or now for p in prefix) >= self.max_delay_sec
+        )
+        # noinspection PyBroadException
+        try:
+            if prefix_due:
+                prefix[-1].message.ack(multiple=len(prefix) > 1)
+                for p in prefix:
+                    del pending[p.message.delivery_tag]
+            for p in stragglers:
+                p.message.ack()
+                del pending[p.message.delivery_tag]
+        except Exception:
+            # The channel has closed, so the broker will redeliver anything unacknowledged.
+            logger.exception("Failed to acknowledge messages")
+            del self._pending[channel]
+            return
+        if not pending:
+            del self._pending[channel]
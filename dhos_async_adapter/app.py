@@ -1,11 +1,20 @@
 import logging.config
-from typing import List
+import signal
+from typing import Callable, List, Optional
 
 import kombu_batteries_included
 from kombu import Connection, Exchange, Queue, binding
 from she_logging import logger
 
-from dhos_async_adapter.consumer import GenericConsumer
+from dhos_async_adapter import config
+from dhos_async_adapter.clients import warmup
+from dhos_async_adapter.clients.warmup import KeepWarm, Liveness
+from dhos_async_adapter.consumer import (
+    ENGINE_ASYNCIO,
+    GenericConsumer,
+    set_alive_file,
+)
+from dhos_async_adapter.helpers import retry
 from dhos_async_adapter.helpers.routing import (
     QUEUE_MODES,
     ROUTES_TO_UNBIND,
@@ -25,22 +34,76 @@ DLX_EXCHANGE_TYPE = "fanout"
 ERROR_QUEUE_NAME = "errors"
 
 
-def run() -> None:
+def run(
+    engine: str = config.CONSUMER_ENGINE,
+    queue_names: Optional[List[str]] = None,
+    set_alive: Optional[Callable[[bool], None]] = None,
+) -> None:
+    """
+    Runs the consumer. By default it consumes from every queue in the routing table, but
+    can be limited to some of them (as the supervisor does for its workers).
+    """
     kombu_batteries_included.init()
     conn = Connection(kombu_batteries_included.get_connection_string())
     task_exchange: Exchange = kombu_batteries_included.infra.get_task_exchange(conn)
     logger.info("Initialising task queues")
     queues: List[Queue] = _init_task_queues(conn, task_exchange)
+    if queue_names is not None:
+        queues = [q for q in queues if q.name in queue_names]
+    logger.info("Initialising retry queues")
+    _init_retry_queues(conn)
     logger.info("Unbinding deprecated routes")
     for queue_name, routing_keys in ROUTES_TO_UNBIND.items():
+        if queue_names is not None and queue_name not in queue_names:
+            continue
         for routing_key in routing_keys:
             queue: Queue = next(q for q in queues if q.name == queue_name)
             logger.debug("Unbind %s from %s", routing_key, queue.name)
             queue.declare()
             queue.unbind_from(task_exchange, routing_key)
 
+    liveness = Liveness(set_alive or set_alive_file)
+    warmup.install_dns_cache()
+    keep_warm_enabled: bool = config.KEEP_WARM_INTERVAL_SEC > 0
+    if config.WARMUP_ENABLED:
+        logger.info("Warming up connections to services")
+        reachable: bool = warmup.services_reachable(warmup.warm_up())
+        # Without keep-warm nothing would check again, so a failed warm-up (such as during a
+        # cold start of the whole cluster) mustn't leave the process reported as dead.
+        if keep_warm_enabled:
+            liveness.set_services_reachable(reachable)
+        elif not reachable:
+            logger.warning("No services could be reached during warm-up")
+    keep_warm: Optional[KeepWarm] = None
+    if keep_warm_enabled:
+        keep_warm = KeepWarm(
+            config.KEEP_WARM_INTERVAL_SEC,
+            on_result=lambda results: liveness.set_services_reachable(
+                warmup.services_reachable(results)
+            ),
+        )
+        keep_warm.start()
+
     logger.info("Starting consumers")
-    GenericConsumer(connection=conn, queues=queues).run()
+    generic_consumer = GenericConsumer(
+        connection=conn,
+        queues=queues,
+        engine=engine,
+        set_alive=liveness.set_connection_alive,
+    )
+    # Stop gracefully, so that in-flight messages are not redelivered and processed twice.
+    signal.signal(signal.SIGTERM, generic_consumer.handle_stop_signal)
+    signal.signal(signal.SIGINT, generic_consumer.handle_stop_signal)
+    try:
+        generic_consumer.run()
+    finally:
+        if keep_warm is not None:
+            keep_warm.stop()
+
+
+def run_asyncio() -> None:
+    """Runs the consumer with the asyncio engine, regardless of config."""
+    run(engine=ENGINE_ASYNCIO)
 
 
 def _init_task_queues(conn: Connection, task_exchange: Exchange) -> List[Queue]:
@@ -62,3 +125,25 @@ def _init_task_queues(conn: Connection, task_exchange: Exchange) -> List[Queue]:
         )
         for k, v in ROUTING_TABLE.items()
     ]
+
+
+def _init_retry_queues(conn: Connection) -> None:
+    retry_exchange = Exchange(
+        retry.RETRY_DELAY_EXCHANGE_NAME,
+        type=retry.RETRY_DELAY_EXCHANGE_TYPE,
+        channel=conn,
+        durable=True,
+    )
+    retry_exchange.declare()
+    for delay in sorted(set(retry.get_retry_delays())):
+        Queue(
+            retry.get_retry_queue_name(delay),
+            exchange=retry_exchange,
+            binding_arguments=retry.get_retry_queue_binding(delay),
+            durable=True,
+            channel=conn,
+            queue_arguments={
+                "x-message-ttl": delay * 1000,
+                "x-dead-letter-exchange": TASK_EXCHANGE_NAME,
+            },
+        ).declare()
@@ -1,13 +1,23 @@
-from typing import AnyStr, Dict
+import re
+from typing import AnyStr, Dict, Optional, Pattern, Union
 
 from she_logging import logger
 
+from dhos_async_adapter import config
 from dhos_async_adapter.clients import connector_api
 from dhos_async_adapter.helpers.actions import HL7CDAMessage
 from dhos_async_adapter.helpers.validation import validate_message_body_dict
 
 ROUTING_KEY = "dhos.423779001"
 
+# The start and end of a message body that is only {"content": "<document>"}, up to and
+# from the quotes around the document. Only the last bytes are searched for the end.
+_CONTENT_START: Pattern[bytes] = re.compile(
+    rb'[ \t\n\r]*\{[ \t\n\r]*"content"[ \t\n\r]*:[ \t\n\r]*"'
+)
+_CONTENT_END: Pattern[bytes] = re.compile(rb'"[ \t\n\r]*\}[ \t\n\r]*\Z')
+_CONTENT_END_WINDOW = 64
+
 
 def process(body: AnyStr) -> None:
     """
@@ -20,8 +30,48 @@ def process(body: AnyStr) -> None:
 
     logger.info("Processing HL7 CDA message")
 
-    message_body: Dict = validate_message_body_dict(body=body, schema=HL7CDAMessage)
+    cda_message: Union[Dict, bytes, None] = None
+    if config.CDA_PASS_THROUGH_ENABLED:
+        cda_message = pass_through_cda_message(body)
+    if cda_message is None:
+        message_body: Dict = validate_message_body_dict(body=body, schema=HL7CDAMessage)
+        cda_message = {"type": "HL7v3CDA", "content": message_body["content"]}
+
+    connector_api.post_cda_message(message_body=cda_message)
 
-    connector_api.post_cda_message(
-        message_body={"type": "HL7v3CDA", "content": message_body["content"]},
+
+def pass_through_cda_message(body: AnyStr) -> Optional[bytes]:
+    """
+    Returns the request body for Connector API with the document copied from the message
+    body as it is, so CDA documents (which can be hundreds of kilobytes) aren't decoded and
+    encoded again. Returns None if the message body isn't just a string content field, in
+    which case it must be validated in full.
+
+    Only the structure of the body is checked: every quote in the document must be escaped,
+    so that it can't end the string early. Other errors in the document (such as invalid
+    escapes) are left for Connector API to reject, as the request body is invalid JSON.
+    """
+    raw: bytes = body.encode("utf-8") if isinstance(body, str) else body
+    start_match: Optional["re.Match[bytes]"] = _CONTENT_START.match(raw)
+    end_match: Optional["re.Match[bytes]"] = _CONTENT_END.search(
+        raw, max(0, len(raw) - _CONTENT_END_WINDOW)
+    )
+    if start_match is None or end_match is None:
+        return None
+    start: int = start_match.end()
+    end: int = end_match.start()
+    if end < start:
+        return None
+    # With no escaped backslashes, a quote is escaped exactly when a backslash precedes it.
+    # Documents with escaped backslashes (rare in XML) are validated in full instead.
+    if (
+        raw.find(b"\\\\", start, end) != -1
+        or raw.count(b'"', start, end) != raw.count(b'\\"', start, end)
+        or raw.endswith(b"\\", start, end)
+    ):
+        return None
+    logger.debug("Passing HL7 CDA document through without decoding it")
+    # Joining a view of the document copies it once, straight into the request body.
+    return b"".join(
+        [b'{"type":"HL7v3CDA","content":', memoryview(raw)[start - 1 : end + 1], b"}"]
     )
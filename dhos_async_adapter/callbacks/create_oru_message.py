@@ -15,7 +15,10 @@ from dhos_async_adapter.helpers.actions import (
     ProcessObservationSetData,
 )
 from dhos_async_adapter.helpers.exceptions import RejectMessageError
-from dhos_async_adapter.helpers.validation import validate_message_body_dict
+from dhos_async_adapter.helpers.validation import (
+    get_schema,
+    validate_message_body_dict,
+)
 
 ROUTING_KEY = "dhos.DM000005"
 
@@ -40,6 +43,13 @@ class ProcessObservationSetAction(Schema):
     encounter = fields.Nested(Encounter, required=True)
 
 
+# Built once, rather than for every message.
+PROCESS_OBSERVATION_SET_ACTION_SCHEMA: Schema = get_schema(
+    ProcessObservationSetAction, unknown=INCLUDE
+)
+PROCESS_OBSERVATION_SET_DATA_SCHEMA: Schema = get_schema(ProcessObservationSetData)
+
+
 def process(body: AnyStr) -> None:
     """
     - Summary: Creates an ORU message in Connector API.
@@ -71,8 +81,8 @@ def process(body: AnyStr) -> None:
         message=actions_message, action_name="process_observation_set"
     )
     try:
-        action_data: Dict = ProcessObservationSetAction().load(
-            process_obs_set_action["data"], unknown=INCLUDE
+        action_data: Dict = PROCESS_OBSERVATION_SET_ACTION_SCHEMA.load(
+            process_obs_set_action["data"]
         )
     except ValidationError:
         logger.exception("Failed to validate observation set action")
@@ -101,7 +111,7 @@ def process(body: AnyStr) -> None:
 
     # Validate data for ORU message POST.
     try:
-        ProcessObservationSetData().load(action_data)
+        PROCESS_OBSERVATION_SET_DATA_SCHEMA.load(action_data)
     except ValidationError:
         logger.exception("Failed to validate observation set action")
         raise RejectMessageError()
@@ -1,13 +1,15 @@
 from typing import AnyStr, Dict
 
-import kombu_batteries_included
 from marshmallow import INCLUDE, Schema, fields
 from she_logging import logger
 
 from dhos_async_adapter.clients import encounters_api
-from dhos_async_adapter.helpers import actions
+from dhos_async_adapter.helpers import actions, publishing
 from dhos_async_adapter.helpers.actions import ActionsMessageNoConnectorId
-from dhos_async_adapter.helpers.validation import validate_message_body_dict
+from dhos_async_adapter.helpers.validation import (
+    get_schema,
+    validate_message_body_dict,
+)
 
 ROUTING_KEY = "dhos.DM000004"
 
@@ -23,6 +25,12 @@ class ProcessObservationSetAction(Schema):
     observation_set = fields.Nested(ObservationSet, required=True)
 
 
+# Built once, rather than for every message.
+PROCESS_OBSERVATION_SET_ACTION_SCHEMA: Schema = get_schema(
+    ProcessObservationSetAction, unknown=INCLUDE
+)
+
+
 def process(body: AnyStr) -> None:
     """
     - Summary: Appends encounter information from Encounters API to a published observation set notification.
@@ -53,8 +61,8 @@ def process(body: AnyStr) -> None:
         message=actions_message, action_name="process_observation_set"
     )["data"]
 
-    validated_action_data: Dict = ProcessObservationSetAction().load(
-        action_data, unknown=INCLUDE
+    validated_action_data: Dict = PROCESS_OBSERVATION_SET_ACTION_SCHEMA.load(
+        action_data
     )
 
     # Get the encounter details
@@ -66,6 +74,4 @@ def process(body: AnyStr) -> None:
     processed_msg = {
         "actions": [{"name": "process_observation_set", "data": validated_action_data}]
     }
-    kombu_batteries_included.publish_message(
-        routing_key="dhos.DM000005", body=processed_msg
-    )
+    publishing.publish_message(routing_key="dhos.DM000005", body=processed_msg)
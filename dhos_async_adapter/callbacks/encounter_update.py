@@ -1,15 +1,17 @@
 from typing import AnyStr, Dict, List, Optional
 
-import kombu_batteries_included
 from marshmallow import EXCLUDE, Schema, fields
 from she_logging import logger
 
 from dhos_async_adapter.callbacks import check_orphaned_observations
 from dhos_async_adapter.clients import connector_api, encounters_api
-from dhos_async_adapter.helpers import actions
+from dhos_async_adapter.helpers import actions, publishing
 from dhos_async_adapter.helpers.actions import ActionsMessage
 from dhos_async_adapter.helpers.timestamps import generate_iso8601_timestamp
-from dhos_async_adapter.helpers.validation import validate_message_body_dict
+from dhos_async_adapter.helpers.validation import (
+    get_schema,
+    validate_message_body_dict,
+)
 
 ROUTING_KEY = "dhos.305058001"
 
@@ -32,6 +34,10 @@ class EncounterUpdateMessage(Schema):
     merge_patient_record_uuid = fields.String(required=False, allow_none=True)
 
 
+# Built once, rather than for every message.
+ENCOUNTER_UPDATE_SCHEMA: Schema = get_schema(EncounterUpdateMessage, unknown=EXCLUDE)
+
+
 def process(body: AnyStr) -> None:
     """
     - Summary: Processes an encounter update received via HL7 messages, and updates Encounters API as appropriate.
@@ -137,7 +143,7 @@ def _extract_encounter_data(process_encounter_message: Dict) -> Dict:
     action: Dict = actions.extract_action(
         message=process_encounter_message, action_name="process_encounter"
     )
-    encounter_data = EncounterUpdateMessage().load(action["data"], unknown=EXCLUDE)
+    encounter_data = ENCOUNTER_UPDATE_SCHEMA.load(action["data"])
     if encounter_data.pop("discharge_cancelled", False) is True:
         encounter_data["discharged_at"] = None
     if encounter_data.pop("admission_cancelled", False) is True:
@@ -234,6 +240,6 @@ def _publish_check_orphaned_observations(
             }
         ],
     }
-    kombu_batteries_included.publish_message(
+    publishing.publish_message(
         routing_key=check_orphaned_observations.ROUTING_KEY, body=processed_msg
     )
@@ -1,3 +1,4 @@
+import asyncio
 from datetime import datetime, timezone
 from typing import Any, AnyStr, Dict, List, Set
 
@@ -12,6 +13,12 @@ from dhos_async_adapter.clients import (
     services_api,
     users_api,
 )
+from dhos_async_adapter.clients.aio import encounters_api as encounters_api_aio
+from dhos_async_adapter.clients.aio import locations_api as locations_api_aio
+from dhos_async_adapter.clients.aio import observations_api as observations_api_aio
+from dhos_async_adapter.clients.aio import pdf_api as pdf_api_aio
+from dhos_async_adapter.clients.aio import services_api as services_api_aio
+from dhos_async_adapter.clients.aio import users_api as users_api_aio
 from dhos_async_adapter.helpers.validation import validate_message_body_dict
 
 ROUTING_KEY = "dhos.DM000007"
@@ -61,6 +68,29 @@ def process(body: AnyStr) -> None:
     pdf_api.post_send_pdf(message_body=aggregated_data)
 
 
+async def process_async(body: AnyStr) -> None:
+    """
+    Awaitable version of process, making independent requests concurrently.
+    """
+    logger.info("Received 'aggregate SEND PDF data' message (%s)", ROUTING_KEY)
+    logger.debug(
+        "Aggregate SEND PDF data message body (%s)",
+        ROUTING_KEY,
+        extra={"message_body": body},
+    )
+    aggregate_message: Dict = validate_message_body_dict(
+        body=body, schema=GenerateSendPdfMessage
+    )
+    aggregated_data: Dict[str, Any] = await _aggregate_send_pdf_data_async(
+        encounter_uuid=aggregate_message["encounter_id"]
+    )
+    logger.info(
+        "Triggering SEND PDF generation for encounter with UUID %s",
+        aggregated_data["encounter"]["uuid"],
+    )
+    await pdf_api_aio.post_send_pdf(message_body=aggregated_data)
+
+
 def _aggregate_send_pdf_data(encounter_uuid: str) -> Dict[str, Any]:
     encounter: Dict = encounters_api.get_encounter_by_uuid(
         encounter_uuid=encounter_uuid, show_deleted=True
@@ -80,18 +110,66 @@ def _aggregate_send_pdf_data(encounter_uuid: str) -> Dict[str, Any]:
     ] = observations_api.get_observation_sets_for_encounter_ids(
         encounter_uuids=list(all_encounter_uuids)
     )
+    clinicians: Dict[str, Dict] = users_api.get_clinicians_by_uuids(
+        clinician_uuids=list(_get_clinician_uuids(encounter, observation_sets)),
+        compact=True,
+    )
+    return _build_send_pdf_data(
+        encounter, patient, location, observation_sets, clinicians
+    )
 
-    # Update observation sets to inflate each created_by field with clinician info (where possible).
+
+async def _aggregate_send_pdf_data_async(encounter_uuid: str) -> Dict[str, Any]:
+    encounter: Dict
+    child_encounter_uuids: List[str]
+    encounter, child_encounter_uuids = await asyncio.gather(
+        encounters_api_aio.get_encounter_by_uuid(
+            encounter_uuid=encounter_uuid, show_deleted=True
+        ),
+        encounters_api_aio.get_child_encounters(encounter_uuid, show_deleted=True),
+    )
+    all_encounter_uuids: Set[str] = {encounter_uuid, *child_encounter_uuids}
+    patient: Dict
+    location: Dict
+    observation_sets: List[Dict]
+    patient, location, observation_sets = await asyncio.gather(
+        services_api_aio.get_patient_by_record_id(
+            record_uuid=encounter["patient_record_uuid"]
+        ),
+        locations_api_aio.get_location_by_uuid(
+            location_uuid=encounter["location_uuid"]
+        ),
+        observations_api_aio.get_observation_sets_for_encounter_ids(
+            encounter_uuids=list(all_encounter_uuids)
+        ),
+    )
+    clinicians: Dict[str, Dict] = await users_api_aio.get_clinicians_by_uuids(
+        clinician_uuids=list(_get_clinician_uuids(encounter, observation_sets)),
+        compact=True,
+    )
+    return _build_send_pdf_data(
+        encounter, patient, location, observation_sets, clinicians
+    )
+
+
+def _get_clinician_uuids(encounter: Dict, observation_sets: List[Dict]) -> Set[str]:
     clinician_uuids: Set[str] = set(o["created_by"] for o in observation_sets)
-    score_system_history: List[Dict] = encounter.get("score_system_history", [])
     clinician_uuids |= {
         score_change["created_by"]
-        for score_change in score_system_history
+        for score_change in encounter.get("score_system_history", [])
         if isinstance(score_change["created_by"], str)
     }
-    clinicians: Dict[str, Dict] = users_api.get_clinicians_by_uuids(
-        clinician_uuids=list(clinician_uuids), compact=True
-    )
+    return clinician_uuids
+
+
+def _build_send_pdf_data(
+    encounter: Dict,
+    patient: Dict,
+    location: Dict,
+    observation_sets: List[Dict],
+    clinicians: Dict[str, Dict],
+) -> Dict[str, Any]:
+    # Update observation sets to inflate each created_by field with clinician info (where possible).
     for obs_set in observation_sets:
         clinician_uuid: str = obs_set["created_by"]
         # API returns null for dhos-robot (or other system ids)
@@ -102,6 +180,7 @@ def _aggregate_send_pdf_data(encounter_uuid: str) -> Dict[str, Any]:
             "last_name": clinician_detail.get("last_name") or "",
         }
 
+    score_system_history: List[Dict] = encounter.get("score_system_history", [])
     for score_change in score_system_history:
         clinician_uuid = score_change["created_by"]
         if clinician_uuid is None:
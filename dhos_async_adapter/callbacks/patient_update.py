@@ -2,15 +2,17 @@ from datetime import date
 from typing import AnyStr, Dict, List, Optional, Tuple
 
 import draymed
-import kombu_batteries_included
 from marshmallow import INCLUDE, Schema, fields
 from she_logging import logger
 
 from dhos_async_adapter.clients import connector_api, locations_api, services_api
-from dhos_async_adapter.helpers import actions
+from dhos_async_adapter.helpers import actions, publishing
 from dhos_async_adapter.helpers.actions import ActionsMessage
 from dhos_async_adapter.helpers.exceptions import RejectMessageError
-from dhos_async_adapter.helpers.validation import validate_message_body_dict
+from dhos_async_adapter.helpers.validation import (
+    get_schema,
+    validate_message_body_dict,
+)
 
 ROUTING_KEY = "dhos.24891000000101"
 
@@ -47,6 +49,11 @@ class LocationUpdate(Schema):
     previous_location = fields.Nested(Location, required=False, allow_none=True)
 
 
+# Built once, rather than for every message.
+PATIENT_UPDATE_SCHEMA: Schema = get_schema(PatientUpdate, unknown=INCLUDE)
+LOCATION_UPDATE_SCHEMA: Schema = get_schema(LocationUpdate, unknown=INCLUDE)
+
+
 def process(body: AnyStr) -> None:
     """
     - Summary: Processes a patient update received via HL7 messages, and updates Services API as appropriate.
@@ -112,7 +119,7 @@ def process(body: AnyStr) -> None:
         }
     )
     # 'update_patient_message' holds a reference to 'encounter_action', so we can just republish it directly.
-    kombu_batteries_included.publish_message(
+    publishing.publish_message(
         routing_key="dhos.305058001", body=update_patient_message
     )
 
@@ -126,7 +133,7 @@ def _process_patient(update_patient_message: Dict) -> Tuple[Dict, Optional[Dict]
     process_patient_action: Dict = actions.extract_action(
         message=update_patient_message, action_name="process_patient"
     )
-    patient_data = PatientUpdate().load(process_patient_action["data"], unknown=INCLUDE)
+    patient_data = PATIENT_UPDATE_SCHEMA.load(process_patient_action["data"])
 
     # Strip out fields we don't want, as well as empty and dict fields.
     previous_nhs_number: Optional[str] = patient_data.pop("previous_nhs_number", None)
@@ -177,9 +184,7 @@ def _process_locations(
     )
     if process_location_action is None:
         return None, None
-    location_data = LocationUpdate().load(
-        process_location_action["data"], unknown=INCLUDE
-    )
+    location_data = LOCATION_UPDATE_SCHEMA.load(process_location_action["data"])
 
     return (
         _process_single_location(location_data.get("location")),
@@ -1,46 +1,312 @@
-from typing import Callable, Dict, List, Optional, Union
+import functools
+import gzip
+import random
+import threading
+import time
+import zlib
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from http.cookiejar import DefaultCookiePolicy
+from typing import Callable, Dict, List, Optional, Tuple, Union
+from urllib.parse import urlsplit
 
 import requests
+from requests.adapters import HTTPAdapter
 from she_logging import logger
 
-from dhos_async_adapter.helpers import security
+from dhos_async_adapter import config
+from dhos_async_adapter.clients import (
+    circuit_breaker,
+    concurrency_limiter,
+    single_flight,
+)
+from dhos_async_adapter.clients.circuit_breaker import CircuitBreaker
+from dhos_async_adapter.clients.concurrency_limiter import ConcurrencyLimiter
+from dhos_async_adapter.clients.single_flight import SingleFlight
+from dhos_async_adapter.helpers import deadline, json_codec, security
 from dhos_async_adapter.helpers.exceptions import (
+    DeadlineExceededError,
     RejectMessageError,
     RequeueMessageError,
 )
 
+# Long-lived sessions, keyed by the base URL (scheme and host) of each downstream service,
+# along with when they were created.
+_sessions: Dict[str, Tuple[requests.Session, float]] = {}
+_sessions_lock = threading.Lock()
+
+# A balance between size and speed, as payloads are compressed on the worker threads.
+COMPRESSION_LEVEL = 6
+
+_in_flight_requests: SingleFlight[requests.Response] = SingleFlight()
+
+
+def get_base_url(url: str) -> str:
+    """Returns the base URL (scheme and host) of the service at the URL."""
+    parts = urlsplit(url)
+    return f"{parts.scheme}://{parts.netloc}"
+
+
+def get_session(url: str) -> requests.Session:
+    """
+    Returns the session for the service at the URL, so that requests to the same service
+    reuse keep-alive connections from its pool. Sessions are replaced once they reach their
+    maximum age, so that connections are recycled (for example, to pick up DNS changes).
+    """
+    base_url: str = get_base_url(url)
+    now: float = time.monotonic()
+    with _sessions_lock:
+        session, created_at = _sessions.get(base_url, (None, 0.0))
+        if session is None or now - created_at > config.HTTP_SESSION_MAX_AGE_SEC:
+            # Requests still using the old session keep its connections until they finish;
+            # they are closed when it is garbage collected.
+            session = _create_session()
+            _sessions[base_url] = (session, now)
+    return session
+
+
+def close_sessions() -> None:
+    with _sessions_lock:
+        for session, _ in _sessions.values():
+            session.close()
+        _sessions.clear()
+
+
+def _create_session() -> requests.Session:
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=1, pool_maxsize=config.HTTP_POOL_MAXSIZE)
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    # Sessions are shared between messages and threads, so must not carry cookies.
+    session.cookies.set_policy(DefaultCookiePolicy(allowed_domains=[]))
+    return session
+
 
 def do_request(
     url: str,
     method: str,
     headers: Optional[Dict] = None,
-    payload: Union[None, Dict, List] = None,
+    payload: Union[None, Dict, List, bytes] = None,
     params: Optional[Dict] = None,
     allow_http_error: bool = False,
     timeout: Optional[int] = 30,
+    idempotent: Optional[bool] = None,
+    encoding: Optional[str] = None,
+) -> requests.Response:
+    """
+    Makes a request, raising RequeueMessageError if the service can't be reached or is
+    unavailable, or RejectMessageError for any other error response. Idempotent requests
+    (by default, GETs) are retried first, see get_retry_delay. While the service's circuit
+    breaker is open, RequeueMessageError is raised without making the request. Requests wait
+    while the service's concurrency limit is reached. Identical concurrent GETs are only
+    made once, each caller getting the response (or error) of the one request. Payloads are
+    compressed with the given encoding ("gzip" or "deflate"), see encode_payload. A payload
+    of bytes must already be encoded as JSON, and is sent as it is.
+    """
+    key: Optional[str] = single_flight.get_request_key(
+        method, url, params, headers, allow_http_error, timeout, idempotent
+    )
+    request: Callable[[], requests.Response] = functools.partial(
+        _do_request,
+        url,
+        method,
+        headers,
+        payload,
+        params,
+        allow_http_error,
+        timeout,
+        idempotent,
+        encoding,
+    )
+    if key is None:
+        return request()
+    return _in_flight_requests.do(key, request)
+
+
+def _do_request(
+    url: str,
+    method: str,
+    headers: Optional[Dict],
+    payload: Union[None, Dict, List, bytes],
+    params: Optional[Dict],
+    allow_http_error: bool,
+    timeout: Optional[int],
+    idempotent: Optional[bool],
+    encoding: Optional[str],
 ) -> requests.Response:
     if headers is None:
         headers = security.get_request_headers()
-    actual_method: Callable = getattr(requests, method)
-    try:
-        response: requests.Response = actual_method(
-            url,
-            params=params,
-            headers=headers,
-            json=payload,
-            timeout=timeout,
+    body, encoding_headers = encode_payload(payload, encoding)
+    if body is not None:
+        headers = {**headers, **encoding_headers}
+    actual_method: Callable = getattr(get_session(url), method)
+    base_url: str = get_base_url(url)
+    breaker: CircuitBreaker = circuit_breaker.get_circuit_breaker(base_url)
+    limiter: ConcurrencyLimiter = concurrency_limiter.get_concurrency_limiter(base_url)
+    attempts: int = get_max_attempts(method, idempotent)
+    delay: float = 0.0
+    for attempt in range(1, attempts + 1):
+        check_circuit_breaker(breaker)
+        # Never wait beyond the deadline for processing the message.
+        request_timeout: Optional[float] = deadline.get_timeout(timeout)
+        acquire_timeout: float = deadline.get_timeout(
+            config.HTTP_CONCURRENCY_ACQUIRE_TIMEOUT_SEC
+        )
+        try:
+            with limiter.acquire(acquire_timeout) as permit:
+                response: requests.Response = actual_method(
+                    url,
+                    params=params,
+                    headers=headers,
+                    data=body,
+                    timeout=request_timeout,
+                )
+                permit.succeeded = response.status_code < 500
+            logger.debug(
+                "Request completed with HTTP status code %d", response.status_code
+            )
+            record_response(breaker, response.status_code)
+            if not allow_http_error:
+                response.raise_for_status()
+            return response
+        except requests.HTTPError as e:
+            if e.response.status_code != 503:  # 503 Service Unavailable
+                logger.exception("Unexpected response from API")
+                raise RejectMessageError()
+            next_delay: Optional[float] = get_retry_delay(
+                attempt, attempts, delay, e.response.headers.get("Retry-After")
+            )
+            if next_delay is None:
+                logger.exception("Error when connecting to API")
+                raise RequeueMessageError()
+        except requests.RequestException as e:
+            if isinstance(e, requests.Timeout):
+                check_timeout_shortened(timeout, request_timeout)
+            breaker.record_failure()
+            next_delay = get_retry_delay(attempt, attempts, delay)
+            if next_delay is None:
+                logger.exception("Error when connecting to API")
+                raise RequeueMessageError()
+        delay = next_delay
+        logger.warning(
+            "Request failed, retrying in %.2f seconds (attempt %d of %d)",
+            delay,
+            attempt,
+            attempts,
+            exc_info=True,
+        )
+        deadline.check_time_left(delay)
+        time.sleep(delay)
+    raise RequeueMessageError()
+
+
+def encode_payload(
+    payload: Union[None, Dict, List, bytes], encoding: Optional[str]
+) -> Tuple[Optional[bytes], Dict[str, str]]:
+    """
+    Returns the payload serialised as JSON with the configured codec (see JSON_CODEC), along
+    with the headers describing it, or None if there is no payload. A payload of bytes is
+    taken to be JSON already. If an encoding ("gzip" or "deflate") is given, the body is
+    compressed with it when it is at least HTTP_COMPRESSION_MIN_BYTES.
+    """
+    if payload is None:
+        return None, {}
+    body: bytes = payload if isinstance(payload, bytes) else json_codec.dumps(payload)
+    headers: Dict[str, str] = {"Content-Type": "application/json"}
+    if not encoding or len(body) < config.HTTP_COMPRESSION_MIN_BYTES:
+        return body, headers
+    if encoding == "gzip":
+        compressed: bytes = gzip.compress(body, compresslevel=COMPRESSION_LEVEL)
+    elif encoding == "deflate":
+        compressed = zlib.compress(body, COMPRESSION_LEVEL)
+    else:
+        raise ValueError(f"Unsupported request encoding '{encoding}'")
+    logger.debug(
+        "Compressed request body from %d to %d bytes", len(body), len(compressed)
+    )
+    return compressed, {**headers, "Content-Encoding": encoding}
+
+
+def check_circuit_breaker(breaker: CircuitBreaker) -> None:
+    if not breaker.allow_request():
+        logger.error(
+            "Circuit breaker for %s is open, not sending request", breaker.name
         )
-        logger.debug("Request completed with HTTP status code %d", response.status_code)
-        if not allow_http_error:
-            response.raise_for_status()
-    except requests.HTTPError as e:
-        if e.response.status_code == 503:  # 503 Service Unavailable
-            logger.exception("Error when connecting to API")
-            raise RequeueMessageError()
-        else:
-            logger.exception("Unexpected response from API")
-            raise RejectMessageError()
-    except requests.RequestException:
-        logger.exception("Error when connecting to API")
         raise RequeueMessageError()
-    return response
+
+
+def record_response(breaker: CircuitBreaker, status_code: int) -> None:
+    # Any response other than 503 Service Unavailable shows the service is up.
+    if status_code == 503:
+        breaker.record_failure()
+    else:
+        breaker.record_success()
+
+
+def check_timeout_shortened(
+    timeout: Optional[float], request_timeout: Optional[float]
+) -> None:
+    """
+    Raises DeadlineExceededError if a request timed out only because its timeout was
+    shortened to the time left before the deadline for processing the message. The service
+    may just have been slower than the message could wait for, so this doesn't count as a
+    failure of the service.
+    """
+    if request_timeout is not None and (timeout is None or request_timeout < timeout):
+        logger.error("Deadline for processing message exceeded during request")
+        raise DeadlineExceededError()
+
+
+def get_max_attempts(method: str, idempotent: Optional[bool]) -> int:
+    """
+    Returns how many times a request may be attempted. Only idempotent requests are
+    retried; unless specified, only GETs are assumed to be idempotent.
+    """
+    if idempotent is None:
+        idempotent = method.lower() == "get"
+    return max(1, config.HTTP_RETRY_MAX_ATTEMPTS) if idempotent else 1
+
+
+def get_retry_delay(
+    attempt: int,
+    attempts: int,
+    previous_delay: float,
+    retry_after: Optional[str] = None,
+) -> Optional[float]:
+    """
+    Returns how long to wait before retrying a failed request, or None if it shouldn't be
+    retried. Delays use decorrelated jitter (a random delay between the base delay and
+    three times the previous one), capped at the maximum delay. A Retry-After header from
+    the service is respected, unless it asks for longer than the maximum delay, in which
+    case the message is requeued rather than holding up a worker.
+    """
+    if attempt >= attempts:
+        return None
+    base: float = config.HTTP_RETRY_BASE_DELAY_SEC
+    delay: float = min(
+        config.HTTP_RETRY_MAX_DELAY_SEC,
+        random.uniform(base, max(base, previous_delay * 3)),
+    )
+    retry_after_sec: Optional[float] = _parse_retry_after(retry_after)
+    if retry_after_sec is not None:
+        if retry_after_sec > config.HTTP_RETRY_MAX_DELAY_SEC:
+            return None
+        delay = max(delay, retry_after_sec)
+    return delay
+
+
+def _parse_retry_after(retry_after: Optional[str]) -> Optional[float]:
+    # Either a number of seconds or an HTTP date.
+    if not retry_after:
+        return None
+    try:
+        return max(0.0, float(retry_after))
+    except ValueError:
+        pass
+    try:
+        retry_at: datetime = parsedate_to_datetime(retry_after)
+    except (TypeError, ValueError):
+        return None
+    if retry_at.tzinfo is None:
+        retry_at = retry_at.replace(tzinfo=timezone.utc)
+    return max(0.0, (retry_at - datetime.now(tz=timezone.utc)).total_seconds())
@@ -0,0 +1,192 @@
+import asyncio
+import functools
+import threading
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple, Union
+
+import httpx
+from she_logging import logger
+
+from dhos_async_adapter import config
+from dhos_async_adapter.clients import (
+    check_circuit_breaker,
+    check_timeout_shortened,
+    circuit_breaker,
+    concurrency_limiter,
+    encode_payload,
+    get_base_url,
+    get_max_attempts,
+    get_retry_delay,
+    record_response,
+    single_flight,
+)
+from dhos_async_adapter.clients.circuit_breaker import CircuitBreaker
+from dhos_async_adapter.clients.concurrency_limiter import ConcurrencyLimiter
+from dhos_async_adapter.clients.single_flight import AsyncSingleFlight
+from dhos_async_adapter.helpers import deadline, security
+from dhos_async_adapter.helpers.exceptions import (
+    RejectMessageError,
+    RequeueMessageError,
+)
+
+# Long-lived clients, keyed by event loop (clients can't be shared between loops) and the
+# base URL (scheme and host) of each downstream service.
+_clients: Dict[Tuple[int, str], httpx.AsyncClient] = {}
+_clients_lock = threading.Lock()
+
+_in_flight_requests: AsyncSingleFlight[httpx.Response] = AsyncSingleFlight()
+
+
+def get_client(url: str) -> httpx.AsyncClient:
+    """
+    Returns the client for the service at the URL, so that requests to the same service
+    reuse keep-alive connections from its pool. Idle connections are recycled after
+    HTTP_SESSION_MAX_AGE_SEC.
+    """
+    key: Tuple[int, str] = (id(asyncio.get_running_loop()), get_base_url(url))
+    with _clients_lock:
+        client: Optional[httpx.AsyncClient] = _clients.get(key)
+        if client is None:
+            client = httpx.AsyncClient(
+                limits=httpx.Limits(
+                    max_connections=config.HTTP_POOL_MAXSIZE,
+                    max_keepalive_connections=config.HTTP_POOL_MAXSIZE,
+                    keepalive_expiry=config.HTTP_SESSION_MAX_AGE_SEC,
+                ),
+            )
+            _clients[key] = client
+    return client
+
+
+async def close_clients() -> None:
+    """Closes the clients for the running event loop."""
+    loop_id: int = id(asyncio.get_running_loop())
+    with _clients_lock:
+        keys: List[Tuple[int, str]] = [k for k in _clients if k[0] == loop_id]
+        clients: List[httpx.AsyncClient] = [_clients.pop(k) for k in keys]
+    for client in clients:
+        await client.aclose()
+
+
+async def do_request(
+    url: str,
+    method: str,
+    headers: Optional[Dict] = None,
+    payload: Union[None, Dict, List, bytes] = None,
+    params: Optional[Dict] = None,
+    allow_http_error: bool = False,
+    timeout: Optional[int] = 30,
+    idempotent: Optional[bool] = None,
+    encoding: Optional[str] = None,
+) -> httpx.Response:
+    """
+    Awaitable version of clients.do_request, making the same request, with the same
+    retries, circuit breaker and concurrency limit, and raising the same errors. Identical
+    concurrent GETs are coalesced, and payloads compressed, in the same way.
+    """
+    key: Optional[str] = single_flight.get_request_key(
+        method, url, params, headers, allow_http_error, timeout, idempotent
+    )
+    request: Callable[[], Awaitable[httpx.Response]] = functools.partial(
+        _do_request,
+        url,
+        method,
+        headers,
+        payload,
+        params,
+        allow_http_error,
+        timeout,
+        idempotent,
+        encoding,
+    )
+    if key is None:
+        return await request()
+    return await _in_flight_requests.do(key, request)
+
+
+async def _do_request(
+    url: str,
+    method: str,
+    headers: Optional[Dict],
+    payload: Union[None, Dict, List, bytes],
+    params: Optional[Dict],
+    allow_http_error: bool,
+    timeout: Optional[int],
+    idempotent: Optional[bool],
+    encoding: Optional[str],
+) -> httpx.Response:
+    if headers is None:
+        headers = security.get_request_headers()
+    body, encoding_headers = encode_payload(payload, encoding)
+    if body is not None:
+        headers = {**headers, **encoding_headers}
+    base_url: str = get_base_url(url)
+    breaker: CircuitBreaker = circuit_breaker.get_circuit_breaker(base_url)
+    limiter: ConcurrencyLimiter = concurrency_limiter.get_concurrency_limiter(base_url)
+    attempts: int = get_max_attempts(method, idempotent)
+    delay: float = 0.0
+    for attempt in range(1, attempts + 1):
+        check_circuit_breaker(breaker)
+        # Never wait beyond the deadline for processing the message.
+        request_timeout: Optional[float] = deadline.get_timeout(timeout)
+        acquire_timeout: float = deadline.get_timeout(
+            config.HTTP_CONCURRENCY_ACQUIRE_TIMEOUT_SEC
+        )
+        try:
+            async with limiter.acquire_async(acquire_timeout) as permit:
+                response: httpx.Response = await get_client(url).request(
+                    method.upper(),
+                    url,
+                    params=_encode_params(params),
+                    headers=headers,
+                    content=body,
+                    timeout=request_timeout,
+                )
+                permit.succeeded = response.status_code < 500
+            logger.debug(
+                "Request completed with HTTP status code %d", response.status_code
+            )
+            record_response(breaker, response.status_code)
+            if not allow_http_error:
+                response.raise_for_status()
+            return response
+        except httpx.HTTPStatusError as e:
+            if e.response.status_code != 503:  # 503 Service Unavailable
+                logger.exception("Unexpected response from API")
+                raise RejectMessageError()
+            next_delay: Optional[float] = get_retry_delay(
+                attempt, attempts, delay, e.response.headers.get("Retry-After")
+            )
+            if next_delay is None:
+                logger.exception("Error when connecting to API")
+                raise RequeueMessageError()
+        except httpx.HTTPError as e:
+            if isinstance(e, httpx.TimeoutException):
+                check_timeout_shortened(timeout, request_timeout)
+            breaker.record_failure()
+            next_delay = get_retry_delay(attempt, attempts, delay)
+            if next_delay is None:
+                logger.exception("Error when connecting to API")
+                raise RequeueMessageError()
+        delay = next_delay
+        logger.warning(
+            "Request failed, retrying in %.2f seconds (attempt %d of %d)",
+            delay,
+            attempt,
+            attempts,
+            exc_info=True,
+        )
+        deadline.check_time_left(delay)
+        await asyncio.sleep(delay)
+    raise RequeueMessageError()
+
+
+def _encode_params(params: Optional[Dict]) -> Optional[Dict[str, Any]]:
+    # Encode query parameters as requests does: None values are left out, and other
+    # scalars (notably booleans, as "True"/"False") are converted with str().
+    if params is None:
+        return None
+    return {
+        k: [str(i) for i in v] if isinstance(v, list) else str(v)
+        for k, v in params.items()
+        if v is not None
+    }
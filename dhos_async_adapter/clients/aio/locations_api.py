@@ -0,0 +1,75 @@
+from typing import Any, Dict, List, Optional
+
+import httpx
+from she_logging import logger
+
+from dhos_async_adapter import config
+from dhos_async_adapter.clients.aio import do_request
+from dhos_async_adapter.clients.cache import cached_async, invalidate
+
+
+async def get_locations(
+    location_types: Optional[List[str]] = None, compact: bool = True
+) -> Dict[str, Dict[str, Any]]:
+    url = f"{config.DHOS_LOCATIONS_API_URL}/dhos/v1/location/search"
+    logger.debug(
+        "GETting locations",
+        extra={"url": url},
+    )
+    params = {
+        "location_types": "|".join(location_types) if location_types else None,
+        "compact": compact,
+    }
+    response: httpx.Response = await do_request(url=url, method="get", params=params)
+    result: Dict[str, Dict[str, Any]] = response.json()
+    if not isinstance(result, dict):
+        raise TypeError("Unexpected response from locations API")
+    return result
+
+
+@cached_async("location_by_uuid", ttl_sec=config.LOCATION_CACHE_TTL_SEC)
+async def get_location_by_uuid(location_uuid: str) -> Dict:
+    url = f"{config.DHOS_LOCATIONS_API_URL}/dhos/v1/location/{location_uuid}"
+    logger.debug(
+        "GETting location with UUID %s",
+        location_uuid,
+        extra={"url": url},
+    )
+    response: httpx.Response = await do_request(url=url, method="get")
+    return response.json()
+
+
+@cached_async("locations_by_ods_code", ttl_sec=config.LOCATION_CACHE_TTL_SEC)
+async def get_locations_by_ods_code(ods_code: str) -> Dict[str, Dict[str, Any]]:
+    params = {
+        "ods_code": ods_code,
+    }
+    url = f"{config.DHOS_LOCATIONS_API_URL}/dhos/v1/location/search"
+    logger.debug(
+        "GETting locations with ODS code %s",
+        ods_code,
+        extra={"url": url},
+    )
+    response: httpx.Response = await do_request(url=url, method="get", params=params)
+    locations: Dict[str, Dict[str, Any]] = response.json()
+    if not isinstance(locations, dict):
+        raise TypeError("Unexpected response from locations API")
+    logger.debug(
+        "Retrieved %d locations matching ODS code %s", len(locations), ods_code
+    )
+    return locations
+
+
+async def create_location(locations_details: Dict) -> Dict:
+    url = f"{config.DHOS_LOCATIONS_API_URL}/dhos/v1/location"
+    logger.debug(
+        "POSTing new location",
+        extra={"url": url},
+    )
+    response: httpx.Response = await do_request(
+        url=url, method="post", payload=locations_details
+    )
+    # Searches by this ODS code are no longer empty.
+    if "ods_code" in locations_details:
+        invalidate("locations_by_ods_code", ods_code=locations_details["ods_code"])
+    return response.json()
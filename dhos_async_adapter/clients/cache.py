@@ -0,0 +1,209 @@
+import copy
+import functools
+import inspect
+import json
+import threading
+import time
+from collections import OrderedDict
+from typing import (
+    Any,
+    Awaitable,
+    Callable,
+    Dict,
+    NamedTuple,
+    Optional,
+    Protocol,
+    Tuple,
+    TypeVar,
+    cast,
+)
+
+from she_logging import logger
+
+from dhos_async_adapter import config
+
+F = TypeVar("F", bound=Callable[..., Any])
+AF = TypeVar("AF", bound=Callable[..., Awaitable[Any]])
+
+
+class CacheBackend(Protocol):
+    """Storage for cached responses. Implementations must be thread-safe."""
+
+    def get(self, key: str) -> Tuple[bool, Any]:
+        """Returns whether the key was found (and hasn't expired), and its value."""
+        ...
+
+    def set(self, key: str, value: Any, ttl_sec: float) -> None:
+        ...
+
+    def delete(self, key: str) -> None:
+        ...
+
+    def clear(self) -> None:
+        ...
+
+
+class _Entry(NamedTuple):
+    value: Any
+    expires_at: float
+
+
+class InMemoryCache:
+    """A cache backend holding up to max_entries, evicting the least recently used."""
+
+    def __init__(self, max_entries: int) -> None:
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, _Entry]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Tuple[bool, Any]:
+        with self._lock:
+            entry: Optional[_Entry] = self._entries.get(key)
+            if entry is None:
+                return False, None
+            if entry.expires_at <= time.monotonic():
+                del self._entries[key]
+                return False, None
+            self._entries.move_to_end(key)
+            return True, entry.value
+
+    def set(self, key: str, value: Any, ttl_sec: float) -> None:
+        with self._lock:
+            self._entries[key] = _Entry(value, time.monotonic() + ttl_sec)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def delete(self, key: str) -> None:
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+
+class CacheStats:
+    def __init__(self) -> None:
+        self.hits = 0
+        self.misses = 0
+
+
+_backend: CacheBackend = InMemoryCache(max_entries=config.CACHE_MAX_ENTRIES)
+_stats: Dict[str, CacheStats] = {}
+
+
+def set_backend(backend: CacheBackend) -> None:
+    """Replaces the cache backend, for example with one shared between instances."""
+    global _backend
+    _backend = backend
+
+
+def get_cache_stats() -> Dict[str, Dict[str, int]]:
+    """Returns the hit and miss counts of each cached function, for monitoring."""
+    return {
+        name: {"hits": stats.hits, "misses": stats.misses}
+        for name, stats in _stats.items()
+    }
+
+
+def invalidate(name: str, **arguments: Any) -> None:
+    """Forgets the cached result of a call, given all of its arguments by name."""
+    _backend.delete(_make_key(name, arguments))
+
+
+def clear_caches() -> None:
+    _backend.clear()
+    _stats.clear()
+
+
+def cached(
+    name: str, ttl_sec: float, negative_ttl_sec: Optional[float] = None
+) -> Callable[[F], F]:
+    """
+    Caches the results of a client function for ttl_sec, keyed by its arguments. Results
+    meaning nothing was found (None for a 404, or an empty search result) are only cached if
+    negative_ttl_sec is given, and for that long. Results are copied in and out of the
+    cache, as callers may modify them.
+    """
+
+    def decorator(fn: F) -> F:
+        signature: inspect.Signature = inspect.signature(fn)
+
+        @functools.wraps(fn)
+        def wrapper(*args: Any, **kwargs: Any) -> Any:
+            key: str = _get_key(name, signature, args, kwargs)
+            found, value = _lookup(name, key)
+            if found:
+                return value
+            result: Any = fn(*args, **kwargs)
+            _store(key, result, ttl_sec, negative_ttl_sec)
+            return result
+
+        return cast(F, wrapper)
+
+    return decorator
+
+
+def cached_async(
+    name: str, ttl_sec: float, negative_ttl_sec: Optional[float] = None
+) -> Callable[[AF], AF]:
+    """
+    Awaitable version of cached. Given the same name as a sync function, they share
+    cached results.
+    """
+
+    def decorator(fn: AF) -> AF:
+        signature: inspect.Signature = inspect.signature(fn)
+
+        @functools.wraps(fn)
+        async def wrapper(*args: Any, **kwargs: Any) -> Any:
+            key: str = _get_key(name, signature, args, kwargs)
+            found, value = _lookup(name, key)
+            if found:
+                return value
+            result: Any = await fn(*args, **kwargs)
+            _store(key, result, ttl_sec, negative_ttl_sec)
+            return result
+
+        return cast(AF, wrapper)
+
+    return decorator
+
+
+def _get_key(
+    name: str, signature: inspect.Signature, args: Tuple, kwargs: Dict[str, Any]
+) -> str:
+    # Bind the arguments so the same call gives the same key however they were passed.
+    bound: inspect.BoundArguments = signature.bind(*args, **kwargs)
+    bound.apply_defaults()
+    return _make_key(name, bound.arguments)
+
+
+def _make_key(name: str, arguments: Dict[str, Any]) -> str:
+    return f"{name}:{json.dumps(arguments, sort_keys=True, default=str)}"
+
+
+def _lookup(name: str, key: str) -> Tuple[bool, Any]:
+    if not config.CACHE_ENABLED:
+        return False, None
+    stats: CacheStats = _stats.setdefault(name, CacheStats())
+    found, value = _backend.get(key)
+    if found:
+        stats.hits += 1
+        logger.debug("Cache hit for %s", key)
+        return True, copy.deepcopy(value)
+    stats.misses += 1
+    return False, None
+
+
+def _store(
+    key: str, result: Any, ttl_sec: float, negative_ttl_sec: Optional[float]
+) -> None:
+    if not config.CACHE_ENABLED:
+        return
+    if result is None or (isinstance(result, (dict, list)) and not result):
+        if negative_ttl_sec is None:
+            return
+        ttl_sec = negative_ttl_sec
+    _backend.set(key, copy.deepcopy(result), ttl_sec)
@@ -0,0 +1,99 @@
+import threading
+import time
+from typing import Dict
+
+from she_logging import logger
+
+from dhos_async_adapter import config
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half-open"
+
+
+class CircuitBreaker:
+    """
+    Tracks failures of requests to a downstream service. After failure_threshold
+    consecutive failures the circuit opens, and requests fail fast without being sent.
+    Once reset_timeout_sec has passed, one trial request is let through (half-open): if it
+    succeeds the circuit closes again, otherwise it reopens.
+    """
+
+    def __init__(
+        self, name: str, failure_threshold: int, reset_timeout_sec: float
+    ) -> None:
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_timeout_sec = reset_timeout_sec
+        self._state = CLOSED
+        self._failures = 0
+        # When the circuit opened, or when the half-open trial request started.
+        self._changed_at = 0.0
+        self._lock = threading.Lock()
+
+    @property
+    def state(self) -> str:
+        return self._state
+
+    def allow_request(self) -> bool:
+        if self.failure_threshold < 1:
+            return True
+        with self._lock:
+            if self._state == CLOSED:
+                return True
+            if time.monotonic() - self._changed_at < self.reset_timeout_sec:
+                return False
+            # Let a trial request through. If it never reports back, another is let
+            # through after the reset timeout.
+            if self._state == OPEN:
+                logger.info("Circuit breaker for %s is half-open", self.name)
+            self._state = HALF_OPEN
+            self._changed_at = time.monotonic()
+            return True
+
+    def record_success(self) -> None:
+        with self._lock:
+            if self._state != CLOSED:
+                logger.info("Circuit breaker for %s has closed", self.name)
+            self._state = CLOSED
+            self._failures = 0
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self._failures += 1
+            if self._state == HALF_OPEN or (
+                self._state == CLOSED and self._failures >= self.failure_threshold
+            ):
+                logger.warning(
+                    "Circuit breaker for %s has opened after %d failures",
+                    self.name,
+                    self._failures,
+                )
+                self._state = OPEN
+                self._changed_at = time.monotonic()
+
+
+_circuit_breakers: Dict[str, CircuitBreaker] = {}
+_circuit_breakers_lock = threading.Lock()
+
+
+def get_circuit_breaker(base_url: str) -> CircuitBreaker:
+    with _circuit_breakers_lock:
+        if base_url not in _circuit_breakers:
+            _circuit_breakers[base_url] = CircuitBreaker(
+                name=base_url,
+                failure_threshold=config.CIRCUIT_BREAKER_FAILURE_THRESHOLD,
+                reset_timeout_sec=config.CIRCUIT_BREAKER_RESET_TIMEOUT_SEC,
+            )
+        return _circuit_breakers[base_url]
+
+
+def get_circuit_states() -> Dict[str, str]:
+    """Returns the state of the circuit breaker for each downstream service, for monitoring."""
+    with _circuit_breakers_lock:
+        return {name: breaker.state for name, breaker in _circuit_breakers.items()}
+
+
+def reset_circuit_breakers() -> None:
+    with _circuit_breakers_lock:
+        _circuit_breakers.clear()
@@ -0,0 +1,157 @@
+import asyncio
+import threading
+import time
+from contextlib import asynccontextmanager, contextmanager
+from typing import AsyncIterator, Dict, Iterator, Optional
+
+from she_logging import logger
+
+from dhos_async_adapter import config
+from dhos_async_adapter.helpers.exceptions import RequeueMessageError
+
+# How often waiting coroutines check whether a request slot has become free.
+_ASYNC_POLL_INTERVAL_SEC = 0.01
+# How quickly the baseline latency drifts up towards slower observed latencies.
+_BASELINE_DRIFT = 0.01
+
+
+class Permit:
+    """Permission to send one request; set succeeded once it has."""
+
+    def __init__(self) -> None:
+        self.succeeded = False
+
+
+class ConcurrencyLimiter:
+    """
+    Limits the number of concurrent requests to a downstream service, adapting the limit
+    with AIMD (additive increase, multiplicative decrease). While requests succeed and their
+    latency stays within latency_tolerance times the baseline (the fastest recent latency),
+    the limit grows by about one per limit's worth of requests. When a request fails or is
+    slow, the limit is cut by backoff_ratio.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        initial_limit: float,
+        min_limit: float,
+        max_limit: float,
+        latency_tolerance: float,
+        backoff_ratio: float = 0.9,
+    ) -> None:
+        self.name = name
+        self.min_limit = min_limit
+        self.max_limit = max_limit
+        self.latency_tolerance = latency_tolerance
+        self.backoff_ratio = backoff_ratio
+        self._limit = float(initial_limit)
+        self._in_flight = 0
+        self._baseline_latency: Optional[float] = None
+        self._condition = threading.Condition()
+
+    @property
+    def limit(self) -> int:
+        return max(1, int(self._limit))
+
+    @property
+    def in_flight(self) -> int:
+        return self._in_flight
+
+    def try_acquire(self) -> bool:
+        with self._condition:
+            if self._in_flight >= self.limit:
+                return False
+            self._in_flight += 1
+            return True
+
+    def release(self, latency: float, succeeded: bool) -> None:
+        with self._condition:
+            self._in_flight -= 1
+            self._update_limit(latency, succeeded)
+            self._condition.notify_all()
+
+    @contextmanager
+    def acquire(self, timeout: float) -> Iterator[Permit]:
+        """Waits up to timeout seconds for a request slot, raising RequeueMessageError if none is free."""
+        deadline: float = time.monotonic() + timeout
+        with self._condition:
+            while not self.try_acquire():
+                remaining: float = deadline - time.monotonic()
+                if remaining <= 0 or not self._condition.wait(remaining):
+                    self._raise_saturated()
+        permit = Permit()
+        start: float = time.monotonic()
+        try:
+            yield permit
+        finally:
+            self.release(time.monotonic() - start, permit.succeeded)
+
+    @asynccontextmanager
+    async def acquire_async(self, timeout: float) -> AsyncIterator[Permit]:
+        """Awaitable version of acquire, which doesn't block the event loop while waiting."""
+        deadline: float = time.monotonic() + timeout
+        while not self.try_acquire():
+            if time.monotonic() >= deadline:
+                self._raise_saturated()
+            await asyncio.sleep(_ASYNC_POLL_INTERVAL_SEC)
+        permit = Permit()
+        start: float = time.monotonic()
+        try:
+            yield permit
+        finally:
+            self.release(time.monotonic() - start, permit.succeeded)
+
+    def _raise_saturated(self) -> None:
+        logger.error(
+            "Timed out waiting for a request slot for %s (limit %d)",
+            self.name,
+            self.limit,
+        )
+        raise RequeueMessageError()
+
+    def _update_limit(self, latency: float, succeeded: bool) -> None:
+        if self._baseline_latency is None or latency < self._baseline_latency:
+            self._baseline_latency = latency
+        else:
+            self._baseline_latency += (
+                latency - self._baseline_latency
+            ) * _BASELINE_DRIFT
+        if not succeeded or latency > self._baseline_latency * self.latency_tolerance:
+            previous: int = self.limit
+            self._limit = max(self.min_limit, self._limit * self.backoff_ratio)
+            if self.limit < previous:
+                logger.debug(
+                    "Reduced concurrency limit for %s to %d", self.name, self.limit
+                )
+        elif self._in_flight + 1 >= self.limit / 2:
+            # Only grow the limit while it is being used.
+            self._limit = min(self.max_limit, self._limit + 1 / self._limit)
+
+
+_limiters: Dict[str, ConcurrencyLimiter] = {}
+_limiters_lock = threading.Lock()
+
+
+def get_concurrency_limiter(base_url: str) -> ConcurrencyLimiter:
+    with _limiters_lock:
+        if base_url not in _limiters:
+            _limiters[base_url] = ConcurrencyLimiter(
+                name=base_url,
+                initial_limit=config.HTTP_CONCURRENCY_INITIAL_LIMIT,
+                min_limit=config.HTTP_CONCURRENCY_MIN_LIMIT,
+                max_limit=config.HTTP_CONCURRENCY_MAX_LIMIT,
+                latency_tolerance=config.HTTP_CONCURRENCY_LATENCY_TOLERANCE,
+            )
+        return _limiters[base_url]
+
+
+def get_concurrency_limits() -> Dict[str, int]:
+    """Returns the current concurrency limit for each downstream service, for monitoring."""
+    with _limiters_lock:
+        return {name: limiter.limit for name, limiter in _limiters.items()}
+
+
+def reset_concurrency_limiters() -> None:
+    with _limiters_lock:
+        _limiters.clear()
@@ -1,4 +1,4 @@
-from typing import Dict
+from typing import Dict, Union
 
 from she_logging import logger
 
@@ -12,7 +12,7 @@ def patch_hl7_message(message_uuid: str, message_body: Dict) -> None:
         "Patching message to dhos-connector-api",
         extra={"message_body": message_body},
     )
-    do_request(url=url, method="patch", payload=message_body)
+    do_request(url=url, method="patch", payload=message_body, idempotent=True)
 
 
 def post_oru_message(message_body: Dict) -> None:
@@ -27,7 +27,7 @@ def post_hl7_message(message_uuid: str, message_body: Dict) -> None:
     do_request(url=url, method="post", payload=message_body)
 
 
-def post_cda_message(message_body: Dict) -> None:
+def post_cda_message(message_body: Union[Dict, bytes]) -> None:
     url = f"{config.DHOS_CONNECTOR_API_URL}/dhos/v1/cda_message"
     logger.debug("Posting HL7 CDA message for processing to dhos-connector-api")
     do_request(url=url, method="post", payload=message_body)
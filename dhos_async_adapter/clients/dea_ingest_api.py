@@ -21,4 +21,5 @@ def post_to_dea_ingest(export_data: Dict) -> None:
         method="post",
         headers=security.get_dea_request_headers(),
         payload=export_data,
+        encoding=config.DEA_INGEST_REQUEST_ENCODING,
     )
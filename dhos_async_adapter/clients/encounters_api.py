@@ -83,7 +83,9 @@ def update_encounter_by_uuid(encounter_uuid: str, encounter_data: Dict) -> Dict:
     )
     if "patient_uuid" in encounter_data:
         del encounter_data["patient_uuid"]
-    response = do_request(url=url, method="patch", payload=encounter_data)
+    response = do_request(
+        url=url, method="patch", payload=encounter_data, idempotent=True
+    )
     return response.json()
 
 
@@ -5,6 +5,7 @@ from she_logging import logger
 
 from dhos_async_adapter import config
 from dhos_async_adapter.clients import do_request
+from dhos_async_adapter.clients.cache import cached, invalidate
 
 
 def get_locations(
@@ -26,6 +27,7 @@ def get_locations(
     return result
 
 
+@cached("location_by_uuid", ttl_sec=config.LOCATION_CACHE_TTL_SEC)
 def get_location_by_uuid(location_uuid: str) -> Dict:
     url = f"{config.DHOS_LOCATIONS_API_URL}/dhos/v1/location/{location_uuid}"
     logger.debug(
@@ -37,6 +39,7 @@ def get_location_by_uuid(location_uuid: str) -> Dict:
     return response.json()
 
 
+@cached("locations_by_ods_code", ttl_sec=config.LOCATION_CACHE_TTL_SEC)
 def get_locations_by_ods_code(ods_code: str) -> Dict[str, Dict[str, Any]]:
     params = {
         "ods_code": ods_code,
@@ -66,4 +69,7 @@ def create_location(locations_details: Dict) -> Dict:
     response: requests.Response = do_request(
         url=url, method="post", payload=locations_details
     )
+    # Searches by this ODS code are no longer empty.
+    if "ods_code" in locations_details:
+        invalidate("locations_by_ods_code", ods_code=locations_details["ods_code"])
     return response.json()
@@ -12,7 +12,12 @@ def post_send_pdf(message_body: Dict) -> None:
         "Posting SEND PDF message data to dhos-pdf-api",
         extra={"message_body": message_body},
     )
-    do_request(url=url, method="post", payload=message_body)
+    do_request(
+        url=url,
+        method="post",
+        payload=message_body,
+        encoding=config.SEND_PDF_REQUEST_ENCODING,
+    )
 
 
 def post_ward_pdf(message_body: Dict) -> None:
@@ -76,7 +76,7 @@ def update_patient(patient_uuid: str, patient_details: Dict) -> Dict:
         extra={"url": url},
     )
     response: requests.Response = do_request(
-        url=url, method="patch", payload=patient_details
+        url=url, method="patch", payload=patient_details, idempotent=True
     )
     return response.json()
 
@@ -0,0 +1,144 @@
+import asyncio
+import copy
+import json
+import threading
+from typing import Any, Awaitable, Callable, Dict, Generic, Optional, Tuple, TypeVar
+
+from she_logging import logger
+
+from dhos_async_adapter import config
+from dhos_async_adapter.helpers import deadline
+from dhos_async_adapter.helpers.exceptions import DeadlineExceededError
+
+T = TypeVar("T")
+
+
+def get_request_key(
+    method: str,
+    url: str,
+    params: Optional[Dict],
+    headers: Optional[Dict],
+    allow_http_error: bool,
+    timeout: Optional[int],
+    idempotent: Optional[bool],
+) -> Optional[str]:
+    """
+    Returns a key identifying a request, so that identical requests can be coalesced, or
+    None if it mustn't be. Only GETs are coalesced, as other requests change state.
+    """
+    if not config.HTTP_SINGLE_FLIGHT_ENABLED or method.lower() != "get":
+        return None
+    return json.dumps(
+        [url, params, headers, allow_http_error, timeout, idempotent],
+        sort_keys=True,
+        default=str,
+    )
+
+
+class _Call(Generic[T]):
+    def __init__(self) -> None:
+        self.done = threading.Event()
+        self.result: Optional[T] = None
+        self.error: Optional[BaseException] = None
+        self.waiters = 0
+
+
+class SingleFlight(Generic[T]):
+    """
+    Coalesces identical concurrent calls: while a call with a key is in progress, further
+    calls with the same key wait for it and share its result, rather than repeating it.
+    """
+
+    def __init__(self) -> None:
+        self._calls: Dict[str, _Call[T]] = {}
+        self._lock = threading.Lock()
+
+    def do(self, key: str, fn: Callable[[], T]) -> T:
+        with self._lock:
+            existing: Optional[_Call[T]] = self._calls.get(key)
+            if existing is not None:
+                existing.waiters += 1
+            else:
+                call: _Call[T] = _Call()
+                self._calls[key] = call
+        if existing is not None:
+            return self._wait(key, existing, fn)
+        try:
+            call.result = fn()
+            return call.result
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+
+    def _wait(self, key: str, call: _Call[T], fn: Callable[[], T]) -> T:
+        logger.debug("Waiting for identical call in progress: %s", key)
+        if not call.done.wait(deadline.get_timeout(None)):
+            logger.error("Deadline exceeded waiting for identical call: %s", key)
+            raise DeadlineExceededError()
+        if call.error is None:
+            return call.result  # type: ignore
+        if not isinstance(call.error, Exception):
+            # The call was interrupted (e.g. by KeyboardInterrupt) rather than failing, so
+            # make it again.
+            return fn()
+        if isinstance(call.error, DeadlineExceededError) and _has_time_left():
+            # The call ran out of the time its caller had, but this caller has more.
+            logger.debug("Identical call exceeded its deadline, retrying: %s", key)
+            return self.do(key, fn)
+        raise _copy_error(call.error)
+
+
+class AsyncSingleFlight(Generic[T]):
+    """Awaitable version of SingleFlight. Calls are only coalesced within an event loop."""
+
+    def __init__(self) -> None:
+        self._tasks: Dict[Tuple[int, str], "asyncio.Future[T]"] = {}
+        self._lock = threading.Lock()
+
+    async def do(self, key: str, fn: Callable[[], Awaitable[T]]) -> T:
+        task_key: Tuple[int, str] = (id(asyncio.get_running_loop()), key)
+        with self._lock:
+            task: Optional["asyncio.Future[T]"] = self._tasks.get(task_key)
+            leader: bool = task is None
+            if task is None:
+                task = self._tasks[task_key] = asyncio.ensure_future(fn())
+                task.add_done_callback(lambda _: self._remove(task_key))
+        if not leader:
+            logger.debug("Waiting for identical call in progress: %s", key)
+        try:
+            # Shielded, so the call isn't cancelled for the others if one caller gives up.
+            return await asyncio.wait_for(
+                asyncio.shield(task), deadline.get_timeout(None)
+            )
+        except asyncio.TimeoutError:
+            logger.error("Deadline exceeded waiting for identical call: %s", key)
+            raise DeadlineExceededError()
+        except Exception as e:
+            if leader:
+                raise
+            if isinstance(e, DeadlineExceededError) and _has_time_left():
+                # The call ran out of the time its caller had, but this caller has more.
+                logger.debug("Identical call exceeded its deadline, retrying: %s", key)
+                return await self.do(key, fn)
+            raise _copy_error(e)
+
+    def _remove(self, task_key: Tuple[int, str]) -> None:
+        with self._lock:
+            self._tasks.pop(task_key, None)
+
+
+def _has_time_left() -> bool:
+    remaining: Optional[float] = deadline.get_remaining()
+    return remaining is None or remaining > 0
+
+
+def _copy_error(error: BaseException) -> BaseException:
+    # Each caller gets its own exception, so tracebacks aren't appended to across threads.
+    try:
+        return copy.copy(error)
+    except Exception:
+        return error
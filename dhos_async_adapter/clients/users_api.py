@@ -5,9 +5,15 @@ from she_logging import logger
 
 from dhos_async_adapter import config
 from dhos_async_adapter.clients import do_request
+from dhos_async_adapter.clients.cache import cached
 from dhos_async_adapter.helpers.exceptions import RejectMessageError
 
 
+@cached(
+    "clinician_by_uuid",
+    ttl_sec=config.CLINICIAN_CACHE_TTL_SEC,
+    negative_ttl_sec=config.CACHE_NEGATIVE_TTL_SEC,
+)
 def get_clinician_by_uuid(clinician_uuid: str) -> Optional[Dict]:
     url = f"{config.DHOS_USERS_API_URL}/dhos/v1/clinician/{clinician_uuid}"
     logger.debug(
@@ -37,6 +43,11 @@ def get_clinicians_by_uuids(
         extra={"url": url},
     )
     response: requests.Response = do_request(
-        url=url, method="post", payload=clinician_uuids, params=params
+        url=url,
+        method="post",
+        payload=clinician_uuids,
+        params=params,
+        # A lookup, so safe to retry.
+        idempotent=True,
     )
     return response.json()
@@ -0,0 +1,148 @@
+import socket
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import requests
+from she_logging import logger
+
+from dhos_async_adapter import clients, config
+
+# Resolved addresses, keyed by the arguments to socket.getaddrinfo, along with when they
+# expire.
+_addresses: Dict[Tuple, Tuple[List, float]] = {}
+_addresses_lock = threading.Lock()
+_original_getaddrinfo: Callable[..., List] = socket.getaddrinfo
+
+
+def install_dns_cache() -> None:
+    """
+    Caches DNS lookups for DNS_CACHE_TTL_SEC, so that new connections to downstream services
+    (requests and httpx both resolve hosts with socket.getaddrinfo) don't each wait for a
+    lookup. Failed lookups aren't cached.
+    """
+    if config.DNS_CACHE_TTL_SEC > 0:
+        socket.getaddrinfo = _cached_getaddrinfo  # type: ignore
+
+
+def uninstall_dns_cache() -> None:
+    socket.getaddrinfo = _original_getaddrinfo
+    with _addresses_lock:
+        _addresses.clear()
+
+
+def _cached_getaddrinfo(*args: Any, **kwargs: Any) -> List:
+    key: Tuple = (args, tuple(sorted(kwargs.items())))
+    now: float = time.monotonic()
+    with _addresses_lock:
+        addresses, expires_at = _addresses.get(key, ([], 0.0))
+    if addresses and now < expires_at:
+        return list(addresses)
+    addresses = _original_getaddrinfo(*args, **kwargs)
+    with _addresses_lock:
+        _addresses[key] = (addresses, now + config.DNS_CACHE_TTL_SEC)
+    return list(addresses)
+
+
+def get_service_urls() -> List[str]:
+    """Returns the base URLs of every downstream service in config (the *_API_URL settings)."""
+    urls: List[str] = [
+        clients.get_base_url(value)
+        for name, value in sorted(vars(config).items())
+        if name.endswith("_API_URL") and isinstance(value, str) and value
+    ]
+    return list(dict.fromkeys(urls))
+
+
+def warm_up(urls: Optional[List[str]] = None) -> Dict[str, bool]:
+    """
+    Resolves each service's host and opens a keep-alive connection to it in its session's
+    pool, so that the first messages don't pay for DNS lookups and connection setup. Returns
+    whether each service could be reached; any HTTP response counts, as the request is only
+    for the connection. Services are warmed up concurrently, so this takes no longer than
+    the slowest of them (at most about WARMUP_TIMEOUT_SEC).
+    """
+    if urls is None:
+        urls = get_service_urls()
+    results: Dict[str, bool] = {}
+    if urls:
+        with ThreadPoolExecutor(
+            max_workers=len(urls), thread_name_prefix="warm-up"
+        ) as executor:
+            results = dict(zip(urls, executor.map(_warm_up_service, urls)))
+    logger.info(
+        "Warmed up connections to %d of %d services",
+        sum(results.values()),
+        len(results),
+    )
+    return results
+
+
+def _warm_up_service(url: str) -> bool:
+    try:
+        clients.get_session(url).head(
+            url, timeout=config.WARMUP_TIMEOUT_SEC, allow_redirects=False
+        )
+        return True
+    except requests.RequestException as e:
+        logger.warning("Couldn't connect to %s during warm-up: %s", url, e)
+        return False
+
+
+def services_reachable(results: Dict[str, bool]) -> bool:
+    # A single service being down isn't a problem with this process, and restarting it
+    # wouldn't help, but none being reachable suggests its network or DNS has failed.
+    return not results or any(results.values())
+
+
+class Liveness:
+    """
+    Reports the process as alive only while its connection to RabbitMQ is alive and, as
+    far as the last warm-up could tell, downstream services are reachable.
+    """
+
+    def __init__(self, set_alive: Callable[[bool], None]) -> None:
+        self._set_alive = set_alive
+        self._connection_alive = False
+        self._services_reachable = True
+        self._lock = threading.Lock()
+
+    def set_connection_alive(self, alive: bool) -> None:
+        with self._lock:
+            self._connection_alive = alive
+            self._update()
+
+    def set_services_reachable(self, reachable: bool) -> None:
+        with self._lock:
+            self._services_reachable = reachable
+            self._update()
+
+    def _update(self) -> None:
+        self._set_alive(self._connection_alive and self._services_reachable)
+
+
+class KeepWarm:
+    """Periodically repeats the warm-up in a background thread, keeping connections open."""
+
+    def __init__(
+        self, interval_sec: float, on_result: Callable[[Dict[str, bool]], None]
+    ) -> None:
+        self.interval_sec = interval_sec
+        self.on_result = on_result
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="keep-warm", daemon=True)
+
+    def start(self) -> None:
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval_sec):
+            # noinspection PyBroadException
+            try:
+                self.on_result(warm_up())
+            except Exception:
+                logger.exception("Failed to keep connections warm")
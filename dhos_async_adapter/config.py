@@ -1,6 +1,7 @@
 from pathlib import Path
 
 from environs import Env
+from marshmallow.validate import OneOf
 
 DEFAULT_SYSTEM_JWT_SCOPE: str = " ".join(
     [
@@ -48,10 +49,20 @@ SYSTEM_JWT_SCOPE: str = env.str(
     default=DEFAULT_SYSTEM_JWT_SCOPE,
 )
 SYSTEM_JWT_EXPIRY_SEC: int = env.int("SYSTEM_JWT_EXPIRY_SEC", default=300)
+# The system JWT is reused until this long before it expires, when a new one is signed in
+# the background.
+SYSTEM_JWT_REFRESH_MARGIN_SEC: int = env.int(
+    "SYSTEM_JWT_REFRESH_MARGIN_SEC", default=60
+)
 DEA_AUTH0_CLIENT_ID: str = env.str("DEA_AUTH0_CLIENT_ID")
 DEA_AUTH0_CLIENT_SECRET: str = env.str("DEA_AUTH0_CLIENT_SECRET")
 DEA_AUTH0_AUDIENCE: str = env.str("DEA_AUTH0_AUDIENCE")
 DEA_AUTH0_TOKEN_URL: str = env.str("DEA_AUTH0_TOKEN_URL")
+# The DEA Auth0 token is refreshed in the background DEA_AUTH0_REFRESH_AHEAD_SEC before it
+# expires, plus up to DEA_AUTH0_REFRESH_JITTER_SEC so that pods don't all refresh at once.
+DEA_AUTH0_REFRESH_AHEAD_SEC: int = env.int("DEA_AUTH0_REFRESH_AHEAD_SEC", default=300)
+DEA_AUTH0_REFRESH_JITTER_SEC: int = env.int("DEA_AUTH0_REFRESH_JITTER_SEC", default=60)
+DEA_AUTH0_TIMEOUT_SEC: float = env.float("DEA_AUTH0_TIMEOUT_SEC", default=10)
 
 # URLs for services we need to talk to
 DEA_INGEST_API_URL: str = env.str("DEA_INGEST_API_URL")
@@ -69,6 +80,122 @@ DHOS_SERVICES_API_URL = env.str("DHOS_SERVICES_API_URL")
 DHOS_USERS_API_URL = env.str("DHOS_USERS_API_URL")
 GDM_BG_READINGS_API_URL = env.str("GDM_BG_READINGS_API_URL")
 
+# HTTP client settings. Each downstream service gets a long-lived session with a pool of up
+# to HTTP_POOL_MAXSIZE keep-alive connections, replaced every HTTP_SESSION_MAX_AGE_SEC.
+HTTP_POOL_MAXSIZE: int = env.int("HTTP_POOL_MAXSIZE", default=20)
+HTTP_SESSION_MAX_AGE_SEC: float = env.float("HTTP_SESSION_MAX_AGE_SEC", default=300)
+# Idempotent requests that fail with a connection error or a 503 are retried up to
+# HTTP_RETRY_MAX_ATTEMPTS times in total, with jittered backoff, before requeueing the message.
+HTTP_RETRY_MAX_ATTEMPTS: int = env.int("HTTP_RETRY_MAX_ATTEMPTS", default=3)
+HTTP_RETRY_BASE_DELAY_SEC: float = env.float("HTTP_RETRY_BASE_DELAY_SEC", default=0.2)
+HTTP_RETRY_MAX_DELAY_SEC: float = env.float("HTTP_RETRY_MAX_DELAY_SEC", default=5)
+# Concurrent requests to each service are limited, starting at HTTP_CONCURRENCY_INITIAL_LIMIT
+# and adapting between the minimum and maximum as latency and errors rise and fall.
+# Requests that can't get a slot within HTTP_CONCURRENCY_ACQUIRE_TIMEOUT_SEC are requeued.
+HTTP_CONCURRENCY_INITIAL_LIMIT: int = env.int(
+    "HTTP_CONCURRENCY_INITIAL_LIMIT", default=10
+)
+HTTP_CONCURRENCY_MIN_LIMIT: int = env.int("HTTP_CONCURRENCY_MIN_LIMIT", default=1)
+HTTP_CONCURRENCY_MAX_LIMIT: int = env.int("HTTP_CONCURRENCY_MAX_LIMIT", default=100)
+HTTP_CONCURRENCY_LATENCY_TOLERANCE: float = env.float(
+    "HTTP_CONCURRENCY_LATENCY_TOLERANCE", default=2.0
+)
+HTTP_CONCURRENCY_ACQUIRE_TIMEOUT_SEC: float = env.float(
+    "HTTP_CONCURRENCY_ACQUIRE_TIMEOUT_SEC", default=30
+)
+# On startup, connections are opened to every service, failing after WARMUP_TIMEOUT_SEC, and
+# then every KEEP_WARM_INTERVAL_SEC (0 to disable). DNS lookups are cached for
+# DNS_CACHE_TTL_SEC (0 to disable).
+WARMUP_ENABLED: bool = env.bool("WARMUP_ENABLED", default=True)
+WARMUP_TIMEOUT_SEC: float = env.float("WARMUP_TIMEOUT_SEC", default=5)
+KEEP_WARM_INTERVAL_SEC: float = env.float("KEEP_WARM_INTERVAL_SEC", default=0)
+DNS_CACHE_TTL_SEC: float = env.float("DNS_CACHE_TTL_SEC", default=60)
+# Request bodies for endpoints that opt in are compressed with the given encoding ("gzip" or
+# "deflate", or "" for none) when they are at least HTTP_COMPRESSION_MIN_BYTES. The receiving
+# service must accept the Content-Encoding.
+HTTP_COMPRESSION_MIN_BYTES: int = env.int("HTTP_COMPRESSION_MIN_BYTES", default=16384)
+SEND_PDF_REQUEST_ENCODING: str = env.str(
+    "SEND_PDF_REQUEST_ENCODING", default="", validate=OneOf(["", "gzip", "deflate"])
+)
+DEA_INGEST_REQUEST_ENCODING: str = env.str(
+    "DEA_INGEST_REQUEST_ENCODING", default="", validate=OneOf(["", "gzip", "deflate"])
+)
+# Codec for message bodies and request payloads: "orjson" (installed with the orjson extra),
+# "json" for the standard library, or "auto" for orjson if it is installed and the json
+# module otherwise.
+JSON_CODEC: str = env.str(
+    "JSON_CODEC", default="auto", validate=OneOf(["auto", "orjson", "json"])
+)
+# HL7 CDA messages that are just {"content": "<document>"} have the document copied into the
+# request to Connector API as it is, rather than being decoded and encoded again.
+CDA_PASS_THROUGH_ENABLED: bool = env.bool("CDA_PASS_THROUGH_ENABLED", default=True)
+# Identical concurrent GETs share a single request.
+HTTP_SINGLE_FLIGHT_ENABLED: bool = env.bool("HTTP_SINGLE_FLIGHT_ENABLED", default=True)
+# Caching of reference data (locations and clinicians) from downstream services.
+CACHE_ENABLED: bool = env.bool("CACHE_ENABLED", default=True)
+CACHE_MAX_ENTRIES: int = env.int("CACHE_MAX_ENTRIES", default=2048)
+LOCATION_CACHE_TTL_SEC: float = env.float("LOCATION_CACHE_TTL_SEC", default=300)
+CLINICIAN_CACHE_TTL_SEC: float = env.float("CLINICIAN_CACHE_TTL_SEC", default=300)
+# How long to remember that something wasn't found.
+CACHE_NEGATIVE_TTL_SEC: float = env.float("CACHE_NEGATIVE_TTL_SEC", default=60)
+# After CIRCUIT_BREAKER_FAILURE_THRESHOLD consecutive failed requests to a service (0 to
+# disable), requests to it fail fast for CIRCUIT_BREAKER_RESET_TIMEOUT_SEC before a trial.
+CIRCUIT_BREAKER_FAILURE_THRESHOLD: int = env.int(
+    "CIRCUIT_BREAKER_FAILURE_THRESHOLD", default=5
+)
+CIRCUIT_BREAKER_RESET_TIMEOUT_SEC: float = env.float(
+    "CIRCUIT_BREAKER_RESET_TIMEOUT_SEC", default=30
+)
+
+# Consumer settings
+# With the asyncio engine, callbacks run on an event loop, but messages are still consumed
+# by kombu's blocking loop, and per-queue concurrency from QUEUE_QOS is ignored.
+CONSUMER_ENGINE: str = env.str(
+    "CONSUMER_ENGINE", default="threads", validate=OneOf(["threads", "asyncio"])
+)
+ASYNC_ENGINE_SYNC_WORKERS: int = env.int("ASYNC_ENGINE_SYNC_WORKERS", default=10)
+CONSUMER_WORKER_COUNT: int = env.int("CONSUMER_WORKER_COUNT", default=1)
+CONSUMER_DEFAULT_PREFETCH_COUNT: int = env.int(
+    "CONSUMER_DEFAULT_PREFETCH_COUNT", default=10
+)
+CONSUMER_SETTLE_INTERVAL_SEC: float = env.float(
+    "CONSUMER_SETTLE_INTERVAL_SEC", default=0.1
+)
+
+# Successful messages are acknowledged in batches of up to ACK_BATCH_SIZE (1 disables batching).
+ACK_BATCH_SIZE: int = env.int("ACK_BATCH_SIZE", default=1)
+ACK_BATCH_MAX_DELAY_SEC: float = env.float("ACK_BATCH_MAX_DELAY_SEC", default=0.5)
+
+# Time allowed for processing a message, from when it is received, unless its route sets
+# its own (0 for no limit). Downstream requests are given no longer than the time left, and
+# once it runs out the message is requeued.
+MESSAGE_DEADLINE_SEC: float = env.float("MESSAGE_DEADLINE_SEC", default=120)
+
+# On SIGTERM, how long to wait for in-flight messages to finish before closing the connection.
+CONSUMER_SHUTDOWN_DEADLINE_SEC: float = env.float(
+    "CONSUMER_SHUTDOWN_DEADLINE_SEC", default=25
+)
+
+# Messages published by callbacks are published on a channel in confirm mode, and the message
+# being processed is only acknowledged once the broker has confirmed them.
+PUBLISHER_CONFIRMS_ENABLED: bool = env.bool("PUBLISHER_CONFIRMS_ENABLED", default=True)
+
+# Messages published for routes this process consumes can be processed in-process instead,
+# up to LOCAL_DISPATCH_MAX_DEPTH hops, falling back to publishing if processing fails.
+LOCAL_DISPATCH_ENABLED: bool = env.bool("LOCAL_DISPATCH_ENABLED", default=False)
+LOCAL_DISPATCH_MAX_DEPTH: int = env.int("LOCAL_DISPATCH_MAX_DEPTH", default=3)
+
+# Delayed retries of requeued messages. Setting RETRY_MAX_ATTEMPTS to 0 requeues immediately.
+RETRY_MAX_ATTEMPTS: int = env.int("RETRY_MAX_ATTEMPTS", default=6)
+RETRY_INITIAL_DELAY_SEC: int = env.int("RETRY_INITIAL_DELAY_SEC", default=5)
+RETRY_MAX_DELAY_SEC: int = env.int("RETRY_MAX_DELAY_SEC", default=600)
+
+# Supervisor settings
+SUPERVISOR_PROCESSES: int = env.int("SUPERVISOR_PROCESSES", default=1)
+SUPERVISOR_MAX_RESTART_DELAY_SEC: int = env.int(
+    "SUPERVISOR_MAX_RESTART_DELAY_SEC", default=30
+)
+
 # Build information
 circleci_file: Path = Path(__file__).parent.parent / "build-circleci.txt"
 githash_file: Path = Path(__file__).parent.parent / "build-githash.txt"
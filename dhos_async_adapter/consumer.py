@@ -1,73 +1,540 @@
+import asyncio
+import contextvars
+import queue
+import socket
+import time
 import uuid
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import nullcontext
+from contextvars import Token
 from pathlib import Path
-from typing import AnyStr, Callable, List, Optional, Type
+from types import FrameType
+from typing import (
+    Any,
+    AnyStr,
+    Awaitable,
+    Callable,
+    ContextManager,
+    Dict,
+    Iterator,
+    List,
+    Optional,
+    Tuple,
+    Type,
+    Union,
+)
 
-from kombu import Connection, Consumer, Message, Queue
+from kombu import Connection, Consumer, Message, Producer, Queue
 from kombu.mixins import ConsumerMixin
 from kombu.transport.pyamqp import Channel
 from she_logging import logger
 from she_logging.request_id import current_request_id, reset_request_id, set_request_id
 
+from dhos_async_adapter import config
+from dhos_async_adapter.acks import AckCoalescer
+from dhos_async_adapter.executors import AsyncioExecutor, PartitionedExecutor
+from dhos_async_adapter.helpers import deadline, publishing, retry
 from dhos_async_adapter.helpers.exceptions import (
+    DeadlineExceededError,
     RejectMessageError,
     RequeueMessageError,
 )
-from dhos_async_adapter.helpers.routing import CALLBACK_LOOKUP
+from dhos_async_adapter.helpers.publishing import OutgoingMessage
+from dhos_async_adapter.helpers.routing import (
+    ASYNC_CALLBACK_LOOKUP,
+    CALLBACK_LOOKUP,
+    DEADLINE_LOOKUP,
+    PARTITION_KEY_LOOKUP,
+    QUEUE_LOOKUP,
+    QUEUE_QOS,
+    ROUTING_TABLE,
+    QueueQoS,
+)
+from dhos_async_adapter.publisher import ConfirmingPublisher
 
 # This presence of this file is used to signal to Prometheus that the connection to RabbitMQ is alive.
 alive_file: Path = Path(__file__).parent.parent / "alive.txt"
 
+# Outcomes of processing a message, applied to the message on the connection thread.
+ACK = "ack"
+REQUEUE = "requeue"
+REJECT = "reject"
+
+# Engines for running callbacks.
+ENGINE_THREADS = "threads"
+ENGINE_ASYNCIO = "asyncio"
+
 
 class GenericConsumer(ConsumerMixin):
-    def __init__(self, connection: Connection, queues: List[Queue]) -> None:
+    def __init__(
+        self,
+        connection: Connection,
+        queues: List[Queue],
+        worker_count: int = config.CONSUMER_WORKER_COUNT,
+        engine: str = config.CONSUMER_ENGINE,
+        set_alive: Optional[Callable[[bool], None]] = None,
+    ) -> None:
         logger.debug("Initialising generic consumer")
         self.connection = connection
         self.queues = queues
+        # Reports whether the connection is alive; by default via the liveness file.
+        self.set_alive: Callable[[bool], None] = set_alive or set_alive_file
+        self.worker_count = worker_count
+        # The asyncio engine runs every message as a task on one event loop, awaiting async
+        # callbacks and running the rest in its pool of sync workers. Messages are still
+        # consumed by kombu's blocking drain_events loop on the connection thread; only the
+        # callbacks run on the event loop. Each queue's QoS concurrency doesn't apply under
+        # this engine, so only its prefetch count limits how many messages are in flight.
+        self._asyncio: Optional[AsyncioExecutor] = None
+        if engine == ENGINE_ASYNCIO:
+            logger.info("Processing messages with the asyncio engine")
+            self._asyncio = AsyncioExecutor(
+                sync_workers=max(worker_count, config.ASYNC_ENGINE_SYNC_WORKERS),
+                thread_name_prefix="consumer-asyncio",
+            )
+        # With more than one worker, each queue gets its own pool of workers sized by its
+        # QoS, so a slow queue cannot hold up the others. Channels are not thread-safe, so
+        # workers hand the outcome back to the connection thread via the settlements queue
+        # rather than acking messages themselves.
+        # Queues with routes that must be processed in order get a partitioned pool instead,
+        # which keeps messages with the same partition key on the same worker.
+        self._executors: Dict[str, Union[ThreadPoolExecutor, PartitionedExecutor]] = {}
+        if worker_count > 1 and self._asyncio is None:
+            for queue_ in queues:
+                concurrency: int = self._get_qos(queue_.name).concurrency
+                logger.info(
+                    "Processing messages from %s with %d workers",
+                    queue_.name,
+                    concurrency,
+                )
+                if any(
+                    key in PARTITION_KEY_LOOKUP
+                    for key in ROUTING_TABLE.get(queue_.name, {})
+                ):
+                    self._executors[queue_.name] = PartitionedExecutor(
+                        lanes=concurrency, thread_name_prefix=queue_.name
+                    )
+                else:
+                    self._executors[queue_.name] = ThreadPoolExecutor(
+                        max_workers=concurrency, thread_name_prefix=queue_.name
+                    )
+        self._settlements: (
+            "queue.SimpleQueue[Tuple[Message, str, List[OutgoingMessage]]]"
+        ) = queue.SimpleQueue()
+        # Messages published by callbacks are held until the callback succeeds, then
+        # published with confirms; the message being processed is acked once they are all
+        # confirmed.
+        self._publisher: Optional[ConfirmingPublisher] = (
+            ConfirmingPublisher() if config.PUBLISHER_CONFIRMS_ENABLED else None
+        )
+        # Messages published for routes this consumer serves can be processed in-process,
+        # saving a round trip through the broker.
+        if config.LOCAL_DISPATCH_ENABLED:
+            publishing.enable_local_dispatch(
+                {
+                    routing_key: CALLBACK_LOOKUP[routing_key]
+                    for queue_ in queues
+                    for routing_key in ROUTING_TABLE.get(queue_.name, {})
+                }
+            )
+        self._acks = AckCoalescer(
+            batch_size=config.ACK_BATCH_SIZE,
+            max_delay_sec=config.ACK_BATCH_MAX_DELAY_SEC,
+        )
+        # Messages delivered but not yet settled. Only touched on the connection thread.
+        self._in_flight = 0
 
     def get_consumers(self, consumer_cls: Type, channel: Channel) -> List[Consumer]:
-        return [
-            consumer_cls(
-                queues=self.queues, callbacks=[self.on_message], accept=["json"]
+        # One consumer per queue, each on its own channel, so that each queue's prefetch
+        # count is applied independently.
+        if self._publisher is not None:
+            self._publisher.open(channel.connection.client)
+        consumers: List[Consumer] = []
+        for i, queue_ in enumerate(self.queues):
+            consumer_channel: Channel = (
+                channel if i == 0 else channel.connection.client.channel()
+            )
+            consumers.append(
+                Consumer(
+                    consumer_channel,
+                    queues=[queue_],
+                    callbacks=[self.on_message],
+                    accept=["json"],
+                    prefetch_count=self._get_qos(queue_.name).prefetch_count,
+                    on_decode_error=self.on_decode_error,
+                )
             )
-        ]
+        return consumers
+
+    def consume(self, *args: Any, **kwargs: Any) -> Iterator:
+        if self._executors or self._asyncio or self._acks.enabled or self._publisher:
+            # Wake up regularly so that finished messages are settled promptly.
+            kwargs.setdefault("safety_interval", config.CONSUMER_SETTLE_INTERVAL_SEC)
+        return super(GenericConsumer, self).consume(*args, **kwargs)
+
+    def on_iteration(self) -> None:
+        self.settle_pending()
+        self._acks.flush_due()
+
+    def on_consume_end(self, connection: Connection, channel: Channel) -> None:
+        # The consumers have been cancelled, but the connection is still open, so messages
+        # that finish now can still be settled. Anything left unsettled when the connection
+        # closes is redelivered by the broker.
+        self.drain(config.CONSUMER_SHUTDOWN_DEADLINE_SEC, connection)
+        self._acks.flush_all()
+        if self._publisher is not None:
+            self._publisher.close()
+        # Messages still waiting for a worker are never started, as they would be processed
+        # again when the broker redelivers them.
+        for executor in self._executors.values():
+            executor.shutdown(wait=False, cancel_futures=True)
+        if self._asyncio is not None:
+            self._asyncio.shutdown(wait=False, cancel_futures=True)
+
+    def handle_stop_signal(self, signum: int, frame: Optional[FrameType]) -> None:
+        """Signal handler that stops consuming, draining in-flight messages first."""
+        logger.info("Received signal %d, stopping consumer", signum)
+        self.should_stop = True
+
+    def drain(self, timeout: float, connection: Optional[Connection] = None) -> None:
+        """
+        Waits up to timeout seconds for in-flight messages to finish, settling them as they
+        do. Confirms for published messages are received from the connection, if given.
+        """
+        self.settle_pending()
+        if self._in_flight > 0:
+            logger.info("Waiting for %d in-flight messages", self._in_flight)
+        deadline: float = time.monotonic() + timeout
+        while self._in_flight > 0:
+            remaining: float = deadline - time.monotonic()
+            if remaining <= 0:
+                logger.warning(
+                    "Stopping with %d messages in flight, which will be redelivered",
+                    self._in_flight,
+                )
+                return
+            wait: float = min(remaining, config.CONSUMER_SETTLE_INTERVAL_SEC)
+            if connection is not None and self._publisher and self._publisher.pending:
+                try:
+                    connection.drain_events(timeout=wait)
+                except socket.timeout:
+                    pass
+                self.settle_pending()
+                continue
+            try:
+                message, outcome, outgoing = self._settlements.get(timeout=wait)
+            except queue.Empty:
+                continue
+            self._settle(message, outcome, outgoing)
 
     def on_connection_error(self, exc: Type[Exception], interval: int) -> None:
         logger.error("ConsumerMixin.on_connection_error called")
-        alive_file.unlink(missing_ok=True)
+        self.set_alive(False)
         return super(GenericConsumer, self).on_connection_error(exc, interval)
 
     def on_connection_revived(self) -> None:
         logger.info("ConsumerMixin.on_connection_revived called")
-        alive_file.touch(exist_ok=True)
+        self.set_alive(True)
         return super(GenericConsumer, self).on_connection_revived()
 
     def on_message(self, body: AnyStr, message: Message) -> None:
         """Callback for messages."""
-        correlation_id: Optional[str] = message.properties.get("correlation_id", None)
-        if correlation_id is None:
-            correlation_id = current_request_id() or str(uuid.uuid4())
-        request_id_token = set_request_id(correlation_id)
+        self._in_flight += 1
+        self._acks.track(message)
+        routing_key: Optional[str] = message.delivery_info.get("routing_key")
+        # The deadline runs from now, so includes any time spent waiting for a worker.
+        deadline_at: Optional[float] = self._get_deadline(routing_key)
+        if self._asyncio is not None:
+            partition_key: Optional[str] = self._get_partition_key(routing_key, body)
+            self._asyncio.submit(
+                partition_key, self._process_in_loop, body, message, deadline_at
+            )
+            return
+        executor: Union[
+            ThreadPoolExecutor, PartitionedExecutor, None
+        ] = self._executors.get(QUEUE_LOOKUP.get(routing_key or "", ""))
+        if executor is None:
+            with self._collect_messages() as outgoing:
+                outcome: str = self._process_message(body, message, deadline_at)
+            self._settle(message, outcome, outgoing)
+        elif isinstance(executor, PartitionedExecutor):
+            partition_key = self._get_partition_key(routing_key, body)
+            executor.submit(
+                partition_key, self._process_in_worker, body, message, deadline_at
+            )
+        else:
+            executor.submit(self._process_in_worker, body, message, deadline_at)
+
+    def settle_pending(self) -> None:
+        """Applies the outcomes of messages processed by workers. Must be called on the connection thread."""
+        while True:
+            try:
+                message, outcome, outgoing = self._settlements.get_nowait()
+            except queue.Empty:
+                return
+            self._settle(message, outcome, outgoing)
+
+    def _get_qos(self, queue_name: str) -> QueueQoS:
+        default_qos = QueueQoS(
+            prefetch_count=max(
+                config.CONSUMER_DEFAULT_PREFETCH_COUNT, self.worker_count
+            ),
+            concurrency=self.worker_count,
+        )
+        return QUEUE_QOS.get(queue_name, default_qos)
+
+    def _get_partition_key(
+        self, routing_key: Optional[str], body: AnyStr
+    ) -> Optional[str]:
+        extractor: Optional[
+            Callable[[AnyStr], Optional[str]]
+        ] = PARTITION_KEY_LOOKUP.get(routing_key or "")
+        return None if extractor is None else extractor(body)
+
+    def _get_deadline(self, routing_key: Optional[str]) -> Optional[float]:
+        deadline_sec: float = DEADLINE_LOOKUP.get(
+            routing_key or "", config.MESSAGE_DEADLINE_SEC
+        )
+        if deadline_sec <= 0:
+            return None
+        return time.monotonic() + deadline_sec
+
+    def _collect_messages(self) -> ContextManager[List[OutgoingMessage]]:
+        if self._publisher is not None and self._publisher.is_open:
+            return publishing.collect_messages()
+        # Callbacks publish messages straight away.
+        return nullcontext([])
+
+    def _process_in_worker(
+        self, body: AnyStr, message: Message, deadline_at: Optional[float] = None
+    ) -> None:
+        with self._collect_messages() as outgoing:
+            outcome: str = self._process_message(body, message, deadline_at)
+        self._settlements.put((message, outcome, outgoing))
 
+    async def _process_in_loop(
+        self, body: AnyStr, message: Message, deadline_at: Optional[float] = None
+    ) -> None:
+        with self._collect_messages() as outgoing:
+            outcome: str = await self._process_message_async(body, message, deadline_at)
+        self._settlements.put((message, outcome, outgoing))
+
+    def _process_message(
+        self, body: AnyStr, message: Message, deadline_at: Optional[float] = None
+    ) -> str:
+        request_id_token: Token = self._set_request_id(message)
         routing_key: Optional[str] = message.delivery_info.get("routing_key")
         if routing_key is None or routing_key not in CALLBACK_LOOKUP:
             logger.error("Received message with unknown routing key '%s'", routing_key)
-            message.reject()
-            return
+            reset_request_id(request_id_token)
+            return REJECT
 
         callback_method: Callable[[AnyStr], None] = CALLBACK_LOOKUP[routing_key]
+        deadline_token: Token = deadline.set_deadline(deadline_at)
         # noinspection PyBroadException
         try:
             callback_method(body)
-            logger.info("Successfully processed message (%s)", routing_key)
-            message.ack()
-        except RequeueMessageError:
+        except Exception as e:
+            return self._get_error_outcome(routing_key, e)
+        finally:
+            deadline.reset_deadline(deadline_token)
+            reset_request_id(request_id_token)
+        logger.info("Successfully processed message (%s)", routing_key)
+        return ACK
+
+    async def _process_message_async(
+        self, body: AnyStr, message: Message, deadline_at: Optional[float] = None
+    ) -> str:
+        # Each message runs in its own task, with its own copy of the context.
+        self._set_request_id(message)
+        deadline.set_deadline(deadline_at)
+        routing_key: Optional[str] = message.delivery_info.get("routing_key")
+        if routing_key is None or routing_key not in CALLBACK_LOOKUP:
+            logger.error("Received message with unknown routing key '%s'", routing_key)
+            return REJECT
+
+        async_callback: Optional[
+            Callable[[AnyStr], Awaitable[None]]
+        ] = ASYNC_CALLBACK_LOOKUP.get(routing_key)
+        # noinspection PyBroadException
+        try:
+            if async_callback is not None:
+                await async_callback(body)
+            else:
+                # Sync callbacks run in the engine's worker pool, in this task's context.
+                await asyncio.get_running_loop().run_in_executor(
+                    None,
+                    contextvars.copy_context().run,
+                    CALLBACK_LOOKUP[routing_key],
+                    body,
+                )
+        except Exception as e:
+            return self._get_error_outcome(routing_key, e)
+        logger.info("Successfully processed message (%s)", routing_key)
+        return ACK
+
+    def _set_request_id(self, message: Message) -> Token:
+        correlation_id: Optional[str] = message.properties.get("correlation_id", None)
+        if correlation_id is None:
+            correlation_id = current_request_id() or str(uuid.uuid4())
+        return set_request_id(correlation_id)
+
+    def _get_error_outcome(self, routing_key: str, error: Exception) -> str:
+        if isinstance(error, DeadlineExceededError):
+            deadline.record_overrun(routing_key)
+            logger.error("Requeueing message (%s) after its deadline", routing_key)
+            return REQUEUE
+        if isinstance(error, RequeueMessageError):
             logger.error("Requeueing message (%s)", routing_key)
-            message.requeue()
-        except RejectMessageError:
+            return REQUEUE
+        if isinstance(error, RejectMessageError):
             logger.error("Rejecting message (%s)", routing_key)
-            message.reject()
+            return REJECT
+        logger.error(
+            "Exception while processing message (%s)", routing_key, exc_info=error
+        )
+        return REJECT
+
+    def _settle(
+        self,
+        message: Message,
+        outcome: str,
+        outgoing: Optional[List[OutgoingMessage]] = None,
+    ) -> None:
+        if outcome == ACK and outgoing:
+            self._publish_then_ack(message, outgoing)
+            return
+        self._in_flight -= 1
+        # noinspection PyBroadException
+        try:
+            if outcome == ACK:
+                self._acks.complete(message)
+                return
+            if outcome == REQUEUE:
+                if not self._requeue_later(message):
+                    # Held until the copy published for retry has been confirmed.
+                    return
+            else:
+                message.reject()
         except Exception:
-            logger.exception("Exception while processing message (%s)", routing_key)
+            # Typically the channel has closed since the message was delivered, in which
+            # case the broker will redeliver the message.
+            logger.exception("Failed to %s message", outcome)
+        # Only released once settled, so that a multiple ack can't cover it first.
+        self._acks.release(message)
+
+    def _publish_then_ack(
+        self, message: Message, outgoing: List[OutgoingMessage]
+    ) -> None:
+        """
+        Publishes the messages held while processing the message, acking it once they are
+        confirmed. If the broker doesn't accept them, the message is requeued so that it is
+        processed (and they are published) again.
+        """
+        if self._publisher is None or not self._publisher.is_open:
+            # The publisher has closed since the message was processed, either because the
+            # connection was lost or because publishing failed. The message is requeued so
+            # it is processed (and the messages published) again; if its channel has gone
+            # too, the broker redelivers it anyway.
+            logger.error("Dropping %d messages held for publishing", len(outgoing))
+            self._settle(message, REQUEUE)
+            return
+        self._publisher.publish(
+            outgoing,
+            on_confirmed=lambda: self._settle(message, ACK),
+            on_failed=lambda: self._settle(message, REQUEUE),
+        )
+
+    def _requeue_later(self, message: Message) -> bool:
+        """
+        Republishes the message to the retry exchange, from where it is dead-lettered back to
+        the task exchange after a delay that grows with each attempt. Rejects the message
+        (sending it to the DLX) once it has used up its attempts. Returns whether the message
+        has been settled, rather than held until the broker has confirmed its copy.
+        """
+        delays: List[int] = retry.get_retry_delays()
+        if not delays:
+            message.requeue()
+            return True
+        attempt: int = int(message.headers.get(retry.RETRY_ATTEMPT_HEADER, 0))
+        routing_key: Optional[str] = message.delivery_info.get("routing_key")
+        if attempt >= len(delays):
+            logger.error(
+                "Giving up on message (%s) after %d attempts", routing_key, attempt + 1
+            )
             message.reject()
-        finally:
-            reset_request_id(request_id_token)
+            return True
+        logger.info("Retrying message (%s) in %d seconds", routing_key, delays[attempt])
+        headers: Dict[str, Any] = {
+            # The body has already been decompressed.
+            **{k: v for k, v in message.headers.items() if k != "compression"},
+            retry.RETRY_ATTEMPT_HEADER: attempt + 1,
+            retry.RETRY_DELAY_HEADER: delays[attempt],
+        }
+        if self._publisher is not None:
+            if not self._publisher.is_open:
+                # The connection has been lost, so the message can't be acked either.
+                message.requeue()
+                return True
+            # The message is only acked once the broker has confirmed its copy, so that
+            # it isn't lost if publishing fails; it stays in flight until then, and no
+            # multiple ack may cover it.
+            self._in_flight += 1
+            self._acks.hold(message)
+            self._publisher.republish(
+                message,
+                exchange=retry.RETRY_DELAY_EXCHANGE_NAME,
+                headers=headers,
+                on_confirmed=lambda: self._finish_retry(message, confirmed=True),
+                on_failed=lambda: self._finish_retry(message, confirmed=False),
+            )
+            return False
+        # Without confirms, an unroutable copy is at least reported.
+        Producer(
+            message.channel, auto_declare=False, on_return=_on_retry_returned
+        ).publish(
+            body=message.body,
+            exchange=retry.RETRY_DELAY_EXCHANGE_NAME,
+            routing_key=routing_key,
+            headers=headers,
+            content_type=message.content_type,
+            content_encoding=message.content_encoding,
+            correlation_id=message.properties.get("correlation_id"),
+            timestamp=message.properties.get("timestamp"),
+            delivery_mode="persistent",
+            mandatory=True,
+        )
+        message.ack()
+        return True
+
+    def _finish_retry(self, message: Message, confirmed: bool) -> None:
+        self._in_flight -= 1
+        # noinspection PyBroadException
+        try:
+            if confirmed:
+                self._acks.complete(message)
+                return
+            # Sent to the DLX rather than lost.
+            logger.error("Failed to publish message for retry, rejecting it")
+            message.reject()
+        except Exception:
+            # The broker will redeliver the message once its channel has gone.
+            logger.exception("Failed to settle message after publishing it for retry")
+        self._acks.release(message)
+
+
+def _on_retry_returned(
+    exception: Exception, exchange: str, routing_key: str, message: Message
+) -> None:
+    logger.error(
+        "Message (%s) published for retry was returned by the broker: %s",
+        routing_key,
+        exception,
+    )
+
+
+def set_alive_file(alive: bool) -> None:
+    if alive:
+        alive_file.touch(exist_ok=True)
+    else:
+        alive_file.unlink(missing_ok=True)
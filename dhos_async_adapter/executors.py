@@ -0,0 +1,109 @@
+import asyncio
+import itertools
+import threading
+import zlib
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Callable, Coroutine, Dict, List, Optional, TypeVar
+
+T = TypeVar("T")
+
+
+class PartitionedExecutor:
+    """
+    Runs tasks on a fixed number of single-threaded lanes. Tasks submitted with the same
+    key always run on the same lane, so they run one at a time in the order they were
+    submitted, while tasks with different keys run in parallel. Tasks without a key are
+    spread across the lanes in turn.
+    """
+
+    def __init__(self, lanes: int, thread_name_prefix: str = "") -> None:
+        if lanes < 1:
+            raise ValueError("PartitionedExecutor requires at least one lane")
+        self._lanes: List[ThreadPoolExecutor] = [
+            ThreadPoolExecutor(
+                max_workers=1, thread_name_prefix=f"{thread_name_prefix}-{i}"
+            )
+            for i in range(lanes)
+        ]
+        self._next_lane = itertools.count()
+
+    @property
+    def lanes(self) -> int:
+        return len(self._lanes)
+
+    def lane_for(self, key: Optional[str]) -> int:
+        if key is None:
+            return next(self._next_lane) % len(self._lanes)
+        # A stable hash, so that a key maps to the same lane in every process.
+        return zlib.crc32(key.encode("utf-8")) % len(self._lanes)
+
+    def submit(
+        self, key: Optional[str], fn: Callable, *args: Any, **kwargs: Any
+    ) -> Future:
+        return self._lanes[self.lane_for(key)].submit(fn, *args, **kwargs)
+
+    def shutdown(self, wait: bool = True, cancel_futures: bool = False) -> None:
+        for lane in self._lanes:
+            lane.shutdown(wait=wait, cancel_futures=cancel_futures)
+
+
+class AsyncioExecutor:
+    """
+    Runs coroutines on an asyncio event loop in a dedicated thread, so that many tasks
+    can wait on I/O at once without a thread each. Tasks submitted with the same key run
+    one at a time in the order they were submitted. Blocking functions can be run from
+    coroutines with loop.run_in_executor(None, ...), which uses a pool of sync_workers
+    threads.
+    """
+
+    def __init__(self, sync_workers: int, thread_name_prefix: str = "asyncio") -> None:
+        self.loop: asyncio.AbstractEventLoop = asyncio.new_event_loop()
+        self._sync_executor = ThreadPoolExecutor(
+            max_workers=sync_workers, thread_name_prefix=f"{thread_name_prefix}-sync"
+        )
+        self.loop.set_default_executor(self._sync_executor)
+        # The most recently submitted task for each key, which the next task with that key waits for.
+        self._tails: Dict[str, asyncio.Future] = {}
+        self._thread = threading.Thread(
+            target=self.loop.run_forever, name=thread_name_prefix, daemon=True
+        )
+        self._thread.start()
+
+    def submit(
+        self,
+        key: Optional[str],
+        coro_fn: Callable[..., Coroutine[Any, Any, T]],
+        *args: Any,
+    ) -> "Future[T]":
+        if key is None:
+            return asyncio.run_coroutine_threadsafe(coro_fn(*args), self.loop)
+        return asyncio.run_coroutine_threadsafe(
+            self._run_in_order(key, coro_fn, *args), self.loop
+        )
+
+    def shutdown(self, wait: bool = True, cancel_futures: bool = False) -> None:
+        """
+        Stops the event loop, leaving tasks that haven't finished suspended. With
+        cancel_futures, blocking functions that are waiting for a thread are cancelled.
+        """
+        self.loop.call_soon_threadsafe(self.loop.stop)
+        self._sync_executor.shutdown(wait=wait, cancel_futures=cancel_futures)
+        if wait:
+            self._thread.join()
+
+    async def _run_in_order(
+        self, key: str, coro_fn: Callable[..., Coroutine[Any, Any, T]], *args: Any
+    ) -> T:
+        # Tasks start in the order they were submitted, and nothing is awaited before the
+        # tail is replaced, so each task waits for exactly the one submitted before it.
+        previous: Optional[asyncio.Future] = self._tails.get(key)
+        current: asyncio.Future = self.loop.create_future()
+        self._tails[key] = current
+        try:
+            if previous is not None:
+                await previous
+            return await coro_fn(*args)
+        finally:
+            current.set_result(None)
+            if self._tails.get(key) is current:
+                del self._tails[key]
@@ -1,8 +1,9 @@
-from typing import Dict, Optional
+from typing import AnyStr, Callable, Dict, Optional
 
 from marshmallow import EXCLUDE, Schema, fields
 from she_logging import logger
 
+from dhos_async_adapter.helpers import json_codec
 from dhos_async_adapter.helpers.exceptions import RejectMessageError
 
 
@@ -72,3 +73,27 @@ def extract_action(message: Dict, action_name: str) -> Dict:
         extra={"action": action},
     )
     return action
+
+
+def partition_key_from_action(
+    action_name: str, *field_names: str
+) -> Callable[[AnyStr], Optional[str]]:
+    """
+    Returns a function that extracts a partition key from a message body, using the first of
+    the named fields that has a value in the data of the named action. The function returns
+    None if the body can't be decoded or none of the fields have a value, in which case the
+    message is not partitioned (invalid messages will be rejected by the callback anyway).
+    """
+
+    def _extract(body: AnyStr) -> Optional[str]:
+        try:
+            message: Dict = json_codec.loads(body)
+            action: Optional[Dict] = next(
+                (a for a in message["actions"] if a["name"] == action_name), None
+            )
+            data: Dict = action["data"] if action else {}
+        except (ValueError, TypeError, KeyError):
+            return None
+        return next((str(data[f]) for f in field_names if data.get(f)), None)
+
+    return _extract
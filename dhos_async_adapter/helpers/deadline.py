@@ -0,0 +1,79 @@
+import threading
+import time
+from contextvars import ContextVar, Token
+from typing import Dict, Optional, overload
+
+from she_logging import logger
+
+from dhos_async_adapter.helpers.exceptions import DeadlineExceededError
+
+# When (by time.monotonic()) processing of the current message must be finished, if ever.
+_deadline: ContextVar[Optional[float]] = ContextVar("deadline", default=None)
+
+# Number of messages that ran out of time, by routing key.
+_overruns: Dict[str, int] = {}
+_overruns_lock = threading.Lock()
+
+
+def set_deadline(deadline: Optional[float]) -> Token:
+    return _deadline.set(deadline)
+
+
+def reset_deadline(token: Token) -> None:
+    _deadline.reset(token)
+
+
+def get_remaining() -> Optional[float]:
+    """Returns the seconds left before the current deadline, or None if there isn't one."""
+    deadline: Optional[float] = _deadline.get()
+    if deadline is None:
+        return None
+    return deadline - time.monotonic()
+
+
+@overload
+def get_timeout(timeout: float) -> float:
+    ...
+
+
+@overload
+def get_timeout(timeout: None) -> Optional[float]:
+    ...
+
+
+def get_timeout(timeout: Optional[float]) -> Optional[float]:
+    """
+    Returns the timeout to use for a step of processing: the given timeout, shortened to the
+    time left before the deadline. Raises DeadlineExceededError if there is no time left.
+    """
+    remaining: Optional[float] = get_remaining()
+    if remaining is None:
+        return timeout
+    if remaining <= 0:
+        logger.error("Deadline for processing message exceeded")
+        raise DeadlineExceededError()
+    return remaining if timeout is None else min(timeout, remaining)
+
+
+def check_time_left(needed: float) -> None:
+    """Raises DeadlineExceededError if the deadline will have passed in the given seconds."""
+    remaining: Optional[float] = get_remaining()
+    if remaining is not None and remaining <= needed:
+        logger.error("Not enough time left before deadline for processing message")
+        raise DeadlineExceededError()
+
+
+def record_overrun(routing_key: str) -> None:
+    with _overruns_lock:
+        _overruns[routing_key] = _overruns.get(routing_key, 0) + 1
+
+
+def get_overrun_counts() -> Dict[str, int]:
+    """Returns the number of messages that exceeded their deadline, by routing key."""
+    with _overruns_lock:
+        return dict(_overruns)
+
+
+def reset_overrun_counts() -> None:
+    with _overruns_lock:
+        _overruns.clear()
@@ -12,3 +12,10 @@ class RejectMessageError(Exception):
     Should be used when encountering fundamental errors that will not
     be resolved with further attempts, such as malformed messages.
     """
+
+
+class DeadlineExceededError(RequeueMessageError):
+    """
+    Raised when the time allowed for processing a message has run out, so that the message
+    is requeued rather than holding up a worker.
+    """
@@ -0,0 +1,121 @@
+import json
+from typing import Any, Callable, Dict, Optional, Protocol, Union
+
+from she_logging import logger
+
+from dhos_async_adapter import config
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover
+    orjson = None  # type: ignore
+
+
+class JsonCodec(Protocol):
+    """Encodes and decodes JSON. Implementations must be thread-safe."""
+
+    name: str
+
+    def loads(self, data: Union[str, bytes]) -> Any:
+        """Decodes a JSON document, raising json.JSONDecodeError if it is invalid."""
+        ...
+
+    def dumps(self, obj: Any, default: Optional[Callable[[Any], Any]] = None) -> bytes:
+        """
+        Encodes an object as compact UTF-8 JSON, calling default for objects that can't be
+        encoded, which should return something that can or raise TypeError.
+        """
+        ...
+
+
+class StdlibJsonCodec:
+    name = "json"
+
+    def loads(self, data: Union[str, bytes]) -> Any:
+        return json.loads(data)
+
+    def dumps(self, obj: Any, default: Optional[Callable[[Any], Any]] = None) -> bytes:
+        return json.dumps(obj, default=default, separators=(",", ":")).encode("utf-8")
+
+
+class OrjsonCodec:
+    """
+    Uses orjson, which is several times faster than the json module, falling back to it for
+    the few documents orjson won't handle (such as integers over 64 bits when encoding, or
+    NaN when decoding) so that both codecs accept the same documents. Unlike the json module,
+    NaN and infinity are encoded as null, and integers over 64 bits are decoded as floats.
+    """
+
+    name = "orjson"
+
+    # Datetimes and dataclasses are passed to default, as the json module does, rather than
+    # orjson encoding them its own way.
+    _OPTIONS: int = (
+        orjson.OPT_NON_STR_KEYS
+        | orjson.OPT_PASSTHROUGH_DATETIME
+        | orjson.OPT_PASSTHROUGH_DATACLASS
+        if orjson is not None
+        else 0
+    )
+
+    def __init__(self) -> None:
+        if orjson is None:
+            raise ImportError(
+                "orjson isn't installed: install the orjson extra, or set JSON_CODEC to"
+                " 'json' or 'auto'"
+            )
+        self._fallback = StdlibJsonCodec()
+
+    def loads(self, data: Union[str, bytes]) -> Any:
+        try:
+            return orjson.loads(data)
+        except orjson.JSONDecodeError:
+            return self._fallback.loads(data)
+
+    def dumps(self, obj: Any, default: Optional[Callable[[Any], Any]] = None) -> bytes:
+        try:
+            return orjson.dumps(obj, default=default, option=self._OPTIONS)
+        except orjson.JSONEncodeError:
+            return self._fallback.dumps(obj, default=default)
+
+
+_codecs: Dict[str, Callable[[], JsonCodec]] = {
+    "json": StdlibJsonCodec,
+    "orjson": OrjsonCodec,
+}
+_codec: Optional[JsonCodec] = None
+
+
+def get_codec() -> JsonCodec:
+    """
+    Returns the codec selected by JSON_CODEC. "auto" uses orjson if it is installed, and
+    the json module otherwise.
+    """
+    global _codec
+    if _codec is None:
+        _codec = _create_codec(config.JSON_CODEC)
+        logger.debug("Using %s JSON codec", _codec.name)
+    return _codec
+
+
+def set_codec(codec: Optional[JsonCodec]) -> None:
+    """Replaces the codec, or with None goes back to the one selected by JSON_CODEC."""
+    global _codec
+    _codec = codec
+
+
+def _create_codec(name: str) -> JsonCodec:
+    if name == "auto":
+        name = "orjson" if orjson is not None else "json"
+    if name == "orjson" and orjson is None:
+        logger.warning("orjson isn't installed, using the json module instead")
+        name = "json"
+    return _codecs[name]()
+
+
+def loads(data: Union[str, bytes]) -> Any:
+    return get_codec().loads(data)
+
+
+def dumps(obj: Any, default: Optional[Callable[[Any], Any]] = None) -> bytes:
+    return get_codec().dumps(obj, default=default)
@@ -0,0 +1,126 @@
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar, Token
+from datetime import datetime, timezone
+from typing import (
+    Any,
+    Callable,
+    Dict,
+    Iterator,
+    List,
+    NamedTuple,
+    Optional,
+    Union,
+)
+
+import kombu_batteries_included
+from she_logging import logger
+from she_logging.request_id import current_request_id
+
+from dhos_async_adapter import config
+from dhos_async_adapter.helpers import json_codec
+
+
+class OutgoingMessage(NamedTuple):
+    routing_key: str
+    # The JSON-encoded body, in UTF-8.
+    body: bytes
+    correlation_id: Optional[str]
+    timestamp: int
+
+
+# Messages published while processing a message, held until processing has finished.
+_outbox: ContextVar[Optional[List[OutgoingMessage]]] = ContextVar(
+    "outbox", default=None
+)
+
+# Callbacks for routing keys this process consumes, which are run directly rather than
+# publishing a message to the broker when local dispatch is enabled.
+_local_callbacks: Dict[str, Callable[[bytes], None]] = {}
+# How many local dispatches deep the current message is.
+_local_dispatch_depth: ContextVar[int] = ContextVar("local_dispatch_depth", default=0)
+
+
+def enable_local_dispatch(callbacks: Dict[str, Callable[[bytes], None]]) -> None:
+    """Sets the callbacks that messages may be dispatched to in-process."""
+    _local_callbacks.clear()
+    _local_callbacks.update(callbacks)
+
+
+def publish_message(routing_key: str, body: Union[Dict, List]) -> None:
+    """
+    Publishes a message to the task exchange. While the consumer is collecting messages (see
+    collect_messages), the message is held and published by the consumer once processing
+    has succeeded. Otherwise it is published straight away.
+
+    If local dispatch is enabled and this process consumes the routing key, the callback is
+    run directly instead, with the same request ID; if it fails the message is published.
+    """
+    if _dispatch_locally(routing_key, body):
+        return
+    outbox: Optional[List[OutgoingMessage]] = _outbox.get()
+    if outbox is None:
+        kombu_batteries_included.publish_message(routing_key=routing_key, body=body)
+        return
+    message_body: bytes = json_codec.dumps(body, default=_json_default)
+    logger.debug(
+        "Holding %s message for publishing",
+        routing_key,
+        extra={"message_body": message_body},
+    )
+    outbox.append(
+        OutgoingMessage(
+            routing_key=routing_key,
+            body=message_body,
+            correlation_id=current_request_id(),
+            timestamp=int(time.time()),
+        )
+    )
+
+
+@contextmanager
+def collect_messages() -> Iterator[List[OutgoingMessage]]:
+    """Collects the messages published in this context, rather than publishing them."""
+    outbox: List[OutgoingMessage] = []
+    token: Token = _outbox.set(outbox)
+    try:
+        yield outbox
+    finally:
+        _outbox.reset(token)
+
+
+def _dispatch_locally(routing_key: str, body: Union[Dict, List]) -> bool:
+    callback: Optional[Callable[[bytes], None]] = _local_callbacks.get(routing_key)
+    depth: int = _local_dispatch_depth.get()
+    if callback is None or depth >= config.LOCAL_DISPATCH_MAX_DEPTH:
+        return False
+    # Anything the callback publishes before failing is dropped along with it.
+    outbox: Optional[List[OutgoingMessage]] = _outbox.get()
+    held: int = len(outbox) if outbox is not None else 0
+    token: Token = _local_dispatch_depth.set(depth + 1)
+    logger.debug("Dispatching %s message locally", routing_key)
+    # noinspection PyBroadException
+    try:
+        callback(json_codec.dumps(body, default=_json_default))
+    except Exception:
+        logger.warning(
+            "Failed to process %s message locally, publishing it instead",
+            routing_key,
+            exc_info=True,
+        )
+        if outbox is not None:
+            del outbox[held:]
+        return False
+    finally:
+        _local_dispatch_depth.reset(token)
+    logger.info("Successfully processed message locally (%s)", routing_key)
+    return True
+
+
+def _json_default(o: Any) -> str:
+    # Matches the encoding used by kombu-batteries-included.
+    if isinstance(o, datetime):
+        if o.tzinfo is None:
+            o = o.replace(tzinfo=timezone.utc)
+        return o.isoformat(timespec="milliseconds")
+    raise TypeError(f"Cannot encode {type(o)} to JSON")
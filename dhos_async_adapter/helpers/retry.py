@@ -0,0 +1,38 @@
+from typing import Dict, List
+
+from dhos_async_adapter import config
+
+# Messages to be retried later are published to this exchange, which routes them by their
+# retry delay header to a queue with a matching TTL. When the TTL expires they are
+# dead-lettered back to the task exchange with their original routing key. (The dhos-retry
+# exchange declared by kombu-batteries-included is a fanout to a single fixed-TTL queue, so
+# it can't be used for delays that grow with each attempt.)
+RETRY_DELAY_EXCHANGE_NAME = "dhos-retry-delay"
+RETRY_DELAY_EXCHANGE_TYPE = "headers"
+RETRY_DELAY_QUEUE_PREFIX = "dhos-async-adapter-retry"
+
+# Message headers used to track retries.
+RETRY_ATTEMPT_HEADER = "x-retry-attempt"
+RETRY_DELAY_HEADER = "x-retry-delay-sec"
+
+
+def get_retry_delays() -> List[int]:
+    """
+    Returns the delay in seconds before each retry attempt, growing exponentially from the
+    initial delay up to the maximum. Empty if delayed retries are disabled.
+    """
+    return [
+        min(
+            config.RETRY_INITIAL_DELAY_SEC * 2**attempt,
+            config.RETRY_MAX_DELAY_SEC,
+        )
+        for attempt in range(config.RETRY_MAX_ATTEMPTS)
+    ]
+
+
+def get_retry_queue_name(delay: int) -> str:
+    return f"{RETRY_DELAY_QUEUE_PREFIX}-{delay}s"
+
+
+def get_retry_queue_binding(delay: int) -> Dict:
+    return {"x-match": "all", RETRY_DELAY_HEADER: delay}
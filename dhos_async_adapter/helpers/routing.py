@@ -1,4 +1,4 @@
-from typing import Callable, Dict, List
+from typing import AnyStr, Awaitable, Callable, Dict, List, NamedTuple, Optional
 
 from dhos_async_adapter.callbacks import (
     audit_event,
@@ -16,26 +16,67 @@ from dhos_async_adapter.callbacks import (
     patient_update,
     update_activation_auth_clinician,
 )
+from dhos_async_adapter.helpers import actions
+
+
+class Route(NamedTuple):
+    callback: Callable[[AnyStr], None]
+    # Extracts the key by which messages on this route must be processed in order, if any.
+    partition_key: Optional[Callable[[AnyStr], Optional[str]]] = None
+    # Awaitable version of the callback, used in preference to it by the asyncio engine.
+    async_callback: Optional[Callable[[AnyStr], Awaitable[None]]] = None
+    # Time allowed for processing each message, overriding config.MESSAGE_DEADLINE_SEC.
+    deadline_sec: Optional[float] = None
+
+
+class QueueQoS(NamedTuple):
+    # Maximum number of unacknowledged messages the broker will deliver from the queue.
+    prefetch_count: int
+    # Maximum number of messages from the queue processed at once (when running with workers).
+    concurrency: int
+
 
 # These routes are described in more detail in the README.
-ROUTING_TABLE: Dict[str, Dict[str, Callable]] = {
+ROUTING_TABLE: Dict[str, Dict[str, Route]] = {
     "dhos-dea-export-adapter-task-queue": {
-        export_gdm_syne_bg_readings.ROUTING_KEY: export_gdm_syne_bg_readings.process,
+        export_gdm_syne_bg_readings.ROUTING_KEY: Route(
+            export_gdm_syne_bg_readings.process,
+            # Reports are sent in bulk to the external DEA Ingest API.
+            deadline_sec=300,
+        ),
     },
     "dhos-activation-auth-adapter-task-queue": {
-        create_activation_auth_clinician.ROUTING_KEY: create_activation_auth_clinician.process,
-        update_activation_auth_clinician.ROUTING_KEY: update_activation_auth_clinician.process,
+        create_activation_auth_clinician.ROUTING_KEY: Route(
+            create_activation_auth_clinician.process
+        ),
+        update_activation_auth_clinician.ROUTING_KEY: Route(
+            update_activation_auth_clinician.process
+        ),
     },
     "dhos-aggregator-adapter-task-queue": {
-        generate_send_pdf.ROUTING_KEY: generate_send_pdf.process,
+        generate_send_pdf.ROUTING_KEY: Route(
+            generate_send_pdf.process,
+            async_callback=generate_send_pdf.process_async,
+        ),
+    },
+    "dhos-audit-adapter-task-queue": {
+        audit_event.ROUTING_KEY: Route(audit_event.process)
     },
-    "dhos-audit-adapter-task-queue": {audit_event.ROUTING_KEY: audit_event.process},
     "dhos-connector-adapter-task-queue": {
-        begin_process_hl7_cda_message.ROUTING_KEY: begin_process_hl7_cda_message.process,
+        begin_process_hl7_cda_message.ROUTING_KEY: Route(
+            begin_process_hl7_cda_message.process
+        ),
     },
     "dhos-encounters-adapter-task-queue": {
-        encounter_update.ROUTING_KEY: encounter_update.process,
-        encounter_obs_set_notification.ROUTING_KEY: encounter_obs_set_notification.process,
+        encounter_update.ROUTING_KEY: Route(
+            encounter_update.process,
+            partition_key=actions.partition_key_from_action(
+                "process_encounter", "patient_uuid"
+            ),
+        ),
+        encounter_obs_set_notification.ROUTING_KEY: Route(
+            encounter_obs_set_notification.process
+        ),
     },
     "dhos-messages-adapter-task-queue": {
         # No longer has messages routed to it.
@@ -43,23 +84,33 @@ ROUTING_TABLE: Dict[str, Dict[str, Callable]] = {
     "dhos-pdf-adapter-task-queue": {
         # No longer has messages routed to it.
     },
-    "dhos-notifications-adapter-task-queue": {email.ROUTING_KEY: email.process},
+    "dhos-notifications-adapter-task-queue": {email.ROUTING_KEY: Route(email.process)},
     "dhos-observations-adapter-task-queue": {
-        check_orphaned_observations.ROUTING_KEY: check_orphaned_observations.process
+        check_orphaned_observations.ROUTING_KEY: Route(
+            check_orphaned_observations.process
+        )
     },
     "dhos-questions-adapter-task-queue": {
         # No longer has messages routed to it.
     },
     "dhos-services-adapter-task-queue": {
-        bg_reading_alert.ROUTING_KEY: bg_reading_alert.process,
-        create_oru_message.ROUTING_KEY: create_oru_message.process,
-        patient_update.ROUTING_KEY: patient_update.process,
+        bg_reading_alert.ROUTING_KEY: Route(bg_reading_alert.process),
+        create_oru_message.ROUTING_KEY: Route(create_oru_message.process),
+        patient_update.ROUTING_KEY: Route(
+            patient_update.process,
+            # Keyed on MRN first: every update from the hospital carries it, whereas the
+            # NHS number may only appear in a later update for the same patient, which
+            # would then be put in a different partition to the earlier ones.
+            partition_key=actions.partition_key_from_action(
+                "process_patient", "mrn", "nhs_number"
+            ),
+        ),
     },
     "dhos-sms-adapter-task-queue": {
         # No longer has messages routed to it.
     },
     "gdm-bg-readings-adapter-task-queue": {
-        bg_reading_abnormal.ROUTING_KEY: bg_reading_abnormal.process,
+        bg_reading_abnormal.ROUTING_KEY: Route(bg_reading_abnormal.process),
     },
 }
 
@@ -68,6 +119,24 @@ QUEUE_MODES: Dict[str, str] = {
     "dhos-connector-adapter-task-queue": "lazy",
 }
 
+# Per-queue consumer limits. Queues not listed here use the defaults from config.
+QUEUE_QOS: Dict[str, QueueQoS] = {
+    "dhos-aggregator-adapter-task-queue": QueueQoS(prefetch_count=1, concurrency=1),
+    "dhos-audit-adapter-task-queue": QueueQoS(prefetch_count=50, concurrency=10),
+    "dhos-connector-adapter-task-queue": QueueQoS(prefetch_count=2, concurrency=2),
+    "dhos-dea-export-adapter-task-queue": QueueQoS(prefetch_count=1, concurrency=1),
+    "dhos-notifications-adapter-task-queue": QueueQoS(prefetch_count=10, concurrency=4),
+    "gdm-bg-readings-adapter-task-queue": QueueQoS(prefetch_count=20, concurrency=5),
+}
+
+# Number of supervisor worker processes that should consume from each queue, for hot queues.
+# Queues not listed here, and queues with routes that must be processed in order, are
+# consumed by a single worker process.
+QUEUE_REPLICAS: Dict[str, int] = {
+    "dhos-audit-adapter-task-queue": 2,
+    "gdm-bg-readings-adapter-task-queue": 2,
+}
+
 # Deprecated routes that are no longer required and should be removed if they exist.
 ROUTES_TO_UNBIND: Dict[str, List[str]] = {
     "dhos-dea-export-adapter-task-queue": [
@@ -99,7 +168,54 @@ ROUTES_TO_UNBIND: Dict[str, List[str]] = {
 #     ...
 # }
 CALLBACK_LOOKUP: Dict[str, Callable] = {
-    key: callback
+    key: route.callback
+    for route_map in ROUTING_TABLE.values()
+    for key, route in route_map.items()
+}
+
+# Lookup of async callbacks for routes that have them, in the form:
+# {
+#     routing_key: async_callback,
+#     ...
+# }
+ASYNC_CALLBACK_LOOKUP: Dict[str, Callable[[AnyStr], Awaitable[None]]] = {
+    key: route.async_callback
     for route_map in ROUTING_TABLE.values()
-    for key, callback in route_map.items()
+    for key, route in route_map.items()
+    if route.async_callback is not None
+}
+
+# Lookup of partition key extractors for routes that must be processed in order, in the form:
+# {
+#     routing_key: partition_key_extractor,
+#     ...
+# }
+PARTITION_KEY_LOOKUP: Dict[str, Callable[[AnyStr], Optional[str]]] = {
+    key: route.partition_key
+    for route_map in ROUTING_TABLE.values()
+    for key, route in route_map.items()
+    if route.partition_key is not None
+}
+
+# Lookup of processing deadlines for routes that set their own, in the form:
+# {
+#     routing_key: deadline_sec,
+#     ...
+# }
+DEADLINE_LOOKUP: Dict[str, float] = {
+    key: route.deadline_sec
+    for route_map in ROUTING_TABLE.values()
+    for key, route in route_map.items()
+    if route.deadline_sec is not None
+}
+
+# Lookup of the queue each routing key is consumed from, in the form:
+# {
+#     routing_key: queue_name,
+#     ...
+# }
+QUEUE_LOOKUP: Dict[str, str] = {
+    key: queue_name
+    for queue_name, route_map in ROUTING_TABLE.items()
+    for key in route_map.keys()
 }
@@ -1,6 +1,9 @@
+import random
+import threading
+import time
 import uuid
 from datetime import datetime, timedelta, timezone
-from typing import Dict, Optional
+from typing import Dict, NamedTuple, Optional, Tuple
 
 import jose
 import requests
@@ -9,18 +12,21 @@ from she_logging import logger
 from she_logging.request_id import current_request_id
 
 from dhos_async_adapter import config
+from dhos_async_adapter.helpers import deadline
 from dhos_async_adapter.helpers.exceptions import RejectMessageError
 
 SYSTEM_ID = "dhos-async-adapter"
 HS_ISSUER: str = config.PROXY_URL
 if not HS_ISSUER.endswith("/"):
     HS_ISSUER += "/"
+# How long to wait before trying again after failing to refresh the DEA Auth0 token.
+DEA_REFRESH_RETRY_SEC = 30
 
 
 def get_request_headers() -> Dict[str, str]:
     return {
         "X-Request-ID": current_request_id() or str(uuid.uuid4()),
-        "Authorization": f"Bearer {_generate_system_jwt()}",
+        "Authorization": f"Bearer {_get_system_jwt()}",
     }
 
 
@@ -33,6 +39,79 @@ def get_dea_request_headers() -> Dict[str, str]:
     }
 
 
+class SystemJwtCache:
+    def __init__(self) -> None:
+        # The token, when (by time.monotonic()) it should be refreshed, and when it expires.
+        # Replaced as a whole, so it can be read without the lock.
+        self.entry: Optional[Tuple[str, float, float]] = None
+        self.refreshing = False
+        self.lock = threading.Lock()
+
+
+system_jwt_cache = SystemJwtCache()
+
+
+def reset_system_jwt_cache() -> None:
+    global system_jwt_cache
+    system_jwt_cache = SystemJwtCache()
+
+
+def _get_system_jwt() -> str:
+    """
+    Returns the cached system JWT. Once it is close to expiry, a new one is signed in the
+    background while the current one is still used, so requests only wait for signing when
+    there is no usable token (at startup, or after a long idle period).
+    """
+    cache: SystemJwtCache = system_jwt_cache
+    entry: Optional[Tuple[str, float, float]] = cache.entry
+    now: float = time.monotonic()
+    if entry is not None and now < entry[2]:
+        token, refresh_at, _ = entry
+        if now >= refresh_at:
+            with cache.lock:
+                start_refresh: bool = not cache.refreshing
+                cache.refreshing = True
+            if start_refresh:
+                threading.Thread(
+                    target=_refresh_system_jwt,
+                    args=(cache,),
+                    name="system-jwt-refresh",
+                    daemon=True,
+                ).start()
+        return token
+    with cache.lock:
+        # Another thread may have signed one while this one waited for the lock.
+        if cache.entry is None or time.monotonic() >= cache.entry[2]:
+            cache.entry = _sign_system_jwt()
+        return cache.entry[0]
+
+
+def _refresh_system_jwt(cache: SystemJwtCache) -> None:
+    # noinspection PyBroadException
+    try:
+        entry: Tuple[str, float, float] = _sign_system_jwt()
+        with cache.lock:
+            cache.entry = entry
+    except Exception:
+        # The current token is used until it expires, when signing is retried.
+        logger.exception("Failed to refresh system JWT")
+    finally:
+        with cache.lock:
+            cache.refreshing = False
+
+
+def _sign_system_jwt() -> Tuple[str, float, float]:
+    signed_at: float = time.monotonic()
+    token: str = _generate_system_jwt()
+    expires_at: float = signed_at + config.SYSTEM_JWT_EXPIRY_SEC
+    # No sooner than halfway through its life, whatever the margin.
+    refresh_at: float = max(
+        signed_at + config.SYSTEM_JWT_EXPIRY_SEC / 2,
+        expires_at - config.SYSTEM_JWT_REFRESH_MARGIN_SEC,
+    )
+    return token, refresh_at, expires_at
+
+
 def _generate_system_jwt() -> str:
     logger.info("Generating system JWT for system ID '%s'", SYSTEM_ID)
     claims = {
@@ -53,54 +132,140 @@ def _generate_system_jwt() -> str:
     return jwt_token
 
 
-class DeaJwtCache:
-    token: Optional[str] = None
-    expiry: Optional[datetime] = None
+class _DeaToken(NamedTuple):
+    token: str
+    expiry: datetime
+    refresh_at: datetime
+
+
+class DeaTokenManager:
+    """
+    Holds the JWT from the DEA Auth0 tenant for talking to the central DEA services, to avoid
+    hammering Auth0 with requests. The token is refreshed in the background well before it
+    expires, while the current one is still used. Only when there is no valid token do
+    requests wait for one, and then only one of them fetches it.
+    """
+
+    def __init__(self) -> None:
+        # Replaced as a whole, so it can be read without the lock.
+        self._entry: Optional[_DeaToken] = None
+        # Held while fetching a token.
+        self._lock = threading.Lock()
+        self._refreshing = False
+        self._refreshing_lock = threading.Lock()
+        self._session = requests.Session()
+
+    @property
+    def token(self) -> Optional[str]:
+        return None if self._entry is None else self._entry.token
+
+    @property
+    def expiry(self) -> Optional[datetime]:
+        return None if self._entry is None else self._entry.expiry
+
+    def get_token(self) -> str:
+        entry: Optional[_DeaToken] = self._entry
+        if entry is not None and _is_valid(entry):
+            if datetime.now(tz=timezone.utc) >= entry.refresh_at:
+                self._start_refresh()
+            return entry.token
+        with self._lock:
+            # Another thread may have fetched one while this one waited for the lock.
+            entry = self._entry
+            if entry is None or not _is_valid(entry):
+                logger.debug("No valid cached DEA Auth0 token, fetching a new one")
+                entry = self._entry = self._fetch(
+                    timeout=deadline.get_timeout(config.DEA_AUTH0_TIMEOUT_SEC)
+                )
+            return entry.token
+
+    def _start_refresh(self) -> None:
+        with self._refreshing_lock:
+            if self._refreshing:
+                return
+            self._refreshing = True
+        threading.Thread(
+            target=self._refresh, name="dea-token-refresh", daemon=True
+        ).start()
+
+    def _refresh(self) -> None:
+        # noinspection PyBroadException
+        try:
+            with self._lock:
+                logger.debug("Refreshing DEA Auth0 token")
+                self._entry = self._fetch(timeout=config.DEA_AUTH0_TIMEOUT_SEC)
+        except Exception:
+            # Carry on with the current token, trying again a little later.
+            entry: Optional[_DeaToken] = self._entry
+            if entry is not None:
+                self._entry = entry._replace(
+                    refresh_at=datetime.now(tz=timezone.utc)
+                    + timedelta(seconds=DEA_REFRESH_RETRY_SEC)
+                )
+        finally:
+            with self._refreshing_lock:
+                self._refreshing = False
+
+    def _fetch(self, timeout: float) -> _DeaToken:
+        payload = {
+            "client_id": config.DEA_AUTH0_CLIENT_ID,
+            "client_secret": config.DEA_AUTH0_CLIENT_SECRET,
+            "audience": config.DEA_AUTH0_AUDIENCE,
+            "grant_type": "client_credentials",
+        }
+        try:
+            response = self._session.post(
+                url=config.DEA_AUTH0_TOKEN_URL,
+                headers={"content-type": "application/x-www-form-urlencoded"},
+                data=payload,
+                timeout=timeout,
+            )
+            response.raise_for_status()
+        except requests.exceptions.RequestException as e:
+            logger.exception(
+                "Couldn't retrieve JWT from DEA Auth0",
+                extra={
+                    "response_status": getattr(e.response, "status_code", None),
+                    "response_data": getattr(e.response, "data", None),
+                },
+            )
+            raise RejectMessageError()
+        access_token: str = response.json()["access_token"]
+        expiry: datetime = _get_expiry(access_token)
+        return _DeaToken(access_token, expiry, _get_refresh_at(expiry))
+
+
+dea_token_manager = DeaTokenManager()
 
 
-dea_jwt_cache = DeaJwtCache()
+def reset_dea_token_manager() -> None:
+    global dea_token_manager
+    dea_token_manager = DeaTokenManager()
 
 
 def _retrieve_dea_auth0_jwt() -> str:
     """
-    Retrieves a JWT from the DEA Auth0 tenant for talking to the central DEA services. Caches it to avoid
-    hammering Auth0 with requests.
+    Retrieves a JWT from the DEA Auth0 tenant for talking to the central DEA services.
     """
-    if (
-        dea_jwt_cache.token is not None
-        and dea_jwt_cache.expiry is not None
-        and dea_jwt_cache.expiry - datetime.now(tz=timezone.utc) > timedelta(minutes=1)
-    ):
-        # Cached token has not expired and not going to expire in the next minute.
-        return dea_jwt_cache.token
-    logger.debug("No valid cached DEA Auth0 token, fetching a new one")
-    payload = {
-        "client_id": config.DEA_AUTH0_CLIENT_ID,
-        "client_secret": config.DEA_AUTH0_CLIENT_SECRET,
-        "audience": config.DEA_AUTH0_AUDIENCE,
-        "grant_type": "client_credentials",
-    }
-    try:
-        response = requests.post(
-            url=config.DEA_AUTH0_TOKEN_URL,
-            headers={"content-type": "application/x-www-form-urlencoded"},
-            data=payload,
-            timeout=30,
-        )
-        response.raise_for_status()
-        access_token: str = response.json()["access_token"]
-        dea_jwt_cache.token = access_token
-        dea_jwt_cache.expiry = _get_expiry(access_token)
-        return access_token
-    except requests.exceptions.RequestException as e:
-        logger.exception(
-            "Couldn't retrieve JWT from DEA Auth0",
-            extra={
-                "response_status": getattr(e.response, "status_code", None),
-                "response_data": getattr(e.response, "data", None),
-            },
-        )
-        raise RejectMessageError()
+    return dea_token_manager.get_token()
+
+
+def _is_valid(entry: _DeaToken) -> bool:
+    # Tokens going to expire in the next minute aren't used.
+    return entry.expiry - datetime.now(tz=timezone.utc) > timedelta(minutes=1)
+
+
+def _get_refresh_at(expiry: datetime) -> datetime:
+    """
+    Returns when to refresh a token: DEA_AUTH0_REFRESH_AHEAD_SEC before it expires, plus
+    random jitter, but no sooner than halfway through its remaining life.
+    """
+    now: datetime = datetime.now(tz=timezone.utc)
+    ahead = timedelta(
+        seconds=config.DEA_AUTH0_REFRESH_AHEAD_SEC
+        + random.uniform(0, config.DEA_AUTH0_REFRESH_JITTER_SEC)
+    )
+    return max(now + (expiry - now) / 2, expiry - ahead)
 
 
 def _get_expiry(token: str) -> datetime:
@@ -1,26 +1,44 @@
-import json
 from json import JSONDecodeError
-from typing import AnyStr, Dict, List, Type
+from typing import AnyStr, Dict, List, Optional, Tuple, Type
 
 from marshmallow import EXCLUDE, Schema, ValidationError
 from she_logging import logger
 
+from dhos_async_adapter.helpers import json_codec
 from dhos_async_adapter.helpers.exceptions import RejectMessageError
 
+# Schema instances by class and load options. Building a schema is far more costly than
+# looking one up, and they hold no state between loads so can be shared between threads.
+_schemas: Dict[Tuple[Type[Schema], Optional[str], bool], Schema] = {}
+
+
+def get_schema(
+    schema: Type[Schema], unknown: Optional[str] = None, many: bool = False
+) -> Schema:
+    """
+    Returns the shared instance of the schema, loading with the given options. If unknown
+    isn't given, the schema's Meta.unknown applies.
+    """
+    key: Tuple[Type[Schema], Optional[str], bool] = (schema, unknown, many)
+    instance: Optional[Schema] = _schemas.get(key)
+    if instance is None:
+        instance = _schemas.setdefault(key, schema(unknown=unknown, many=many))
+    return instance
+
 
 def validate_message_body_dict(
     body: AnyStr, schema: Type[Schema], unknown: str = EXCLUDE
 ) -> Dict:
     # Get message JSON body.
     try:
-        contents: Dict = json.loads(body)
+        contents: Dict = json_codec.loads(body)
     except JSONDecodeError:
         logger.exception("Couldn't load message body")
         raise RejectMessageError()
 
     # Validate message body.
     try:
-        validated_message = schema().load(contents, unknown=unknown)
+        validated_message = get_schema(schema, unknown=unknown).load(contents)
     except ValidationError:
         logger.exception("Failed to validate message body")
         raise RejectMessageError()
@@ -34,14 +52,16 @@ def validate_message_body_list(
 ) -> List[Dict]:
     # Get message JSON body.
     try:
-        contents: List[Dict] = json.loads(body)
+        contents: List[Dict] = json_codec.loads(body)
     except JSONDecodeError:
         logger.exception("Couldn't load message body")
         raise RejectMessageError()
 
     # Validate message body.
     try:
-        validated_message = schema().load(contents, unknown=unknown, many=True)
+        validated_message = get_schema(schema, unknown=unknown, many=True).load(
+            contents
+        )
     except ValidationError:
         logger.exception("Failed to validate message body")
         raise RejectMessageError()
@@ -0,0 +1,174 @@
+import itertools
+from collections import OrderedDict
+from typing import Any, Callable, Dict, List, Optional
+
+from kombu import Connection, Message, Producer
+from kombu.transport.pyamqp import Channel
+from kombu_batteries_included import config as kbi_config
+from kombu_batteries_included import infra
+from she_logging import logger
+
+from dhos_async_adapter.helpers.publishing import OutgoingMessage
+
+
+class _Batch:
+    def __init__(
+        self,
+        size: int,
+        on_confirmed: Callable[[], None],
+        on_failed: Callable[[], None],
+    ) -> None:
+        self.remaining = size
+        self.on_confirmed = on_confirmed
+        self.on_failed = on_failed
+        self.done = False
+
+
+class ConfirmingPublisher:
+    """
+    Publishes messages (to the task exchange, unless given another) on a long-lived channel
+    in confirm mode, rather than opening a connection per message. Publishing doesn't wait for the broker: each batch
+    of messages has callbacks, run once the broker has confirmed every message in the batch
+    or has rejected any of them. Confirms are received as the connection's events are drained.
+
+    Not thread-safe: must only be used from the connection thread.
+    """
+
+    def __init__(self) -> None:
+        self._producer: Optional[Producer] = None
+        # Publish sequence numbers (the delivery tags used in confirms) awaiting confirmation.
+        self._unconfirmed: "OrderedDict[int, _Batch]" = OrderedDict()
+        self._next_tag = 1
+
+    @property
+    def is_open(self) -> bool:
+        return self._producer is not None
+
+    @property
+    def pending(self) -> int:
+        """The number of batches awaiting confirmation."""
+        return len({id(b) for b in self._unconfirmed.values() if not b.done})
+
+    def open(self, connection: Connection) -> None:
+        """Opens a confirm channel on the connection, failing anything unconfirmed on the old one."""
+        self.close()
+        channel: Channel = connection.channel()
+        channel.confirm_select()
+        channel.events["basic_ack"].add(self._on_ack)
+        channel.events["basic_nack"].add(self._on_nack)
+        self._producer = Producer(
+            channel, exchange=infra.TASK_EXCHANGE_NAME, auto_declare=False
+        )
+        self._next_tag = 1
+
+    def close(self) -> None:
+        self._producer = None
+        for batch in list(self._unconfirmed.values()):
+            self._finish(batch, confirmed=False)
+        self._unconfirmed.clear()
+
+    def publish(
+        self,
+        messages: List[OutgoingMessage],
+        on_confirmed: Callable[[], None],
+        on_failed: Callable[[], None],
+    ) -> None:
+        self._publish_batch(
+            [
+                {
+                    "body": message.body,
+                    "routing_key": message.routing_key,
+                    "content_type": "application/text",
+                    "content_encoding": "utf-8",
+                    "compression": kbi_config.RABBITMQ_COMPRESSION,
+                    "timestamp": message.timestamp,
+                    "correlation_id": message.correlation_id,
+                }
+                for message in messages
+            ],
+            on_confirmed=on_confirmed,
+            on_failed=on_failed,
+        )
+
+    def republish(
+        self,
+        message: Message,
+        exchange: str,
+        headers: Dict[str, Any],
+        on_confirmed: Callable[[], None],
+        on_failed: Callable[[], None],
+    ) -> None:
+        """
+        Publishes a copy of a delivered message to another exchange with the given headers,
+        keeping its routing key and properties.
+        """
+        self._publish_batch(
+            [
+                {
+                    "body": message.body,
+                    "exchange": exchange,
+                    "routing_key": message.delivery_info.get("routing_key"),
+                    "headers": headers,
+                    "content_type": message.content_type,
+                    "content_encoding": message.content_encoding,
+                    "correlation_id": message.properties.get("correlation_id"),
+                    "timestamp": message.properties.get("timestamp"),
+                    "delivery_mode": "persistent",
+                }
+            ],
+            on_confirmed=on_confirmed,
+            on_failed=on_failed,
+        )
+
+    def _publish_batch(
+        self,
+        messages: List[Dict[str, Any]],
+        on_confirmed: Callable[[], None],
+        on_failed: Callable[[], None],
+    ) -> None:
+        if self._producer is None:
+            raise ValueError("Publisher has not been opened")
+        batch = _Batch(len(messages), on_confirmed=on_confirmed, on_failed=on_failed)
+        # noinspection PyBroadException
+        try:
+            for message in messages:
+                self._unconfirmed[self._next_tag] = batch
+                self._next_tag += 1
+                logger.debug("Publishing %s message", message["routing_key"])
+                self._producer.publish(**message)
+        except Exception:
+            # The channel's sequence numbers can no longer be trusted.
+            logger.exception("Failed to publish messages")
+            self.close()
+
+    def _on_ack(self, delivery_tag: int, multiple: bool) -> None:
+        for batch in self._pop_batches(delivery_tag, multiple):
+            batch.remaining -= 1
+            if batch.remaining == 0:
+                self._finish(batch, confirmed=True)
+
+    def _on_nack(self, delivery_tag: int, multiple: bool) -> None:
+        for batch in self._pop_batches(delivery_tag, multiple):
+            logger.error("Broker failed to accept published message")
+            self._finish(batch, confirmed=False)
+
+    def _pop_batches(self, delivery_tag: int, multiple: bool) -> List[_Batch]:
+        tags: List[int] = (
+            list(itertools.takewhile(lambda t: t <= delivery_tag, self._unconfirmed))
+            if multiple
+            else [delivery_tag]
+        )
+        return [
+            batch
+            for batch in (self._unconfirmed.pop(tag, None) for tag in tags)
+            if batch is not None
+        ]
+
+    def _finish(self, batch: _Batch, confirmed: bool) -> None:
+        if batch.done:
+            return
+        batch.done = True
+        if confirmed:
+            batch.on_confirmed()
+        else:
+            batch.on_failed()
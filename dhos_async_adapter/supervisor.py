@@ -0,0 +1,164 @@
+import multiprocessing
+import signal
+import time
+from multiprocessing.context import ForkContext
+from multiprocessing.process import BaseProcess
+from types import FrameType
+from typing import Any, Dict, List, Optional
+
+from she_logging import logger
+
+from dhos_async_adapter import app, config
+from dhos_async_adapter.consumer import set_alive_file
+from dhos_async_adapter.helpers.routing import (
+    PARTITION_KEY_LOOKUP,
+    QUEUE_REPLICAS,
+    ROUTING_TABLE,
+)
+
+# Workers that stay up for this long are considered healthy, resetting the restart delay.
+HEALTHY_UPTIME_SEC = 60
+
+
+def assign_queues(
+    queue_names: List[str], processes: int, replicas: Dict[str, int]
+) -> List[List[str]]:
+    """
+    Shards queues across worker processes. Each queue is consumed by the number of workers
+    given in replicas (default 1, and never more than the number of workers), always
+    assigning to the workers with the fewest queues so far.
+    """
+    assignments: List[List[str]] = [[] for _ in range(processes)]
+    # Place the most replicated queues first so they can be spread across distinct workers.
+    for queue_name in sorted(queue_names, key=lambda q: -replicas.get(q, 1)):
+        copies: int = max(1, min(replicas.get(queue_name, 1), processes))
+        workers: List[int] = sorted(
+            range(processes), key=lambda i: (len(assignments[i]), i)
+        )[:copies]
+        for i in workers:
+            assignments[i].append(queue_name)
+    return assignments
+
+
+def get_queue_replicas() -> Dict[str, int]:
+    """
+    Returns the configured replicas for each queue. Queues with partitioned routes are never
+    replicated, as that would break ordering between workers.
+    """
+    replicas: Dict[str, int] = {}
+    for queue_name, count in QUEUE_REPLICAS.items():
+        if any(
+            key in PARTITION_KEY_LOOKUP for key in ROUTING_TABLE.get(queue_name, {})
+        ):
+            logger.warning(
+                "Not replicating queue %s as its messages must be processed in order",
+                queue_name,
+            )
+            continue
+        replicas[queue_name] = count
+    return replicas
+
+
+class Supervisor:
+    """
+    Runs the consumer in a number of worker processes, each consuming from a subset of the
+    queues. Crashed workers are restarted with backoff. The liveness file is only present
+    while every worker's connection to RabbitMQ is alive.
+    """
+
+    def __init__(self, assignments: List[List[str]]) -> None:
+        self.assignments = assignments
+        self._context: ForkContext = multiprocessing.get_context("fork")
+        # Shared flags, set by each worker when its connection is up.
+        self._alive_flags: Any = self._context.Array("b", len(assignments))
+        self._processes: List[Optional[BaseProcess]] = [None] * len(assignments)
+        self._started_at: List[float] = [0.0] * len(assignments)
+        self._restart_delays: List[float] = [1.0] * len(assignments)
+        self._restart_at: List[float] = [0.0] * len(assignments)
+        self.should_stop = False
+
+    def run(self) -> None:
+        signal.signal(signal.SIGTERM, self._handle_stop_signal)
+        signal.signal(signal.SIGINT, self._handle_stop_signal)
+        for index in range(len(self.assignments)):
+            self.start_worker(index)
+        while not self.should_stop:
+            self.check_workers()
+            self.update_liveness()
+            time.sleep(1)
+        self.stop()
+
+    def start_worker(self, index: int) -> None:
+        logger.info(
+            "Starting worker %d for queues: %s",
+            index,
+            ", ".join(self.assignments[index]),
+        )
+        self._alive_flags[index] = 0
+        process: BaseProcess = self._context.Process(
+            target=_run_worker,
+            args=(self.assignments[index], self._alive_flags, index),
+            name=f"consumer-worker-{index}",
+            daemon=False,
+        )
+        process.start()
+        self._processes[index] = process
+        self._started_at[index] = time.monotonic()
+
+    def check_workers(self) -> None:
+        """Restarts any workers that have exited, backing off if they keep crashing."""
+        now: float = time.monotonic()
+        for index, process in enumerate(self._processes):
+            if process is not None and process.is_alive():
+                continue
+            if process is not None:
+                logger.error("Worker %d exited with code %s", index, process.exitcode)
+                self._alive_flags[index] = 0
+                self._processes[index] = None
+                if now - self._started_at[index] > HEALTHY_UPTIME_SEC:
+                    self._restart_delays[index] = 1.0
+                self._restart_at[index] = now + self._restart_delays[index]
+                self._restart_delays[index] = min(
+                    self._restart_delays[index] * 2,
+                    config.SUPERVISOR_MAX_RESTART_DELAY_SEC,
+                )
+            if now >= self._restart_at[index]:
+                self.start_worker(index)
+
+    def update_liveness(self) -> None:
+        set_alive_file(all(self._alive_flags[:]))
+
+    def stop(self) -> None:
+        logger.info("Stopping workers")
+        set_alive_file(False)
+        for process in self._processes:
+            if process is not None and process.is_alive():
+                process.terminate()
+        for process in self._processes:
+            if process is not None:
+                process.join()
+
+    def _handle_stop_signal(self, signum: int, frame: Optional[FrameType]) -> None:
+        logger.info("Received signal %d, stopping supervisor", signum)
+        self.should_stop = True
+
+
+def _run_worker(queue_names: List[str], alive_flags: Any, index: int) -> None:
+    # Children inherit the supervisor's handlers, so restore the defaults until the
+    # consumer installs its own, which drain in-flight messages before exiting.
+    signal.signal(signal.SIGTERM, signal.SIG_DFL)
+    signal.signal(signal.SIGINT, signal.SIG_DFL)
+
+    def set_alive(alive: bool) -> None:
+        alive_flags[index] = 1 if alive else 0
+
+    app.run(queue_names=queue_names, set_alive=set_alive)
+
+
+def run(processes: int = config.SUPERVISOR_PROCESSES) -> None:
+    assignments: List[List[str]] = assign_queues(
+        list(ROUTING_TABLE.keys()),
+        processes=processes,
+        replicas=get_queue_replicas(),
+    )
+    Supervisor(assignments).run()
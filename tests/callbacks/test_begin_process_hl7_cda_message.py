@@ -2,8 +2,11 @@ import json
 
 import pytest
 from _pytest.logging import LogCaptureFixture
+from mock import Mock
+from pytest_mock import MockFixture
 from requests_mock import Mocker
 
+from dhos_async_adapter import config
 from dhos_async_adapter.callbacks import begin_process_hl7_cda_message
 from dhos_async_adapter.helpers.exceptions import RejectMessageError
 
@@ -30,3 +33,98 @@ class TestBeginProcessHl7CDAMessage:
         with pytest.raises(RejectMessageError):
             begin_process_hl7_cda_message.process(message)
         assert error in caplog.text
+
+    @pytest.mark.parametrize(
+        "content",
+        ["some XML here", "", 'Zoë <a b="c"/>\n\t\u2028 🩸', "x" * 500_000],
+    )
+    def test_process_cda_message_passed_through(
+        self, requests_mock: Mocker, content: str
+    ) -> None:
+        url = f"http://dhos-connector/dhos/v1/cda_message"
+        connector_post = requests_mock.post(url, text="", status_code=201)
+        message = json.dumps({"content": content}, ensure_ascii=False)
+
+        begin_process_hl7_cda_message.process(message)
+        begin_process_hl7_cda_message.process(message.encode("utf-8"))
+
+        assert connector_post.call_count == 2
+        for request in connector_post.request_history:
+            assert request.body == (
+                b'{"type":"HL7v3CDA","content":'
+                + json.dumps(content, ensure_ascii=False).encode("utf-8")
+                + b"}"
+            )
+            assert request.json() == {"type": "HL7v3CDA", "content": content}
+
+    @pytest.mark.parametrize(
+        "message",
+        [
+            '{"content": "some XML here", "other": 1}',
+            '{"other": 1, "content": "some XML here"}',
+            '{"\\u0063ontent": "some XML here"}',
+            '{"content": "abc", "type": "other"}',
+            '{"content": "escaped \\\\", "type": "other"}',
+            '{"content": "ends with \\"}',
+            '{"content": "}',
+            '{"content": "some XML here"',
+            '{"content": 123}',
+            '{"content": null}',
+            '{"content": "' + "x" * 100_000,
+        ],
+    )
+    def test_pass_through_cda_message_not_matched(self, message: str) -> None:
+        assert begin_process_hl7_cda_message.pass_through_cda_message(message) is None
+
+    def test_process_cda_message_escaped_backslash(self, requests_mock: Mocker) -> None:
+        url = f"http://dhos-connector/dhos/v1/cda_message"
+        connector_post = requests_mock.post(url, text="", status_code=201)
+        message = json.dumps({"content": "C:\\path"})
+
+        begin_process_hl7_cda_message.process(message)
+
+        assert connector_post.last_request.json() == {
+            "type": "HL7v3CDA",
+            "content": "C:\\path",
+        }
+
+    def test_process_cda_message_invalid_document(self, requests_mock: Mocker) -> None:
+        # Errors within the document are left for Connector API to reject.
+        url = f"http://dhos-connector/dhos/v1/cda_message"
+        connector_post = requests_mock.post(url, text="", status_code=400)
+
+        with pytest.raises(RejectMessageError):
+            begin_process_hl7_cda_message.process('{"content": "bad \\q escape"}')
+        assert connector_post.last_request.body == (
+            b'{"type":"HL7v3CDA","content":"bad \\q escape"}'
+        )
+
+    def test_process_cda_message_extra_fields(self, requests_mock: Mocker) -> None:
+        url = f"http://dhos-connector/dhos/v1/cda_message"
+        connector_post = requests_mock.post(url, text="", status_code=201)
+        message = json.dumps({"content": "some XML here", "other": "field"})
+
+        begin_process_hl7_cda_message.process(message)
+
+        assert connector_post.last_request.json() == {
+            "type": "HL7v3CDA",
+            "content": "some XML here",
+        }
+
+    def test_process_cda_message_pass_through_disabled(
+        self, requests_mock: Mocker, mocker: MockFixture
+    ) -> None:
+        mocker.patch.object(config, "CDA_PASS_THROUGH_ENABLED", False)
+        mock_pass_through: Mock = mocker.patch.object(
+            begin_process_hl7_cda_message, "pass_through_cda_message"
+        )
+        url = f"http://dhos-connector/dhos/v1/cda_message"
+        connector_post = requests_mock.post(url, text="", status_code=201)
+
+        begin_process_hl7_cda_message.process(json.dumps({"content": "some XML"}))
+
+        assert mock_pass_through.call_count == 0
+        assert connector_post.last_request.json() == {
+            "type": "HL7v3CDA",
+            "content": "some XML",
+        }
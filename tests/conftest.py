@@ -1,7 +1,7 @@
 import json
 import re
 import uuid
-from typing import Any, Dict
+from typing import Any, Dict, Generator
 
 import kombu_batteries_included
 import pytest
@@ -11,9 +11,22 @@ from mock import Mock
 from pytest_mock import MockFixture
 from requests_mock import Mocker
 
+from dhos_async_adapter import clients
+from dhos_async_adapter.clients import cache, circuit_breaker, concurrency_limiter
 from dhos_async_adapter.helpers import security
 
 
+@pytest.fixture(autouse=True)
+def reset_clients() -> Generator[None, None, None]:
+    yield
+    clients.close_sessions()
+    circuit_breaker.reset_circuit_breakers()
+    concurrency_limiter.reset_concurrency_limiters()
+    cache.clear_caches()
+    security.reset_system_jwt_cache()
+    security.reset_dea_token_manager()
+
+
 @pytest.fixture
 def mock_exchange_init(mocker: MockFixture) -> Mock:
     return mocker.patch.object(Exchange, "__init__", return_value=None)
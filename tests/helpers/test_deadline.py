@@ -0,0 +1,37 @@
+import pytest
+from mock import Mock
+from pytest_mock import MockFixture
+
+from dhos_async_adapter.helpers import deadline
+from dhos_async_adapter.helpers.exceptions import DeadlineExceededError
+
+
+class TestDeadline:
+    @pytest.fixture
+    def mock_monotonic(self, mocker: MockFixture) -> Mock:
+        return mocker.patch.object(deadline.time, "monotonic", return_value=100.0)
+
+    def test_get_timeout_no_deadline(self) -> None:
+        assert deadline.get_remaining() is None
+        assert deadline.get_timeout(30) == 30
+        assert deadline.get_timeout(None) is None
+
+    def test_get_timeout_shortened(self, mock_monotonic: Mock) -> None:
+        token = deadline.set_deadline(110.0)
+        assert deadline.get_timeout(30) == 10
+        assert deadline.get_timeout(5) == 5
+        assert deadline.get_timeout(None) == 10
+        deadline.reset_deadline(token)
+
+    def test_get_timeout_exceeded(self, mock_monotonic: Mock) -> None:
+        token = deadline.set_deadline(100.0)
+        with pytest.raises(DeadlineExceededError):
+            deadline.get_timeout(30)
+        deadline.reset_deadline(token)
+
+    def test_check_time_left(self, mock_monotonic: Mock) -> None:
+        token = deadline.set_deadline(110.0)
+        deadline.check_time_left(5)
+        with pytest.raises(DeadlineExceededError):
+            deadline.check_time_left(10)
+        deadline.reset_deadline(token)
@@ -0,0 +1,123 @@
+import json
+import math
+from datetime import datetime, timezone
+from typing import Any, Generator, List
+
+import pytest
+from mock import Mock
+from pytest_mock import MockFixture
+
+from dhos_async_adapter.helpers import json_codec
+from dhos_async_adapter.helpers.json_codec import (
+    JsonCodec,
+    OrjsonCodec,
+    StdlibJsonCodec,
+)
+from dhos_async_adapter.helpers.publishing import _json_default
+
+DOCUMENTS: List[Any] = [
+    {},
+    [],
+    None,
+    True,
+    0,
+    -1.5,
+    "",
+    {"nested": {"list": [1, 2.25, None, False, "x"]}, "empty": {}},
+    {"unicode": "Zoë 🩸 ward £", "escapes": 'quote " backslash \\ tab \t newline \n'},
+    {"big": 2**64, "negative": -(2**63), "precise": 0.1 + 0.2},
+    [{"uuid": f"uuid-{i}", "value": i * 1.1} for i in range(100)],
+    {"content": "<ClinicalDocument>" + "x" * 100_000 + "</ClinicalDocument>"},
+]
+
+requires_orjson = pytest.mark.skipif(
+    json_codec.orjson is None, reason="orjson isn't installed"
+)
+
+
+@pytest.fixture(
+    params=[StdlibJsonCodec, pytest.param(OrjsonCodec, marks=requires_orjson)]
+)
+def codec(request: Any) -> JsonCodec:
+    return request.param()
+
+
+class TestJsonCodec:
+    @pytest.fixture(autouse=True)
+    def reset_codec(self) -> Generator[None, None, None]:
+        json_codec.set_codec(None)
+        yield
+        json_codec.set_codec(None)
+
+    @pytest.mark.parametrize("document", DOCUMENTS)
+    def test_round_trip(self, codec: JsonCodec, document: Any) -> None:
+        encoded: bytes = codec.dumps(document)
+        assert isinstance(encoded, bytes)
+        assert json.loads(encoded) == document
+        assert codec.loads(encoded) == document
+        assert codec.loads(encoded.decode("utf-8")) == document
+
+    @requires_orjson
+    @pytest.mark.parametrize("document", DOCUMENTS)
+    def test_parity(self, document: Any) -> None:
+        stdlib, fast = StdlibJsonCodec(), OrjsonCodec()
+        assert stdlib.loads(fast.dumps(document)) == document
+        assert fast.loads(stdlib.dumps(document)) == document
+        stdlib_encoded: bytes = json.dumps(document).encode("utf-8")
+        assert stdlib.loads(stdlib_encoded) == fast.loads(stdlib_encoded)
+
+    def test_compact(self, codec: JsonCodec) -> None:
+        assert codec.dumps({"a": [1, 2]}) == b'{"a":[1,2]}'
+
+    def test_default(self, codec: JsonCodec) -> None:
+        created = datetime(2020, 1, 1, 12, tzinfo=timezone.utc)
+        assert codec.loads(
+            codec.dumps({"created": created}, default=_json_default)
+        ) == {"created": "2020-01-01T12:00:00.000+00:00"}
+        with pytest.raises(TypeError):
+            codec.dumps({"created": created})
+        with pytest.raises(TypeError):
+            codec.dumps({"unknown": object()}, default=_json_default)
+
+    def test_non_string_keys(self, codec: JsonCodec) -> None:
+        assert codec.loads(codec.dumps({1: "one"})) == {"1": "one"}
+
+    @pytest.mark.parametrize("data", [b"not json", "", b'{"a": 1', b"[1,]"])
+    def test_invalid(self, codec: JsonCodec, data: Any) -> None:
+        with pytest.raises(json.JSONDecodeError):
+            codec.loads(data)
+
+    def test_nan(self, codec: JsonCodec) -> None:
+        assert math.isnan(codec.loads(b'{"a": NaN}')["a"])
+
+    @pytest.mark.parametrize(
+        "name,expected",
+        [
+            ("json", "json"),
+            pytest.param("orjson", "orjson", marks=requires_orjson),
+            pytest.param("auto", "orjson", marks=requires_orjson),
+        ],
+    )
+    def test_get_codec(self, mocker: MockFixture, name: str, expected: str) -> None:
+        mocker.patch.object(json_codec.config, "JSON_CODEC", name)
+        assert json_codec.get_codec().name == expected
+        assert json_codec.get_codec() is json_codec.get_codec()
+
+    @pytest.mark.parametrize("name", ["auto", "orjson"])
+    def test_get_codec_orjson_missing(self, mocker: MockFixture, name: str) -> None:
+        mocker.patch.object(json_codec.config, "JSON_CODEC", name)
+        mocker.patch.object(json_codec, "orjson", None)
+        assert json_codec.get_codec().name == "json"
+
+    def test_orjson_codec_orjson_missing(self, mocker: MockFixture) -> None:
+        mocker.patch.object(json_codec, "orjson", None)
+        with pytest.raises(ImportError):
+            OrjsonCodec()
+
+    def test_set_codec(self) -> None:
+        mock_codec = Mock(name="codec")
+        json_codec.set_codec(mock_codec)
+        json_codec.loads(b"{}")
+        json_codec.dumps({})
+        mock_codec.loads.assert_called_once_with(b"{}")
+        mock_codec.dumps.assert_called_once_with({}, default=None)
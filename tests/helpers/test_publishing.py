@@ -0,0 +1,111 @@
+import json
+from datetime import datetime
+from typing import List, Optional
+
+from mock import Mock
+from pytest_mock import MockFixture
+from she_logging.request_id import (
+    current_request_id,
+    reset_request_id,
+    set_request_id,
+)
+
+from dhos_async_adapter import config
+from dhos_async_adapter.helpers import publishing
+from dhos_async_adapter.helpers.exceptions import RequeueMessageError
+from dhos_async_adapter.helpers.publishing import OutgoingMessage
+
+
+class TestPublishing:
+    def test_publish_message_immediately(self, mock_publish: Mock) -> None:
+        publishing.publish_message(routing_key="dhos.DM000005", body={"key": "value"})
+        mock_publish.assert_called_once_with(
+            routing_key="dhos.DM000005", body={"key": "value"}
+        )
+
+    def test_publish_message_collected(self, mock_publish: Mock) -> None:
+        # Arrange
+        token = set_request_id("request_id")
+
+        # Act
+        with publishing.collect_messages() as outgoing:
+            publishing.publish_message(
+                routing_key="dhos.DM000005",
+                body={"created": datetime(2020, 1, 1, 12, 0, 0)},
+            )
+        publishing.publish_message(routing_key="dhos.DM000002", body={})
+        reset_request_id(token)
+
+        # Assert
+        assert len(outgoing) == 1
+        message: OutgoingMessage = outgoing[0]
+        assert message.routing_key == "dhos.DM000005"
+        assert json.loads(message.body) == {"created": "2020-01-01T12:00:00.000+00:00"}
+        assert message.correlation_id == "request_id"
+        mock_publish.assert_called_once_with(routing_key="dhos.DM000002", body={})
+
+    def test_collect_messages_nested(self, mock_publish: Mock) -> None:
+        with publishing.collect_messages() as outer:
+            with publishing.collect_messages() as inner:
+                publishing.publish_message(routing_key="dhos.DM000005", body={})
+            publishing.publish_message(routing_key="dhos.DM000002", body={})
+        routing_keys: List[str] = [m.routing_key for m in outer + inner]
+        assert routing_keys == ["dhos.DM000002", "dhos.DM000005"]
+        assert mock_publish.call_count == 0
+
+    def test_publish_message_local_dispatch(
+        self, mocker: MockFixture, mock_publish: Mock
+    ) -> None:
+        # Arrange
+        request_ids: List[Optional[str]] = []
+        mock_callback = Mock(
+            side_effect=lambda body: request_ids.append(current_request_id())
+        )
+        mocker.patch.dict(publishing._local_callbacks, {"dhos.DM000005": mock_callback})
+        token = set_request_id("request_id")
+
+        # Act
+        publishing.publish_message(routing_key="dhos.DM000005", body={"key": "value"})
+        reset_request_id(token)
+
+        # Assert
+        mock_callback.assert_called_once_with(b'{"key":"value"}')
+        assert request_ids == ["request_id"]
+        assert mock_publish.call_count == 0
+
+    def test_publish_message_local_dispatch_failed(
+        self, mocker: MockFixture, mock_publish: Mock
+    ) -> None:
+        # Arrange
+        def callback(body: bytes) -> None:
+            publishing.publish_message(routing_key="dhos.DM000002", body={})
+            raise RequeueMessageError()
+
+        mocker.patch.dict(publishing._local_callbacks, {"dhos.DM000005": callback})
+
+        # Act
+        with publishing.collect_messages() as outgoing:
+            publishing.publish_message(routing_key="dhos.DM000005", body={})
+
+        # Assert
+        assert [m.routing_key for m in outgoing] == ["dhos.DM000005"]
+
+    def test_publish_message_local_dispatch_max_depth(
+        self, mocker: MockFixture, mock_publish: Mock
+    ) -> None:
+        # Arrange
+        mocker.patch.object(config, "LOCAL_DISPATCH_MAX_DEPTH", 2)
+        calls: List[bytes] = []
+
+        def callback(body: bytes) -> None:
+            calls.append(body)
+            publishing.publish_message(routing_key="dhos.DM000005", body={})
+
+        mocker.patch.dict(publishing._local_callbacks, {"dhos.DM000005": callback})
+
+        # Act
+        publishing.publish_message(routing_key="dhos.DM000005", body={})
+
+        # Assert
+        assert len(calls) == 2
+        mock_publish.assert_called_once_with(routing_key="dhos.DM000005", body={})
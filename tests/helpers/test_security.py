@@ -1,7 +1,9 @@
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta, timezone
 
 import pytest
 from jose import jwt as jose_jwt
+from mock import Mock
 from pytest_mock import MockFixture
 from requests_mock import Mocker
 
@@ -26,6 +28,7 @@ class TestAudit:
 
         # Act
         result = security.get_request_headers()
+        security.get_request_headers()
 
         # Assert
         expected_claims = {
@@ -35,7 +38,8 @@ class TestAudit:
             "scope": DEFAULT_SYSTEM_JWT_SCOPE,
             "exp": datetime(2020, 1, 1, 0, 5, 0, 0),
         }
-        assert mock_current_request_id.call_count == 1
+        assert mock_current_request_id.call_count == 2
+        # The token is reused by the second request.
         assert mock_jose_encode.call_count == 1
         mock_jose_encode.assert_called_with(
             claims=expected_claims, key=config.HS_KEY, algorithm="HS512"
@@ -45,6 +49,57 @@ class TestAudit:
             "X-Request-ID": request_id,
         }
 
+    def test_system_jwt_refreshed_ahead(self, mocker: MockFixture) -> None:
+        # Arrange
+        mock_monotonic = mocker.patch.object(
+            security.time, "monotonic", return_value=1000.0
+        )
+        mock_jose_encode = mocker.patch.object(
+            security.jose_jwt, "encode", side_effect=["TOKEN1", "TOKEN2"]
+        )
+        mock_thread = mocker.patch.object(security.threading, "Thread")
+        assert security._get_system_jwt() == "TOKEN1"
+
+        # Act
+        mock_monotonic.return_value = (
+            1000.0 + config.SYSTEM_JWT_EXPIRY_SEC - config.SYSTEM_JWT_REFRESH_MARGIN_SEC
+        )
+        token_in_window = security._get_system_jwt()
+        security._get_system_jwt()
+        security._refresh_system_jwt(*mock_thread.call_args.kwargs["args"])
+
+        # Assert
+        # The old token is used while the new one is signed, in a single background thread.
+        assert token_in_window == "TOKEN1"
+        assert mock_thread.call_count == 1
+        assert security._get_system_jwt() == "TOKEN2"
+        assert mock_jose_encode.call_count == 2
+
+    def test_system_jwt_expired(self, mocker: MockFixture) -> None:
+        # Arrange
+        mock_monotonic = mocker.patch.object(
+            security.time, "monotonic", return_value=1000.0
+        )
+        mocker.patch.object(
+            security.jose_jwt, "encode", side_effect=["TOKEN1", "TOKEN2"]
+        )
+        security._get_system_jwt()
+
+        # Act
+        mock_monotonic.return_value = 1000.0 + config.SYSTEM_JWT_EXPIRY_SEC
+
+        # Assert
+        assert security._get_system_jwt() == "TOKEN2"
+
+    def test_system_jwt_concurrent(self, mocker: MockFixture) -> None:
+        mock_jose_encode = mocker.patch.object(
+            security.jose_jwt, "encode", return_value="TOKEN"
+        )
+        with ThreadPoolExecutor(max_workers=8) as executor:
+            tokens = list(executor.map(lambda _: security._get_system_jwt(), range(50)))
+        assert tokens == ["TOKEN"] * 50
+        assert mock_jose_encode.call_count == 1
+
     def test_retrieve_dea_auth0_jwt_failure(self, requests_mock: Mocker) -> None:
         # Arrange
         mock_jwt = requests_mock.post("http://dea-auth0-token", status_code=401)
@@ -71,7 +126,6 @@ class TestAudit:
             key="some_key",
             algorithm="HS512",
         )
-        security.dea_jwt_cache = security.DeaJwtCache()
         mock_jwt = requests_mock.post(
             "http://dea-auth0-token", json={"access_token": access_token}
         )
@@ -111,30 +165,15 @@ class TestAudit:
         old_token_expiry: datetime = datetime.now(tz=timezone.utc) + timedelta(
             seconds=expiry_seconds
         )
-        old_access_token = jose_jwt.encode(
-            claims={
-                "iss": "http://localhost/",
-                "aud": "http://localhost/",
-                "exp": old_token_expiry,
-            },
-            key="some_key",
-            algorithm="HS512",
+        old_access_token = _encode_token(old_token_expiry)
+        # Not due to be refreshed in the background.
+        security.dea_token_manager._entry = security._DeaToken(
+            old_access_token, old_token_expiry, old_token_expiry + timedelta(days=1)
         )
-        security.dea_jwt_cache.token = old_access_token
-        security.dea_jwt_cache.expiry = old_token_expiry
         new_token_expiry: datetime = datetime.now(tz=timezone.utc) + timedelta(
             minutes=15
         )
-        new_access_token = jose_jwt.encode(
-            claims={
-                "iss": "http://localhost/",
-                "aud": "http://localhost/",
-                "exp": new_token_expiry,
-            },
-            key="some_key",
-            algorithm="HS512",
-        )
-
+        new_access_token = _encode_token(new_token_expiry)
         mock_jwt = requests_mock.post(
             "http://dea-auth0-token", json={"access_token": new_access_token}
         )
@@ -146,12 +185,107 @@ class TestAudit:
         if expect_new_token:
             assert mock_jwt.call_count == 1
             assert result["authorization"] == f"Bearer {new_access_token}"
-            assert security.dea_jwt_cache.token == new_access_token
-            assert security.dea_jwt_cache.expiry - new_token_expiry < timedelta(
-                seconds=1
-            )
+            assert security.dea_token_manager.token == new_access_token
+            expiry = security.dea_token_manager.expiry
+            assert expiry is not None
+            assert expiry - new_token_expiry < timedelta(seconds=1)
         else:
             assert mock_jwt.call_count == 0
             assert result["authorization"] == f"Bearer {old_access_token}"
-            assert security.dea_jwt_cache.token == old_access_token
-            assert security.dea_jwt_cache.expiry == old_token_expiry
+            assert security.dea_token_manager.token == old_access_token
+            assert security.dea_token_manager.expiry == old_token_expiry
+
+    def test_retrieve_dea_auth0_jwt_refreshed_ahead(
+        self, requests_mock: Mocker, mocker: MockFixture
+    ) -> None:
+        # Arrange
+        old_token_expiry = datetime.now(tz=timezone.utc) + timedelta(minutes=5)
+        old_access_token = _encode_token(old_token_expiry)
+        security.dea_token_manager._entry = security._DeaToken(
+            old_access_token, old_token_expiry, datetime.now(tz=timezone.utc)
+        )
+        new_access_token = _encode_token(
+            datetime.now(tz=timezone.utc) + timedelta(hours=24)
+        )
+        mock_jwt = requests_mock.post(
+            "http://dea-auth0-token", json={"access_token": new_access_token}
+        )
+        # Run the background refresh straight away.
+        mocker.patch.object(
+            security.threading,
+            "Thread",
+            side_effect=lambda target, **kwargs: Mock(start=target),
+        )
+
+        # Act
+        result = security.get_dea_request_headers()
+
+        # Assert
+        # The current token is used while the new one is fetched.
+        assert result["authorization"] == f"Bearer {old_access_token}"
+        assert mock_jwt.call_count == 1
+        assert security.dea_token_manager.token == new_access_token
+
+    def test_retrieve_dea_auth0_jwt_refresh_failure(
+        self, requests_mock: Mocker, mocker: MockFixture
+    ) -> None:
+        # Arrange
+        old_token_expiry = datetime.now(tz=timezone.utc) + timedelta(minutes=5)
+        old_access_token = _encode_token(old_token_expiry)
+        security.dea_token_manager._entry = security._DeaToken(
+            old_access_token, old_token_expiry, datetime.now(tz=timezone.utc)
+        )
+        requests_mock.post("http://dea-auth0-token", status_code=500)
+        mocker.patch.object(
+            security.threading,
+            "Thread",
+            side_effect=lambda target, **kwargs: Mock(start=target),
+        )
+
+        # Act
+        result = security.get_dea_request_headers()
+
+        # Assert
+        assert result["authorization"] == f"Bearer {old_access_token}"
+        entry = security.dea_token_manager._entry
+        assert entry is not None and entry.refresh_at > datetime.now(tz=timezone.utc)
+
+    def test_retrieve_dea_auth0_jwt_concurrent(self, requests_mock: Mocker) -> None:
+        # Arrange
+        access_token = _encode_token(
+            datetime.now(tz=timezone.utc) + timedelta(hours=24)
+        )
+        mock_jwt = requests_mock.post(
+            "http://dea-auth0-token", json={"access_token": access_token}
+        )
+
+        # Act
+        with ThreadPoolExecutor(max_workers=8) as executor:
+            tokens = list(
+                executor.map(lambda _: security._retrieve_dea_auth0_jwt(), range(50))
+            )
+
+        # Assert
+        assert tokens == [access_token] * 50
+        assert mock_jwt.call_count == 1
+
+    def test_get_refresh_at_jittered(self) -> None:
+        expiry = datetime.now(tz=timezone.utc) + timedelta(hours=24)
+        refresh_times = {security._get_refresh_at(expiry) for _ in range(10)}
+        assert len(refresh_times) > 1
+        ahead = timedelta(seconds=config.DEA_AUTH0_REFRESH_AHEAD_SEC)
+        jitter = timedelta(seconds=config.DEA_AUTH0_REFRESH_JITTER_SEC)
+        for refresh_at in refresh_times:
+            assert expiry - ahead - jitter <= refresh_at <= expiry - ahead
+
+
+def _encode_token(expiry: datetime) -> str:
+    return jose_jwt.encode(
+        claims={
+            "iss": "http://localhost/",
+            "aud": "http://localhost/",
+            "exp": expiry,
+        },
+        key="some_key",
+        algorithm="HS512",
+    )
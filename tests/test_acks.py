@@ -0,0 +1,140 @@
+from typing import Any, List
+
+import pytest
+from mock import Mock
+from pytest_mock import MockFixture
+
+from dhos_async_adapter import acks
+from dhos_async_adapter.acks import AckCoalescer
+
+
+def _messages(channel: Any, count: int) -> List[Mock]:
+    return [Mock(channel=channel, delivery_tag=tag) for tag in range(1, count + 1)]
+
+
+class TestAckCoalescer:
+    @pytest.fixture
+    def mock_monotonic(self, mocker: MockFixture) -> Mock:
+        return mocker.patch.object(acks.time, "monotonic", return_value=100.0)
+
+    def test_disabled_acks_immediately(self) -> None:
+        coalescer = AckCoalescer(batch_size=1, max_delay_sec=1)
+        message = Mock()
+        coalescer.track(message)
+        coalescer.complete(message)
+        message.ack.assert_called_once_with()
+
+    def test_acks_batch_with_multiple(self, mock_monotonic: Mock) -> None:
+        coalescer = AckCoalescer(batch_size=3, max_delay_sec=1)
+        messages = _messages(Mock(), 3)
+        for message in messages:
+            coalescer.track(message)
+        for message in messages:
+            coalescer.complete(message)
+        assert messages[0].ack.call_count == 0
+        assert messages[1].ack.call_count == 0
+        messages[2].ack.assert_called_once_with(multiple=True)
+
+    def test_never_acks_past_unfinished(self, mock_monotonic: Mock) -> None:
+        coalescer = AckCoalescer(batch_size=2, max_delay_sec=1)
+        messages = _messages(Mock(), 4)
+        for message in messages:
+            coalescer.track(message)
+        coalescer.complete(messages[0])
+        coalescer.complete(messages[2])
+        coalescer.complete(messages[3])
+
+        # Enough messages have completed, but the second is still being processed.
+        assert messages[0].ack.call_count == 0
+        assert messages[2].ack.call_count == 0
+        assert messages[3].ack.call_count == 0
+
+        coalescer.complete(messages[1])
+        messages[3].ack.assert_called_once_with(multiple=True)
+        assert messages[0].ack.call_count == 0
+
+    def test_failed_message_is_released(self, mock_monotonic: Mock) -> None:
+        coalescer = AckCoalescer(batch_size=3, max_delay_sec=1)
+        messages = _messages(Mock(), 3)
+        for message in messages:
+            coalescer.track(message)
+        coalescer.complete(messages[0])
+        # The caller settles the failed message itself.
+        coalescer.release(messages[1])
+        coalescer.complete(messages[2])
+        mock_monotonic.return_value = 101.0
+        coalescer.flush_due()
+        assert messages[1].ack.call_count == 0
+        messages[2].ack.assert_called_once_with(multiple=True)
+
+    def test_never_acks_past_held(self, mock_monotonic: Mock) -> None:
+        coalescer = AckCoalescer(batch_size=2, max_delay_sec=1)
+        messages = _messages(Mock(), 3)
+        for message in messages:
+            coalescer.track(message)
+        # The first message is being settled by the caller, for example once a copy of it
+        # has been published.
+        coalescer.hold(messages[0])
+        coalescer.complete(messages[1])
+        coalescer.complete(messages[2])
+        mock_monotonic.return_value = 101.0
+        coalescer.flush_all()
+
+        # The others are acked individually, never with a multiple ack covering the first.
+        assert messages[0].ack.call_count == 0
+        messages[1].ack.assert_called_once_with()
+        messages[2].ack.assert_called_once_with()
+        coalescer.release(messages[0])
+        assert coalescer._pending == {}
+
+    def test_held_message_completed(self, mock_monotonic: Mock) -> None:
+        coalescer = AckCoalescer(batch_size=2, max_delay_sec=1)
+        messages = _messages(Mock(), 2)
+        for message in messages:
+            coalescer.track(message)
+        coalescer.hold(messages[0])
+        coalescer.complete(messages[1])
+        assert messages[1].ack.call_count == 0
+        coalescer.complete(messages[0])
+        messages[1].ack.assert_called_once_with(multiple=True)
+        assert messages[0].ack.call_count == 0
+
+    def test_flush_due(self, mock_monotonic: Mock) -> None:
+        coalescer = AckCoalescer(batch_size=10, max_delay_sec=1)
+        messages = _messages(Mock(), 3)
+        for message in messages:
+            coalescer.track(message)
+        coalescer.complete(messages[0])
+        coalescer.complete(messages[2])
+        coalescer.flush_due()
+        assert messages[0].ack.call_count == 0
+
+        # After the max delay, the prefix is acked and the straggler acked on its own.
+        mock_monotonic.return_value = 101.0
+        coalescer.flush_due()
+        messages[0].ack.assert_called_once_with(multiple=False)
+        assert messages[1].ack.call_count == 0
+        messages[2].ack.assert_called_once_with()
+
+    def test_flush_all_per_channel(self, mock_monotonic: Mock) -> None:
+        coalescer = AckCoalescer(batch_size=10, max_delay_sec=1)
+        channel_1_messages = _messages(Mock(), 2)
+        channel_2_messages = _messages(Mock(), 2)
+        for message in channel_1_messages + channel_2_messages:
+            coalescer.track(message)
+            coalescer.complete(message)
+        coalescer.flush_all()
+        channel_1_messages[1].ack.assert_called_once_with(multiple=True)
+        channel_2_messages[1].ack.assert_called_once_with(multiple=True)
+
+    def test_closed_channel(self, mock_monotonic: Mock) -> None:
+        coalescer = AckCoalescer(batch_size=10, max_delay_sec=1)
+        messages = _messages(Mock(), 2)
+        messages[1].ack.side_effect = ConnectionError()
+        for message in messages:
+            coalescer.track(message)
+            coalescer.complete(message)
+        coalescer.flush_all()
+        # The channel's messages are dropped, to be redelivered by the broker.
+        coalescer.flush_all()
+        assert messages[1].ack.call_count == 1
@@ -1,4 +1,5 @@
-from typing import Dict, Type
+import json
+from typing import Dict, Optional, Type
 
 import pytest
 
@@ -19,3 +20,49 @@ class TestActions:
     ) -> None:
         with pytest.raises(expected):
             actions.extract_action(body, action_name)
+
+    @pytest.mark.parametrize(
+        "body,expected",
+        [
+            (
+                {"actions": [{"name": "process_patient", "data": {"nhs_number": "1"}}]},
+                "1",
+            ),
+            (
+                {
+                    "actions": [
+                        {
+                            "name": "process_patient",
+                            "data": {"nhs_number": None, "mrn": "2"},
+                        }
+                    ]
+                },
+                "2",
+            ),
+            (
+                {
+                    "actions": [
+                        {
+                            "name": "process_patient",
+                            "data": {"nhs_number": "1", "mrn": "2"},
+                        }
+                    ]
+                },
+                "2",
+            ),
+            ({"actions": [{"name": "process_patient", "data": {}}]}, None),
+            ({"actions": [{"name": "other_action", "data": {"mrn": "2"}}]}, None),
+            ({}, None),
+        ],
+    )
+    def test_partition_key_from_action(
+        self, body: Dict, expected: Optional[str]
+    ) -> None:
+        extractor = actions.partition_key_from_action(
+            "process_patient", "mrn", "nhs_number"
+        )
+        assert extractor(json.dumps(body)) == expected
+
+    def test_partition_key_from_action_invalid_body(self) -> None:
+        extractor = actions.partition_key_from_action("process_patient", "mrn")
+        assert extractor("not json!") is None
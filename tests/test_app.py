@@ -1,4 +1,5 @@
-from typing import List
+import signal
+from typing import Dict, List
 
 import kombu_batteries_included
 import pytest
@@ -6,8 +7,10 @@ from kombu import Connection, Exchange, Queue
 from mock import Mock
 from pytest_mock import MockFixture
 
-from dhos_async_adapter import app
-from dhos_async_adapter.consumer import GenericConsumer
+from dhos_async_adapter import app, config
+from dhos_async_adapter.clients import warmup
+from dhos_async_adapter.consumer import ENGINE_ASYNCIO, GenericConsumer
+from dhos_async_adapter.helpers import retry
 from dhos_async_adapter.helpers.routing import ROUTES_TO_UNBIND, ROUTING_TABLE
 
 
@@ -15,6 +18,11 @@ from dhos_async_adapter.helpers.routing import ROUTES_TO_UNBIND, ROUTING_TABLE
     "mock_exchange_init", "mock_queue_init", "mock_connection_channel"
 )
 class TestApp:
+    @pytest.fixture(autouse=True)
+    def mock_warm_up(self, mocker: MockFixture) -> Mock:
+        mocker.patch.object(warmup, "install_dns_cache")
+        return mocker.patch.object(warmup, "warm_up", return_value={})
+
     def test_run(self, mocker: MockFixture) -> None:
         # Arrange
         mock_queues: List[Mock] = []
@@ -26,7 +34,9 @@ class TestApp:
         mock_init_task_queues: Mock = mocker.patch.object(
             app, "_init_task_queues", return_value=mock_queues
         )
+        mock_init_retry_queues: Mock = mocker.patch.object(app, "_init_retry_queues")
         mock_audit_consumer_run: Mock = mocker.patch.object(GenericConsumer, "run")
+        mock_signal: Mock = mocker.patch.object(signal, "signal")
 
         # Act
         app.run()
@@ -34,11 +44,96 @@ class TestApp:
         # Assert
         assert mock_init_kbi.call_count == 1
         assert mock_init_task_queues.call_count == 1
+        assert mock_init_retry_queues.call_count == 1
         assert mock_audit_consumer_run.call_count == 1
+        assert {c.args[0] for c in mock_signal.call_args_list} == {
+            signal.SIGTERM,
+            signal.SIGINT,
+        }
         for k, v in ROUTES_TO_UNBIND.items():
             mock_queue = next(m for m in mock_queues if m.name == k)
             assert mock_queue.unbind_from.call_count == len(v)
 
+    def test_run_asyncio(self, mocker: MockFixture) -> None:
+        # Arrange
+        mock_queues: List[Mock] = []
+        for queue_name in ROUTING_TABLE.keys():
+            mock_queue = Mock(spec=Queue)
+            mock_queue.name = queue_name
+            mock_queues.append(mock_queue)
+        mocker.patch.object(kombu_batteries_included, "init")
+        mocker.patch.object(app, "_init_task_queues", return_value=mock_queues)
+        mocker.patch.object(app, "_init_retry_queues")
+        mock_consumer_init: Mock = mocker.patch.object(
+            GenericConsumer, "__init__", return_value=None
+        )
+        mock_consumer_run: Mock = mocker.patch.object(GenericConsumer, "run")
+        mocker.patch.object(signal, "signal")
+
+        # Act
+        app.run_asyncio()
+
+        # Assert
+        assert mock_consumer_init.call_args.kwargs["engine"] == ENGINE_ASYNCIO
+        assert mock_consumer_run.call_count == 1
+
+    @pytest.mark.parametrize(
+        "results,keep_warm_interval,expected_alive",
+        [
+            ({"http://a": True, "http://b": False}, 60, True),
+            ({"http://a": False}, 60, False),
+            # Nothing would check again, so the process mustn't be reported dead.
+            ({"http://a": False}, 0, True),
+        ],
+    )
+    def test_run_warm_up_liveness(
+        self,
+        mocker: MockFixture,
+        mock_warm_up: Mock,
+        results: Dict[str, bool],
+        keep_warm_interval: float,
+        expected_alive: bool,
+    ) -> None:
+        # Arrange
+        mock_warm_up.return_value = results
+        mocker.patch.object(config, "KEEP_WARM_INTERVAL_SEC", keep_warm_interval)
+        mocker.patch.object(app.KeepWarm, "start")
+        mocker.patch.object(kombu_batteries_included, "init")
+        mocker.patch.object(app, "_init_task_queues", return_value=[])
+        mocker.patch.object(app, "_init_retry_queues")
+        mocker.patch.object(signal, "signal")
+        mock_set_alive = Mock()
+        mocker.patch.object(
+            GenericConsumer,
+            "run",
+            lambda consumer: consumer.set_alive(True),
+        )
+
+        # Act
+        app.run(queue_names=[], set_alive=mock_set_alive)
+
+        # Assert
+        assert mock_warm_up.call_count == 1
+        assert mock_set_alive.call_args.args[0] is expected_alive
+
+    def test_run_keep_warm(self, mocker: MockFixture) -> None:
+        # Arrange
+        mocker.patch.object(config, "KEEP_WARM_INTERVAL_SEC", 60)
+        mocker.patch.object(kombu_batteries_included, "init")
+        mocker.patch.object(app, "_init_task_queues", return_value=[])
+        mocker.patch.object(app, "_init_retry_queues")
+        mocker.patch.object(signal, "signal")
+        mocker.patch.object(GenericConsumer, "run")
+        mock_start: Mock = mocker.patch.object(app.KeepWarm, "start")
+        mock_stop: Mock = mocker.patch.object(app.KeepWarm, "stop")
+
+        # Act
+        app.run(queue_names=[])
+
+        # Assert
+        assert mock_start.call_count == 1
+        assert mock_stop.call_count == 1
+
     def test_run_connection_failure(self, mock_connection_channel: Mock) -> None:
         mock_connection_channel.side_effect = ConnectionRefusedError()
         with pytest.raises(ConnectionRefusedError):
@@ -48,3 +143,17 @@ class TestApp:
     def test_init_task_queues(self, mock_queue_init: Mock) -> None:
         app._init_task_queues(Connection(), Exchange())
         assert mock_queue_init.call_count == len(ROUTING_TABLE.keys())
+
+    def test_init_retry_queues(
+        self, mock_exchange_init: Mock, mock_queue_init: Mock, mocker: MockFixture
+    ) -> None:
+        mock_exchange_declare: Mock = mocker.patch.object(Exchange, "declare")
+        mock_queue_declare: Mock = mocker.patch.object(Queue, "declare")
+        app._init_retry_queues(Connection())
+        assert mock_exchange_declare.call_count == 1
+        assert mock_queue_declare.call_count == len(set(retry.get_retry_delays()))
+        first_queue_kwargs = mock_queue_init.call_args_list[0].kwargs
+        assert first_queue_kwargs["queue_arguments"] == {
+            "x-message-ttl": 5000,
+            "x-dead-letter-exchange": "dhos",
+        }
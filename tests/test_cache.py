@@ -0,0 +1,96 @@
+import asyncio
+from typing import Dict, Optional
+
+import pytest
+from mock import Mock
+from pytest_mock import MockFixture
+from requests_mock import Mocker
+
+from dhos_async_adapter.clients import cache, locations_api, users_api
+from dhos_async_adapter.clients.aio import locations_api as aio_locations_api
+from dhos_async_adapter.clients.cache import InMemoryCache
+
+
+class TestCache:
+    @pytest.fixture
+    def mock_monotonic(self, mocker: MockFixture) -> Mock:
+        return mocker.patch.object(cache.time, "monotonic", return_value=100.0)
+
+    def test_in_memory_cache_expiry(self, mock_monotonic: Mock) -> None:
+        backend = InMemoryCache(max_entries=10)
+        backend.set("key", {"a": 1}, ttl_sec=30)
+        assert backend.get("key") == (True, {"a": 1})
+        mock_monotonic.return_value = 130.0
+        assert backend.get("key") == (False, None)
+
+    def test_in_memory_cache_evicts_least_recently_used(self) -> None:
+        backend = InMemoryCache(max_entries=2)
+        backend.set("a", 1, ttl_sec=30)
+        backend.set("b", 2, ttl_sec=30)
+        backend.get("a")
+        backend.set("c", 3, ttl_sec=30)
+        assert backend.get("a") == (True, 1)
+        assert backend.get("b") == (False, None)
+        assert backend.get("c") == (True, 3)
+
+    def test_location_cached(self, requests_mock: Mocker) -> None:
+        mock_get: Mock = requests_mock.get(
+            "http://dhos-locations/dhos/v1/location/L1",
+            json={"uuid": "L1", "display_name": "Ward A"},
+        )
+        first: Dict = locations_api.get_location_by_uuid("L1")
+        # Callers modifying a result mustn't change the cached copy.
+        first["display_name"] = "Changed"
+        second: Dict = locations_api.get_location_by_uuid(location_uuid="L1")
+        assert second == {"uuid": "L1", "display_name": "Ward A"}
+        assert mock_get.call_count == 1
+        assert cache.get_cache_stats()["location_by_uuid"] == {"hits": 1, "misses": 1}
+
+    def test_location_cache_shared_with_aio(self, requests_mock: Mocker) -> None:
+        mock_get: Mock = requests_mock.get(
+            "http://dhos-locations/dhos/v1/location/L1", json={"uuid": "L1"}
+        )
+        locations_api.get_location_by_uuid("L1")
+        result: Dict = asyncio.run(aio_locations_api.get_location_by_uuid("L1"))
+        assert result == {"uuid": "L1"}
+        assert mock_get.call_count == 1
+
+    def test_clinician_not_found_cached(self, requests_mock: Mocker) -> None:
+        mock_get: Mock = requests_mock.get(
+            "http://dhos-users/dhos/v1/clinician/C1", status_code=404
+        )
+        first: Optional[Dict] = users_api.get_clinician_by_uuid("C1")
+        second: Optional[Dict] = users_api.get_clinician_by_uuid("C1")
+        assert first is None
+        assert second is None
+        assert mock_get.call_count == 1
+
+    def test_empty_search_not_cached(self, requests_mock: Mocker) -> None:
+        mock_get: Mock = requests_mock.get(
+            "http://dhos-locations/dhos/v1/location/search", json={}
+        )
+        locations_api.get_locations_by_ods_code("ODS1")
+        locations_api.get_locations_by_ods_code("ODS1")
+        assert mock_get.call_count == 2
+
+    def test_create_location_invalidates_search(self, requests_mock: Mocker) -> None:
+        mock_get: Mock = requests_mock.get(
+            "http://dhos-locations/dhos/v1/location/search",
+            json={"L1": {"uuid": "L1"}},
+        )
+        requests_mock.post(
+            "http://dhos-locations/dhos/v1/location", json={"uuid": "L2"}
+        )
+        locations_api.get_locations_by_ods_code("ODS1")
+        locations_api.create_location({"ods_code": "ODS1"})
+        locations_api.get_locations_by_ods_code("ODS1")
+        assert mock_get.call_count == 2
+
+    def test_cache_disabled(self, mocker: MockFixture, requests_mock: Mocker) -> None:
+        mocker.patch.object(cache.config, "CACHE_ENABLED", False)
+        mock_get: Mock = requests_mock.get(
+            "http://dhos-locations/dhos/v1/location/L1", json={"uuid": "L1"}
+        )
+        locations_api.get_location_by_uuid("L1")
+        locations_api.get_location_by_uuid("L1")
+        assert mock_get.call_count == 2
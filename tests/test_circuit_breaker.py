@@ -0,0 +1,80 @@
+import pytest
+from mock import Mock
+from pytest_mock import MockFixture
+
+from dhos_async_adapter.clients import circuit_breaker
+from dhos_async_adapter.clients.circuit_breaker import (
+    CLOSED,
+    HALF_OPEN,
+    OPEN,
+    CircuitBreaker,
+)
+
+
+class TestCircuitBreaker:
+    @pytest.fixture
+    def mock_monotonic(self, mocker: MockFixture) -> Mock:
+        return mocker.patch.object(
+            circuit_breaker.time, "monotonic", return_value=100.0
+        )
+
+    @pytest.fixture
+    def breaker(self, mock_monotonic: Mock) -> CircuitBreaker:
+        return CircuitBreaker(
+            name="http://dhos-services", failure_threshold=3, reset_timeout_sec=30
+        )
+
+    def test_opens_after_consecutive_failures(self, breaker: CircuitBreaker) -> None:
+        breaker.record_failure()
+        breaker.record_failure()
+        breaker.record_success()
+        breaker.record_failure()
+        breaker.record_failure()
+        assert breaker.state == CLOSED
+        assert breaker.allow_request() is True
+        breaker.record_failure()
+        assert breaker.state == OPEN
+        assert breaker.allow_request() is False
+
+    def test_half_open_trial(
+        self, breaker: CircuitBreaker, mock_monotonic: Mock
+    ) -> None:
+        for _ in range(3):
+            breaker.record_failure()
+        mock_monotonic.return_value = 130.0
+
+        # One trial request is let through.
+        assert breaker.allow_request() is True
+        assert breaker.state == HALF_OPEN
+        assert breaker.allow_request() is False
+
+        breaker.record_success()
+        assert breaker.state == CLOSED
+        assert breaker.allow_request() is True
+
+    def test_half_open_trial_fails(
+        self, breaker: CircuitBreaker, mock_monotonic: Mock
+    ) -> None:
+        for _ in range(3):
+            breaker.record_failure()
+        mock_monotonic.return_value = 130.0
+        assert breaker.allow_request() is True
+        breaker.record_failure()
+        assert breaker.state == OPEN
+        assert breaker.allow_request() is False
+
+    def test_disabled(self) -> None:
+        breaker = CircuitBreaker(name="x", failure_threshold=0, reset_timeout_sec=30)
+        for _ in range(10):
+            breaker.record_failure()
+        assert breaker.allow_request() is True
+
+    def test_get_circuit_states(self) -> None:
+        services = circuit_breaker.get_circuit_breaker("http://dhos-services")
+        circuit_breaker.get_circuit_breaker("http://dhos-encounters")
+        for _ in range(services.failure_threshold):
+            services.record_failure()
+        assert circuit_breaker.get_circuit_states() == {
+            "http://dhos-services": OPEN,
+            "http://dhos-encounters": CLOSED,
+        }
@@ -1,10 +1,20 @@
+import gzip
+import json
+import time
+import zlib
+from typing import Callable, Optional, Type
+
 import pytest
 import requests
 from mock import Mock
+from pytest_mock import MockFixture
 from requests_mock import Mocker
 
-from dhos_async_adapter import clients
+from dhos_async_adapter import clients, config
+from dhos_async_adapter.clients import circuit_breaker
+from dhos_async_adapter.helpers import deadline
 from dhos_async_adapter.helpers.exceptions import (
+    DeadlineExceededError,
     RejectMessageError,
     RequeueMessageError,
 )
@@ -25,6 +35,50 @@ class TestClients:
         assert mock_post.call_count == 1
         assert mock_post.last_request.json() == payload
 
+    @pytest.mark.parametrize(
+        "encoding,decompress", [("gzip", gzip.decompress), ("deflate", zlib.decompress)]
+    )
+    def test_encode_payload(
+        self, mocker: MockFixture, encoding: str, decompress: Callable
+    ) -> None:
+        mocker.patch.object(config, "HTTP_COMPRESSION_MIN_BYTES", 100)
+        payload = {"readings": ["x" * 10] * 20}
+        body, headers = clients.encode_payload(payload, encoding)
+        assert body is not None
+        assert json.loads(decompress(body)) == payload
+        assert headers == {
+            "Content-Type": "application/json",
+            "Content-Encoding": encoding,
+        }
+
+    def test_encode_payload_uncompressed(self, mocker: MockFixture) -> None:
+        mocker.patch.object(config, "HTTP_COMPRESSION_MIN_BYTES", 100)
+        json_headers = {"Content-Type": "application/json"}
+        assert clients.encode_payload({"small": "payload"}, "gzip") == (
+            b'{"small":"payload"}',
+            json_headers,
+        )
+        body, headers = clients.encode_payload({"x": "y" * 200}, None)
+        assert body is not None
+        assert json.loads(body) == {"x": "y" * 200}
+        assert headers == json_headers
+        assert clients.encode_payload(None, "gzip") == (None, {})
+
+    def test_do_request_compressed(
+        self, requests_mock: Mocker, mocker: MockFixture
+    ) -> None:
+        mocker.patch.object(config, "HTTP_COMPRESSION_MIN_BYTES", 100)
+        url = "http://some.url"
+        payload = {"readings": ["x" * 10] * 20}
+        mock_post: Mock = requests_mock.post(url, json={})
+
+        clients.do_request(url=url, method="post", payload=payload, encoding="gzip")
+
+        request = mock_post.last_request
+        assert request.headers["Content-Encoding"] == "gzip"
+        assert "gzip" in request.headers["Accept-Encoding"]
+        assert json.loads(gzip.decompress(request.body)) == payload
+
     def test_do_request_bad_response(self, requests_mock: Mocker) -> None:
         # Arrange
         url = "http://some.url"
@@ -68,3 +122,207 @@ class TestClients:
         # Assert
         assert mock_post.call_count == 1
         assert mock_post.last_request.json() == payload
+
+    def test_get_session_per_service(self) -> None:
+        session = clients.get_session("http://dhos-services/dhos/v1/patient")
+        assert session is clients.get_session("http://dhos-services/dhos/v2/patients")
+        assert session is not clients.get_session("http://dhos-encounters/dhos/v1")
+        adapter = session.get_adapter("http://dhos-services")
+        assert adapter._pool_maxsize == config.HTTP_POOL_MAXSIZE  # type: ignore
+
+    def test_get_session_recycled(self, mocker: MockFixture) -> None:
+        mock_monotonic: Mock = mocker.patch.object(
+            clients.time, "monotonic", return_value=100.0
+        )
+        session = clients.get_session("http://dhos-services/dhos/v1/patient")
+        mock_monotonic.return_value = 100.0 + config.HTTP_SESSION_MAX_AGE_SEC + 1
+        assert session is not clients.get_session("http://dhos-services/dhos/v1")
+
+    def test_do_request_reuses_session(
+        self, requests_mock: Mocker, mocker: MockFixture
+    ) -> None:
+        # Arrange
+        url = "http://some.url"
+        requests_mock.get(url, json={})
+        mock_create_session: Mock = mocker.patch.object(
+            clients, "_create_session", wraps=clients._create_session
+        )
+
+        # Act
+        clients.do_request(url=url, method="get", headers={})
+        clients.do_request(url=url, method="get", headers={})
+
+        # Assert
+        assert mock_create_session.call_count == 1
+        assert requests_mock.call_count == 2
+
+    def test_do_request_get_retried(
+        self, requests_mock: Mocker, mocker: MockFixture
+    ) -> None:
+        # Arrange
+        url = "http://some.url"
+        mock_sleep: Mock = mocker.patch.object(clients.time, "sleep")
+        mock_get: Mock = requests_mock.get(
+            url,
+            [
+                {"exc": requests.ConnectionError},
+                {"status_code": 503},
+                {"status_code": 200, "json": {"some": "response"}},
+            ],
+        )
+
+        # Act
+        response = clients.do_request(url=url, method="get", headers={})
+
+        # Assert
+        assert response.json() == {"some": "response"}
+        assert mock_get.call_count == 3
+        assert mock_sleep.call_count == 2
+
+    def test_do_request_timeout_limited_by_deadline(
+        self, requests_mock: Mocker
+    ) -> None:
+        # Arrange
+        url = "http://some.url"
+        mock_get: Mock = requests_mock.get(url, json={})
+        token = deadline.set_deadline(time.monotonic() + 5)
+
+        # Act
+        clients.do_request(url=url, method="get", headers={})
+        deadline.reset_deadline(token)
+
+        # Assert
+        assert 0 < mock_get.last_request.timeout <= 5
+
+    def test_do_request_deadline_exceeded(self, requests_mock: Mocker) -> None:
+        # Arrange
+        url = "http://some.url"
+        mock_get: Mock = requests_mock.get(url, json={})
+        token = deadline.set_deadline(time.monotonic() - 1)
+
+        # Act
+        with pytest.raises(DeadlineExceededError):
+            clients.do_request(url=url, method="get", headers={})
+        deadline.reset_deadline(token)
+
+        # Assert
+        assert mock_get.call_count == 0
+
+    @pytest.mark.parametrize(
+        "deadline_sec,expected_error,expected_failures",
+        [(5, DeadlineExceededError, 0), (None, RequeueMessageError, 1)],
+    )
+    def test_do_request_timeout_breaker(
+        self,
+        requests_mock: Mocker,
+        mocker: MockFixture,
+        deadline_sec: Optional[float],
+        expected_error: Type[Exception],
+        expected_failures: int,
+    ) -> None:
+        # Arrange
+        url = "http://some.url"
+        mock_record_failure: Mock = mocker.patch.object(
+            circuit_breaker.CircuitBreaker, "record_failure"
+        )
+        requests_mock.post(url, exc=requests.ReadTimeout)
+        token = deadline.set_deadline(
+            None if deadline_sec is None else time.monotonic() + deadline_sec
+        )
+
+        # Act
+        with pytest.raises(expected_error):
+            clients.do_request(url=url, method="post", headers={})
+        deadline.reset_deadline(token)
+
+        # Assert
+        # Timing out only because the deadline shortened the timeout isn't the service's
+        # fault.
+        assert mock_record_failure.call_count == expected_failures
+
+    def test_do_request_no_retry_past_deadline(
+        self, requests_mock: Mocker, mocker: MockFixture
+    ) -> None:
+        # Arrange
+        url = "http://some.url"
+        mock_sleep: Mock = mocker.patch.object(clients.time, "sleep")
+        mocker.patch.object(config, "HTTP_RETRY_BASE_DELAY_SEC", 1)
+        mock_get: Mock = requests_mock.get(url, status_code=503)
+        token = deadline.set_deadline(time.monotonic() + 0.5)
+
+        # Act
+        with pytest.raises(DeadlineExceededError):
+            clients.do_request(url=url, method="get", headers={})
+        deadline.reset_deadline(token)
+
+        # Assert
+        assert mock_get.call_count == 1
+        assert mock_sleep.call_count == 0
+
+    def test_do_request_get_retries_exhausted(
+        self, requests_mock: Mocker, mocker: MockFixture
+    ) -> None:
+        mocker.patch.object(clients.time, "sleep")
+        mock_get: Mock = requests_mock.get("http://some.url", status_code=503)
+        with pytest.raises(RequeueMessageError):
+            clients.do_request(url="http://some.url", method="get", headers={})
+        assert mock_get.call_count == config.HTTP_RETRY_MAX_ATTEMPTS
+
+    def test_do_request_post_idempotent(
+        self, requests_mock: Mocker, mocker: MockFixture
+    ) -> None:
+        mocker.patch.object(clients.time, "sleep")
+        mock_post: Mock = requests_mock.post(
+            "http://some.url", [{"status_code": 503}, {"status_code": 200}]
+        )
+        clients.do_request(
+            url="http://some.url", method="post", headers={}, idempotent=True
+        )
+        assert mock_post.call_count == 2
+
+    def test_do_request_retry_after_too_long(
+        self, requests_mock: Mocker, mocker: MockFixture
+    ) -> None:
+        mocker.patch.object(clients.time, "sleep")
+        mock_get: Mock = requests_mock.get(
+            "http://some.url", status_code=503, headers={"Retry-After": "3600"}
+        )
+        with pytest.raises(RequeueMessageError):
+            clients.do_request(url="http://some.url", method="get", headers={})
+        assert mock_get.call_count == 1
+
+    @pytest.mark.parametrize("previous_delay", [0.0, 0.5, 100.0])
+    def test_get_retry_delay(self, previous_delay: float) -> None:
+        delay = clients.get_retry_delay(1, 3, previous_delay)
+        assert delay is not None
+        assert config.HTTP_RETRY_BASE_DELAY_SEC <= delay
+        assert delay <= config.HTTP_RETRY_MAX_DELAY_SEC
+        assert delay <= max(config.HTTP_RETRY_BASE_DELAY_SEC, previous_delay * 3)
+
+    def test_get_retry_delay_retry_after(self) -> None:
+        assert clients.get_retry_delay(1, 3, 0.0, "2") == 2.0
+        assert clients.get_retry_delay(3, 3, 0.0, "2") is None
+        http_date = "Wed, 21 Oct 2015 07:28:00 GMT"
+        delay = clients.get_retry_delay(1, 3, 0.0, http_date)
+        assert delay is not None and delay <= config.HTTP_RETRY_MAX_DELAY_SEC
+
+    def test_do_request_circuit_open(
+        self, requests_mock: Mocker, mocker: MockFixture
+    ) -> None:
+        # Arrange
+        mocker.patch.object(clients.time, "sleep")
+        mocker.patch.object(config, "CIRCUIT_BREAKER_FAILURE_THRESHOLD", 2)
+        mock_post: Mock = requests_mock.post("http://some.url/a", status_code=503)
+        mock_get: Mock = requests_mock.get("http://other.url/b", json={})
+
+        # Act
+        for _ in range(3):
+            with pytest.raises(RequeueMessageError):
+                clients.do_request(url="http://some.url/a", method="post", headers={})
+
+        # Assert
+        assert mock_post.call_count == 2
+        assert circuit_breaker.get_circuit_states()["http://some.url"] == "open"
+        # Other services are unaffected.
+        clients.do_request(url="http://other.url/b", method="get", headers={})
+        assert mock_get.call_count == 1
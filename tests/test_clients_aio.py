@@ -0,0 +1,328 @@
+import asyncio
+import gzip
+import json
+import threading
+import time
+import zlib
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Awaitable, Callable, Dict, Generator, List, Optional, Tuple
+from urllib.parse import parse_qs, urlsplit
+
+import httpx
+import pytest
+from mock import AsyncMock, Mock
+from pytest_mock import MockFixture
+
+from dhos_async_adapter import clients, config
+from dhos_async_adapter.callbacks import generate_send_pdf
+from dhos_async_adapter.clients import (
+    aio,
+    circuit_breaker,
+    connector_api,
+    encounters_api,
+    locations_api,
+    observations_api,
+    pdf_api,
+    services_api,
+    users_api,
+)
+from dhos_async_adapter.clients.aio import connector_api as connector_api_aio
+from dhos_async_adapter.clients.aio import encounters_api as encounters_api_aio
+from dhos_async_adapter.clients.aio import locations_api as locations_api_aio
+from dhos_async_adapter.clients.aio import observations_api as observations_api_aio
+from dhos_async_adapter.clients.aio import pdf_api as pdf_api_aio
+from dhos_async_adapter.clients.aio import services_api as services_api_aio
+from dhos_async_adapter.clients.aio import users_api as users_api_aio
+from dhos_async_adapter.helpers import deadline
+from dhos_async_adapter.helpers.exceptions import (
+    DeadlineExceededError,
+    RejectMessageError,
+    RequeueMessageError,
+)
+
+
+class StubServer:
+    """A local HTTP server that records requests and replies with canned responses."""
+
+    def __init__(self) -> None:
+        self.requests: List[Dict[str, Any]] = []
+        # Responses by (method, path), defaulting to 200 with an empty object.
+        self.responses: Dict[Tuple[str, str], Tuple[int, Any]] = {}
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def _handle(self) -> None:
+                parts = urlsplit(self.path)
+                length: int = int(self.headers.get("Content-Length") or 0)
+                body: bytes = self.rfile.read(length)
+                encoding: Optional[str] = self.headers.get("Content-Encoding")
+                if encoding == "gzip":
+                    body = gzip.decompress(body)
+                elif encoding == "deflate":
+                    body = zlib.decompress(body)
+                stub.requests.append(
+                    {
+                        "method": self.command,
+                        "path": parts.path,
+                        "query": parse_qs(parts.query, keep_blank_values=True),
+                        "json": json.loads(body) if body else None,
+                        "authorization": self.headers.get("Authorization"),
+                        "content_encoding": encoding,
+                    }
+                )
+                status, response = stub.responses.get(
+                    (self.command, parts.path), (200, {})
+                )
+                content: bytes = json.dumps(response).encode("utf-8")
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(content)))
+                self.end_headers()
+                self.wfile.write(content)
+
+            do_GET = do_POST = do_PATCH = _handle
+
+            def log_message(self, *args: Any) -> None:
+                pass
+
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.url = f"http://127.0.0.1:{self._server.server_port}"
+        self._thread = threading.Thread(
+            target=self._server.serve_forever, args=(0.01,), daemon=True
+        )
+        self._thread.start()
+
+    def shutdown(self) -> None:
+        self._server.shutdown()
+        self._server.server_close()
+
+
+def _run_async(fn: Callable[..., Awaitable[Any]], *args: Any, **kwargs: Any) -> Any:
+    async def run() -> Any:
+        try:
+            return await fn(*args, **kwargs)
+        finally:
+            await aio.close_clients()
+
+    return asyncio.run(run())
+
+
+@pytest.mark.usefixtures("mock_get_request_headers")
+class TestClientsAio:
+    @pytest.fixture
+    def stub_server(self, mocker: MockFixture) -> Generator[StubServer, None, None]:
+        stub_server = StubServer()
+        for name in [
+            "DHOS_CONNECTOR_API_URL",
+            "DHOS_ENCOUNTERS_API_URL",
+            "DHOS_LOCATIONS_API_URL",
+            "DHOS_OBSERVATIONS_API_URL",
+            "DHOS_PDF_API_URL",
+            "DHOS_SERVICES_API_URL",
+            "DHOS_USERS_API_URL",
+        ]:
+            mocker.patch.object(config, name, stub_server.url)
+        yield stub_server
+        stub_server.shutdown()
+
+    @pytest.mark.parametrize(
+        "sync_fn,async_fn,kwargs",
+        [
+            (
+                encounters_api.get_encounter_by_uuid,
+                encounters_api_aio.get_encounter_by_uuid,
+                {"encounter_uuid": "e1", "show_deleted": True},
+            ),
+            (
+                encounters_api.get_epr_encounters,
+                encounters_api_aio.get_epr_encounters,
+                {"patient_uuid": "p1", "epr_encounter_id": "epr1"},
+            ),
+            (
+                encounters_api.update_encounter_by_uuid,
+                encounters_api_aio.update_encounter_by_uuid,
+                {"encounter_uuid": "e1", "encounter_data": {"a": 1}},
+            ),
+            (
+                encounters_api.merge_patient_encounters,
+                encounters_api_aio.merge_patient_encounters,
+                {
+                    "child_record_uuid": "r1",
+                    "parent_record_uuid": "r2",
+                    "parent_patient_uuid": "p1",
+                    "message_uuid": "m1",
+                },
+            ),
+            (
+                services_api.get_patient,
+                services_api_aio.get_patient,
+                {"patient_uuid": "p1", "product_name": None},
+            ),
+            (
+                services_api.get_patients_by_identifier,
+                services_api_aio.get_patients_by_identifier,
+                {
+                    "identifier": "mrn",
+                    "identifier_value": "123",
+                    "product_name": "SEND",
+                },
+            ),
+            (
+                services_api.create_patient,
+                services_api_aio.create_patient,
+                {"patient_details": {"first_name": "Jane"}},
+            ),
+            (
+                locations_api.get_locations,
+                locations_api_aio.get_locations,
+                {"location_types": None, "compact": False},
+            ),
+            (
+                users_api.get_clinicians_by_uuids,
+                users_api_aio.get_clinicians_by_uuids,
+                {"clinician_uuids": ["c1", "c2"], "compact": True},
+            ),
+            (
+                observations_api.get_observation_sets_for_encounter_ids,
+                observations_api_aio.get_observation_sets_for_encounter_ids,
+                {"encounter_uuids": ["e1", "e2"]},
+            ),
+            (
+                connector_api.patch_hl7_message,
+                connector_api_aio.patch_hl7_message,
+                {"message_uuid": "m1", "message_body": {"is_processed": True}},
+            ),
+            (
+                pdf_api.post_send_pdf,
+                pdf_api_aio.post_send_pdf,
+                {"message_body": {"encounter": {}}},
+            ),
+        ],
+    )
+    def test_parity(
+        self,
+        stub_server: StubServer,
+        sync_fn: Callable,
+        async_fn: Callable[..., Awaitable[Any]],
+        kwargs: Dict,
+    ) -> None:
+        sync_result: Any = sync_fn(**kwargs)
+        async_result: Any = _run_async(async_fn, **kwargs)
+        assert async_result == sync_result
+        assert len(stub_server.requests) == 2
+        assert stub_server.requests[1] == stub_server.requests[0]
+
+    def test_get_patient_not_found(self, stub_server: StubServer) -> None:
+        stub_server.responses[("GET", "/dhos/v1/patient/p1")] = (404, {})
+        assert _run_async(services_api_aio.get_patient, "p1", None) is None
+
+    @pytest.mark.parametrize(
+        "status,error", [(503, RequeueMessageError), (400, RejectMessageError)]
+    )
+    def test_do_request_http_error(
+        self, stub_server: StubServer, status: int, error: type
+    ) -> None:
+        stub_server.responses[("POST", "/some/path")] = (status, {})
+        with pytest.raises(error):
+            _run_async(
+                aio.do_request, url=f"{stub_server.url}/some/path", method="post"
+            )
+        with pytest.raises(error):
+            clients.do_request(url=f"{stub_server.url}/some/path", method="post")
+
+    def test_do_request_no_connection(self, stub_server: StubServer) -> None:
+        url: str = stub_server.url
+        stub_server.shutdown()
+        with pytest.raises(RequeueMessageError):
+            _run_async(aio.do_request, url=url, method="get")
+
+    def test_do_request_timeout_shortened_by_deadline(
+        self, mocker: MockFixture
+    ) -> None:
+        # Arrange
+        mock_client: Mock = mocker.patch.object(aio, "get_client").return_value
+        mock_client.request = AsyncMock(side_effect=httpx.ReadTimeout("timed out"))
+        mock_record_failure: Mock = mocker.patch.object(
+            circuit_breaker.CircuitBreaker, "record_failure"
+        )
+        token = deadline.set_deadline(time.monotonic() + 5)
+
+        # Act
+        with pytest.raises(DeadlineExceededError):
+            _run_async(aio.do_request, url="http://some.url", method="post")
+        deadline.reset_deadline(token)
+
+        # Assert
+        assert mock_record_failure.call_count == 0
+
+    def test_do_request_get_retried(
+        self, stub_server: StubServer, mocker: MockFixture
+    ) -> None:
+        mock_sleep: Mock = mocker.patch.object(aio.asyncio, "sleep", AsyncMock())
+        stub_server.responses[("GET", "/some/path")] = (503, {})
+        with pytest.raises(RequeueMessageError):
+            _run_async(aio.do_request, url=f"{stub_server.url}/some/path", method="get")
+        assert len(stub_server.requests) == config.HTTP_RETRY_MAX_ATTEMPTS
+        assert mock_sleep.call_count == config.HTTP_RETRY_MAX_ATTEMPTS - 1
+
+    def test_do_request_reuses_client(self, stub_server: StubServer) -> None:
+        async def request_twice() -> bool:
+            first = aio.get_client(stub_server.url)
+            await aio.do_request(url=stub_server.url, method="get")
+            await aio.do_request(url=f"{stub_server.url}/other", method="get")
+            return aio.get_client(stub_server.url) is first
+
+        assert _run_async(request_twice) is True
+
+    @pytest.mark.parametrize("encoding", ["gzip", "deflate"])
+    def test_post_send_pdf_compressed(
+        self, stub_server: StubServer, mocker: MockFixture, encoding: str
+    ) -> None:
+        mocker.patch.object(config, "SEND_PDF_REQUEST_ENCODING", encoding)
+        mocker.patch.object(config, "HTTP_COMPRESSION_MIN_BYTES", 100)
+        message_body: Dict = {"observation_sets": [{"score_value": 1}] * 100}
+        pdf_api.post_send_pdf(message_body)
+        _run_async(pdf_api_aio.post_send_pdf, message_body)
+        assert len(stub_server.requests) == 2
+        for request in stub_server.requests:
+            assert request["content_encoding"] == encoding
+            assert request["json"] == message_body
+
+    def test_generate_send_pdf_parity(self, stub_server: StubServer) -> None:
+        # Arrange
+        stub_server.responses.update(
+            {
+                ("GET", "/dhos/v1/encounter/e1"): (
+                    200,
+                    {
+                        "uuid": "e1",
+                        "patient_record_uuid": "r1",
+                        "location_uuid": "l1",
+                        "score_system_history": [{"created_by": "c1"}],
+                    },
+                ),
+                ("GET", "/dhos/v1/encounter/e1/children"): (200, ["e2"]),
+                ("GET", "/dhos/v1/location/l1"): (200, {"uuid": "l1"}),
+                ("GET", "/dhos/v2/observation_set"): (200, [{"created_by": "c2"}]),
+                ("POST", "/dhos/v1/clinician_list"): (
+                    200,
+                    {"c1": {"first_name": "Jane", "last_name": "Bloggs"}},
+                ),
+            }
+        )
+        body: str = json.dumps({"encounter_id": "e1"})
+
+        # Act
+        generate_send_pdf.process(body)
+        _run_async(generate_send_pdf.process_async, body)
+
+        # Assert
+        pdf_requests: List[Dict] = [
+            r for r in stub_server.requests if r["path"] == "/dhos/v1/send_pdf"
+        ]
+        assert len(pdf_requests) == 2
+        for request in pdf_requests:
+            del request["json"]["aggregation_time"]
+        assert pdf_requests[1] == pdf_requests[0]
+        # The location is cached, so is only requested once.
+        assert len(stub_server.requests) == 13
@@ -0,0 +1,114 @@
+import asyncio
+import threading
+
+import pytest
+
+from dhos_async_adapter.clients import concurrency_limiter
+from dhos_async_adapter.clients.concurrency_limiter import ConcurrencyLimiter
+from dhos_async_adapter.helpers.exceptions import RequeueMessageError
+
+
+def _limiter(initial_limit: int = 4) -> ConcurrencyLimiter:
+    return ConcurrencyLimiter(
+        name="http://dhos-locations",
+        initial_limit=initial_limit,
+        min_limit=1,
+        max_limit=10,
+        latency_tolerance=2.0,
+    )
+
+
+class TestConcurrencyLimiter:
+    def test_limits_in_flight(self) -> None:
+        limiter = _limiter(initial_limit=2)
+        assert limiter.try_acquire() is True
+        assert limiter.try_acquire() is True
+        assert limiter.try_acquire() is False
+        limiter.release(latency=0.1, succeeded=True)
+        assert limiter.try_acquire() is True
+
+    def test_grows_while_latency_flat(self) -> None:
+        limiter = _limiter(initial_limit=4)
+        for _ in range(20):
+            for _ in range(limiter.limit):
+                assert limiter.try_acquire()
+            for _ in range(limiter.in_flight):
+                limiter.release(latency=0.1, succeeded=True)
+        assert limiter.limit > 4
+        assert limiter.limit <= 10
+
+    def test_does_not_grow_unused(self) -> None:
+        limiter = _limiter(initial_limit=4)
+        for _ in range(20):
+            limiter.try_acquire()
+            limiter.release(latency=0.1, succeeded=True)
+        assert limiter.limit == 4
+
+    @pytest.mark.parametrize(
+        "latency,succeeded", [(0.1, False), (1.0, True)], ids=["error", "slow"]
+    )
+    def test_backs_off(self, latency: float, succeeded: bool) -> None:
+        limiter = _limiter(initial_limit=8)
+        limiter.try_acquire()
+        limiter.release(latency=0.1, succeeded=True)
+        for _ in range(5):
+            limiter.try_acquire()
+            limiter.release(latency=latency, succeeded=succeeded)
+        assert limiter.limit < 8
+        for _ in range(50):
+            limiter.try_acquire()
+            limiter.release(latency=latency, succeeded=succeeded)
+        assert limiter.limit == 1
+
+    def test_acquire_records_outcome(self) -> None:
+        limiter = _limiter(initial_limit=8)
+        with pytest.raises(ValueError):
+            with limiter.acquire(timeout=1):
+                assert limiter.in_flight == 1
+                raise ValueError()
+        assert limiter.in_flight == 0
+        assert limiter.limit == 7
+
+    def test_acquire_waits_for_slot(self) -> None:
+        limiter = _limiter(initial_limit=1)
+        assert limiter.try_acquire()
+        threading.Timer(0.05, limiter.release, args=(0.1, True)).start()
+        with limiter.acquire(timeout=5) as permit:
+            permit.succeeded = True
+        assert limiter.in_flight == 0
+
+    def test_acquire_timeout(self) -> None:
+        limiter = _limiter(initial_limit=1)
+        assert limiter.try_acquire()
+        with pytest.raises(RequeueMessageError):
+            with limiter.acquire(timeout=0.01):
+                pass
+
+    def test_acquire_async(self) -> None:
+        limiter = ConcurrencyLimiter(
+            name="http://dhos-locations",
+            initial_limit=1,
+            min_limit=1,
+            max_limit=1,
+            latency_tolerance=2.0,
+        )
+
+        async def request(results: list) -> None:
+            async with limiter.acquire_async(timeout=5) as permit:
+                results.append(limiter.in_flight)
+                await asyncio.sleep(0.01)
+                permit.succeeded = True
+
+        async def run() -> list:
+            results: list = []
+            await asyncio.gather(*[request(results) for _ in range(3)])
+            return results
+
+        assert asyncio.run(run()) == [1, 1, 1]
+        assert limiter.in_flight == 0
+
+    def test_get_concurrency_limits(self) -> None:
+        concurrency_limiter.get_concurrency_limiter("http://dhos-locations")
+        assert concurrency_limiter.get_concurrency_limits() == {
+            "http://dhos-locations": 10
+        }
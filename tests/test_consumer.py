@@ -1,20 +1,30 @@
+import asyncio
 import json
+import signal
+import threading
+import time
 import uuid
+from concurrent.futures import ThreadPoolExecutor
 from contextvars import Token
 from pathlib import Path
-from typing import Generator
+from typing import Dict, Generator, List, Optional
 
 import pytest
-from kombu import Connection, Message
-from mock import MagicMock, Mock
+from kombu import Connection, Message, Queue
+from mock import AsyncMock, MagicMock, Mock
 from pytest_mock import MockFixture
 
-from dhos_async_adapter import consumer
-from dhos_async_adapter.consumer import GenericConsumer
+from dhos_async_adapter import config, consumer
+from dhos_async_adapter.consumer import ENGINE_ASYNCIO, GenericConsumer
+from dhos_async_adapter.executors import PartitionedExecutor
+from dhos_async_adapter.helpers import deadline, publishing
 from dhos_async_adapter.helpers.exceptions import (
+    DeadlineExceededError,
     RejectMessageError,
     RequeueMessageError,
 )
+from dhos_async_adapter.helpers.publishing import OutgoingMessage
+from dhos_async_adapter.helpers.routing import QUEUE_QOS
 
 
 @pytest.mark.usefixtures("mock_get_request_headers")
@@ -45,6 +55,7 @@ class TestAudit:
             __name__="mock_callback", side_effect=RequeueMessageError
         )
         mocker.patch.dict(consumer.CALLBACK_LOOKUP, {routing_key: mock_callback})
+        mocker.patch.object(config, "RETRY_MAX_ATTEMPTS", 0)
         message_body = {"key": "value"}
         generic_consumer = GenericConsumer(Connection(), [])
         message: Message = Message(
@@ -59,6 +70,181 @@ class TestAudit:
         assert mock_callback.call_count == 1
         assert mock_requeue.call_count == 1
 
+    @pytest.mark.parametrize("attempt,expected_delay", [(None, 5), (2, 20), (4, 80)])
+    def test_on_message_requeue_later(
+        self, mocker: MockFixture, attempt: Optional[int], expected_delay: int
+    ) -> None:
+        # Arrange
+        routing_key = "dhos.34837004"
+        correlation_id = str(uuid.uuid4())
+        mock_callback = MagicMock(
+            __name__="mock_callback", side_effect=RequeueMessageError
+        )
+        mocker.patch.dict(consumer.CALLBACK_LOOKUP, {routing_key: mock_callback})
+        mocker.patch.object(config, "PUBLISHER_CONFIRMS_ENABLED", False)
+        mock_producer: Mock = mocker.patch.object(consumer, "Producer")
+        generic_consumer = GenericConsumer(Connection(), [])
+        headers: Dict = {"compression": "application/x-bz2"}
+        if attempt is not None:
+            headers["x-retry-attempt"] = attempt
+        message: Message = Message(
+            body=b"some body",
+            delivery_info={"routing_key": routing_key},
+            properties={"correlation_id": correlation_id},
+            headers=headers,
+            content_type="application/text",
+        )
+        mock_ack: Mock = mocker.patch.object(message, "ack")
+        mock_requeue: Mock = mocker.patch.object(message, "requeue")
+
+        # Act
+        generic_consumer.on_message(message.body, message)
+
+        # Assert
+        assert mock_requeue.call_count == 0
+        assert mock_ack.call_count == 1
+        mock_publish: Mock = mock_producer.return_value.publish
+        assert mock_publish.call_count == 1
+        publish_kwargs: Dict = mock_publish.call_args.kwargs
+        assert publish_kwargs["body"] == b"some body"
+        assert publish_kwargs["exchange"] == "dhos-retry-delay"
+        assert publish_kwargs["routing_key"] == routing_key
+        assert publish_kwargs["correlation_id"] == correlation_id
+        assert publish_kwargs["headers"] == {
+            "x-retry-attempt": (attempt or 0) + 1,
+            "x-retry-delay-sec": expected_delay,
+        }
+        assert publish_kwargs["mandatory"] is True
+
+    @pytest.mark.parametrize("confirmed", [True, False])
+    def test_on_message_requeue_later_confirms(
+        self, mocker: MockFixture, confirmed: bool
+    ) -> None:
+        # Arrange
+        routing_key = "dhos.34837004"
+        mock_callback = MagicMock(
+            __name__="mock_callback", side_effect=RequeueMessageError
+        )
+        mocker.patch.dict(consumer.CALLBACK_LOOKUP, {routing_key: mock_callback})
+        mock_publisher: Mock = mocker.patch.object(
+            consumer, "ConfirmingPublisher"
+        ).return_value
+        mock_publisher.is_open = True
+        message: Message = Message(
+            body=b"some body", delivery_info={"routing_key": routing_key}
+        )
+        mock_ack: Mock = mocker.patch.object(message, "ack")
+        mock_reject: Mock = mocker.patch.object(message, "reject")
+        generic_consumer = GenericConsumer(Connection(), [])
+
+        # Act
+        generic_consumer.on_message(message.body, message)
+
+        # Assert
+        assert mock_publisher.republish.call_count == 1
+        republish_kwargs: Dict = mock_publisher.republish.call_args.kwargs
+        assert republish_kwargs["exchange"] == "dhos-retry-delay"
+        assert republish_kwargs["headers"] == {
+            "x-retry-attempt": 1,
+            "x-retry-delay-sec": 5,
+        }
+        assert mock_ack.call_count == 0
+        assert generic_consumer._in_flight == 1
+        republish_kwargs["on_confirmed" if confirmed else "on_failed"]()
+        assert mock_ack.call_count == (1 if confirmed else 0)
+        assert mock_reject.call_count == (0 if confirmed else 1)
+        assert generic_consumer._in_flight == 0
+
+    def test_on_message_requeue_later_batched_acks(self, mocker: MockFixture) -> None:
+        # Arrange
+        routing_key = "dhos.34837004"
+
+        def callback(body: bytes) -> None:
+            if body == b"retry":
+                raise RequeueMessageError()
+
+        mocker.patch.dict(consumer.CALLBACK_LOOKUP, {routing_key: callback})
+        mocker.patch.object(config, "ACK_BATCH_SIZE", 2)
+        mocker.patch.object(config, "ACK_BATCH_MAX_DELAY_SEC", 60)
+        mock_publisher: Mock = mocker.patch.object(
+            consumer, "ConfirmingPublisher"
+        ).return_value
+        mock_publisher.is_open = True
+        mock_channel = Mock()
+        messages: List[Message] = [
+            Message(
+                body=body,
+                delivery_tag=tag,
+                channel=mock_channel,
+                delivery_info={"routing_key": routing_key},
+            )
+            for tag, body in [(1, b"retry"), (2, b"{}"), (3, b"{}")]
+        ]
+        generic_consumer = GenericConsumer(Connection(), [])
+
+        # Act
+        for message in messages:
+            generic_consumer.on_message(message.body, message)
+        generic_consumer._acks.flush_due()
+
+        # Assert
+        # Nothing is acked while the first message's copy awaits confirmation, as a
+        # multiple ack would cover it.
+        assert mock_channel.basic_ack.call_count == 0
+        mock_publisher.republish.call_args.kwargs["on_confirmed"]()
+        mock_channel.basic_ack.assert_called_once_with(3, multiple=True)
+        assert generic_consumer._in_flight == 0
+
+    def test_on_message_requeue_later_publisher_closed(
+        self, mocker: MockFixture
+    ) -> None:
+        # Arrange
+        routing_key = "dhos.34837004"
+        mock_callback = MagicMock(
+            __name__="mock_callback", side_effect=RequeueMessageError
+        )
+        mocker.patch.dict(consumer.CALLBACK_LOOKUP, {routing_key: mock_callback})
+        mock_publisher: Mock = mocker.patch.object(
+            consumer, "ConfirmingPublisher"
+        ).return_value
+        mock_publisher.is_open = False
+        message: Message = Message(
+            body=b"some body", delivery_info={"routing_key": routing_key}
+        )
+        mock_requeue: Mock = mocker.patch.object(message, "requeue")
+        generic_consumer = GenericConsumer(Connection(), [])
+
+        # Act
+        generic_consumer.on_message(message.body, message)
+
+        # Assert
+        assert mock_publisher.republish.call_count == 0
+        assert mock_requeue.call_count == 1
+        assert generic_consumer._in_flight == 0
+
+    def test_on_message_requeue_attempts_exhausted(self, mocker: MockFixture) -> None:
+        # Arrange
+        routing_key = "dhos.34837004"
+        mock_callback = MagicMock(
+            __name__="mock_callback", side_effect=RequeueMessageError
+        )
+        mocker.patch.dict(consumer.CALLBACK_LOOKUP, {routing_key: mock_callback})
+        mock_producer: Mock = mocker.patch.object(consumer, "Producer")
+        generic_consumer = GenericConsumer(Connection(), [])
+        message: Message = Message(
+            body=b"some body",
+            delivery_info={"routing_key": routing_key},
+            headers={"x-retry-attempt": 6},
+        )
+        mock_reject: Mock = mocker.patch.object(message, "reject")
+
+        # Act
+        generic_consumer.on_message(message.body, message)
+
+        # Assert
+        assert mock_reject.call_count == 1
+        assert mock_producer.return_value.publish.call_count == 0
+
     def test_on_message_reject(self, mocker: MockFixture) -> None:
         # Arrange
         routing_key = "dhos.34837004"
@@ -145,6 +331,179 @@ class TestAudit:
         assert mock_reset_request_id.call_count == 1
         mock_reset_request_id.assert_called_with(mock_token)
 
+    def test_on_message_worker_pool(self, mocker: MockFixture) -> None:
+        # Arrange
+        routing_key = "dhos.34837004"
+        mock_callback = MagicMock(__name__="mock_callback")
+        mocker.patch.dict(consumer.CALLBACK_LOOKUP, {routing_key: mock_callback})
+        message_body = {"key": "value"}
+        message: Message = Message(
+            body=message_body, delivery_info={"routing_key": routing_key}
+        )
+        mock_ack: Mock = mocker.patch.object(Message, "ack")
+        generic_consumer = GenericConsumer(
+            Connection(), [Queue("dhos-audit-adapter-task-queue")], worker_count=4
+        )
+        executor = generic_consumer._executors["dhos-audit-adapter-task-queue"]
+
+        # Act
+        generic_consumer.on_message(json.dumps(message_body), message)
+        executor.shutdown(wait=True)
+
+        # Assert
+        assert mock_callback.call_count == 1
+        assert mock_ack.call_count == 0
+        generic_consumer.on_iteration()
+        assert mock_ack.call_count == 1
+
+    def test_on_message_worker_pool_reject(self, mocker: MockFixture) -> None:
+        # Arrange
+        routing_key = "dhos.34837004"
+        mock_callback = MagicMock(
+            __name__="mock_callback", side_effect=RejectMessageError
+        )
+        mocker.patch.dict(consumer.CALLBACK_LOOKUP, {routing_key: mock_callback})
+        message_body = {"key": "value"}
+        generic_consumer = GenericConsumer(
+            Connection(), [Queue("dhos-audit-adapter-task-queue")], worker_count=4
+        )
+        executor = generic_consumer._executors["dhos-audit-adapter-task-queue"]
+        message: Message = Message(
+            body=message_body, delivery_info={"routing_key": routing_key}
+        )
+        mock_reject: Mock = mocker.patch.object(message, "reject")
+
+        # Act
+        generic_consumer.on_message(json.dumps(message_body), message)
+        executor.shutdown(wait=True)
+        generic_consumer.settle_pending()
+
+        # Assert
+        assert mock_reject.call_count == 1
+
+    def test_get_consumers_qos(self, mocker: MockFixture) -> None:
+        # Arrange
+        mock_consumer: Mock = mocker.patch.object(consumer, "Consumer")
+        mock_channel = Mock()
+        queues = [
+            Queue("dhos-audit-adapter-task-queue"),
+            Queue("dhos-aggregator-adapter-task-queue"),
+            Queue("dhos-services-adapter-task-queue"),
+        ]
+        mocker.patch.object(config, "PUBLISHER_CONFIRMS_ENABLED", False)
+        generic_consumer = GenericConsumer(Connection(), queues, worker_count=4)
+
+        # Act
+        consumers = generic_consumer.get_consumers(Mock(), mock_channel)
+
+        # Assert
+        assert len(consumers) == 3
+        assert mock_channel.connection.client.channel.call_count == 2
+        prefetch_counts = [
+            c.kwargs["prefetch_count"] for c in mock_consumer.call_args_list
+        ]
+        assert prefetch_counts == [
+            QUEUE_QOS["dhos-audit-adapter-task-queue"].prefetch_count,
+            QUEUE_QOS["dhos-aggregator-adapter-task-queue"].prefetch_count,
+            10,
+        ]
+        services_executor = generic_consumer._executors[
+            "dhos-services-adapter-task-queue"
+        ]
+        assert isinstance(services_executor, PartitionedExecutor)
+        assert services_executor.lanes == 4
+        audit_executor = generic_consumer._executors["dhos-audit-adapter-task-queue"]
+        assert isinstance(audit_executor, ThreadPoolExecutor)
+        assert (
+            audit_executor._max_workers
+            == QUEUE_QOS["dhos-audit-adapter-task-queue"].concurrency
+        )
+
+    def test_on_message_partitioned(self, mocker: MockFixture) -> None:
+        # Arrange
+        routing_key = "dhos.24891000000101"
+        mock_callback = MagicMock(__name__="mock_callback")
+        mocker.patch.dict(consumer.CALLBACK_LOOKUP, {routing_key: mock_callback})
+        message_body = {
+            "dhos_connector_message_uuid": str(uuid.uuid4()),
+            "actions": [{"name": "process_patient", "data": {"mrn": "123"}}],
+        }
+        message: Message = Message(
+            body=message_body, delivery_info={"routing_key": routing_key}
+        )
+        generic_consumer = GenericConsumer(
+            Connection(), [Queue("dhos-services-adapter-task-queue")], worker_count=4
+        )
+        executor = generic_consumer._executors["dhos-services-adapter-task-queue"]
+        mock_submit: Mock = mocker.patch.object(executor, "submit")
+
+        # Act
+        generic_consumer.on_message(json.dumps(message_body), message)
+
+        # Assert
+        assert mock_submit.call_count == 1
+        assert mock_submit.call_args.args[0] == "123"
+
+    def test_on_message_asyncio_sync_callback(self, mocker: MockFixture) -> None:
+        # Arrange
+        routing_key = "dhos.34837004"
+        correlation_id = str(uuid.uuid4())
+        request_ids: List[Optional[str]] = []
+        mock_callback = MagicMock(
+            __name__="mock_callback",
+            side_effect=lambda body: request_ids.append(consumer.current_request_id()),
+        )
+        mocker.patch.dict(consumer.CALLBACK_LOOKUP, {routing_key: mock_callback})
+        message_body = {"key": "value"}
+        message: Message = Message(
+            body=message_body,
+            delivery_info={"routing_key": routing_key},
+            properties={"correlation_id": correlation_id},
+        )
+        mock_ack: Mock = mocker.patch.object(Message, "ack")
+        generic_consumer = GenericConsumer(Connection(), [], engine=ENGINE_ASYNCIO)
+        assert generic_consumer._asyncio is not None
+
+        # Act
+        generic_consumer.on_message(json.dumps(message_body), message)
+        future = generic_consumer._asyncio.submit(None, asyncio.sleep, 0)
+        future.result(timeout=5)
+        _wait_for_settlement(generic_consumer)
+
+        # Assert
+        assert mock_callback.call_count == 1
+        assert request_ids == [correlation_id]
+        assert mock_ack.call_count == 1
+        generic_consumer._asyncio.shutdown()
+
+    def test_on_message_asyncio_async_callback(self, mocker: MockFixture) -> None:
+        # Arrange
+        routing_key = "dhos.34837004"
+        mock_callback = MagicMock(__name__="mock_callback")
+        mock_async_callback = AsyncMock(side_effect=RequeueMessageError)
+        mocker.patch.dict(consumer.CALLBACK_LOOKUP, {routing_key: mock_callback})
+        mocker.patch.dict(
+            consumer.ASYNC_CALLBACK_LOOKUP, {routing_key: mock_async_callback}
+        )
+        message_body = {"key": "value"}
+        message: Message = Message(
+            body=message_body, delivery_info={"routing_key": routing_key}
+        )
+        mock_requeue: Mock = mocker.patch.object(message, "requeue")
+        mocker.patch.object(config, "RETRY_MAX_ATTEMPTS", 0)
+        generic_consumer = GenericConsumer(Connection(), [], engine=ENGINE_ASYNCIO)
+        assert generic_consumer._asyncio is not None
+
+        # Act
+        generic_consumer.on_message(json.dumps(message_body), message)
+        _wait_for_settlement(generic_consumer)
+
+        # Assert
+        assert mock_callback.call_count == 0
+        assert mock_async_callback.await_count == 1
+        assert mock_requeue.call_count == 1
+        generic_consumer._asyncio.shutdown()
+
     @pytest.fixture
     def alive_file(self) -> Generator[Path, None, None]:
         """Fixture for the liveness file. Will restore the pre-test state afterwards."""
@@ -168,3 +527,267 @@ class TestAudit:
         assert alive_file.exists()
         generic_consumer.on_connection_error(Exception, 1)
         assert not alive_file.exists()
+
+    def test_on_connection_revived_set_alive(self) -> None:
+        mock_set_alive = Mock()
+        generic_consumer = GenericConsumer(Connection(), [], set_alive=mock_set_alive)
+        generic_consumer.on_connection_revived()
+        mock_set_alive.assert_called_once_with(True)
+
+    def test_on_message_batched_acks(self, mocker: MockFixture) -> None:
+        # Arrange
+        routing_key = "dhos.34837004"
+        mock_callback = MagicMock(__name__="mock_callback")
+        mocker.patch.dict(consumer.CALLBACK_LOOKUP, {routing_key: mock_callback})
+        mocker.patch.object(config, "ACK_BATCH_SIZE", 10)
+        mock_channel = Mock()
+        messages: List[Message] = [
+            Message(
+                body=b"{}",
+                delivery_tag=tag,
+                channel=mock_channel,
+                delivery_info={"routing_key": routing_key},
+            )
+            for tag in range(1, 4)
+        ]
+        generic_consumer = GenericConsumer(Connection(), [])
+
+        # Act
+        for message in messages:
+            generic_consumer.on_message(message.body, message)
+        assert mock_channel.basic_ack.call_count == 0
+        generic_consumer.on_consume_end(Mock(), Mock())
+
+        # Assert
+        mock_channel.basic_ack.assert_called_once_with(3, multiple=True)
+
+    def test_handle_stop_signal(self) -> None:
+        generic_consumer = GenericConsumer(Connection(), [])
+        generic_consumer.handle_stop_signal(signal.SIGTERM, None)
+        assert generic_consumer.should_stop is True
+
+    def test_on_consume_end_drains_in_flight(self, mocker: MockFixture) -> None:
+        # Arrange
+        routing_key = "dhos.34837004"
+        mock_callback = MagicMock(
+            __name__="mock_callback", side_effect=lambda body: time.sleep(0.2)
+        )
+        mocker.patch.dict(consumer.CALLBACK_LOOKUP, {routing_key: mock_callback})
+        message: Message = Message(
+            body=b"{}", delivery_info={"routing_key": routing_key}
+        )
+        mock_ack: Mock = mocker.patch.object(message, "ack")
+        generic_consumer = GenericConsumer(
+            Connection(), [Queue("dhos-audit-adapter-task-queue")], worker_count=4
+        )
+        generic_consumer.on_message(message.body, message)
+
+        # Act
+        generic_consumer.on_consume_end(Mock(), Mock())
+
+        # Assert
+        assert mock_ack.call_count == 1
+        assert generic_consumer._in_flight == 0
+
+    def test_on_consume_end_cancels_queued(self, mocker: MockFixture) -> None:
+        # Arrange
+        routing_key = "dhos.DM000007"
+        mocker.patch.object(config, "CONSUMER_SHUTDOWN_DEADLINE_SEC", 0.3)
+        mock_callback = MagicMock(
+            __name__="mock_callback", side_effect=lambda body: time.sleep(0.2)
+        )
+        mocker.patch.dict(consumer.CALLBACK_LOOKUP, {routing_key: mock_callback})
+        messages: List[Message] = [
+            Message(body=b"{}", delivery_info={"routing_key": routing_key})
+            for _ in range(5)
+        ]
+        mock_ack: Mock = mocker.patch.object(Message, "ack")
+        generic_consumer = GenericConsumer(
+            Connection(), [Queue("dhos-aggregator-adapter-task-queue")], worker_count=4
+        )
+        for message in messages:
+            generic_consumer.on_message(message.body, message)
+
+        # Act
+        generic_consumer.on_consume_end(Mock(), Mock())
+        executor = generic_consumer._executors["dhos-aggregator-adapter-task-queue"]
+        executor.shutdown(wait=True)
+
+        # Assert: the queue has one worker, so only the message it had started when the
+        # deadline passed is finished (unacked), and the rest are never started.
+        assert mock_callback.call_count == 2
+        assert mock_ack.call_count == 1
+
+    def test_drain_deadline(self, mocker: MockFixture) -> None:
+        # Arrange
+        routing_key = "dhos.34837004"
+        finish = threading.Event()
+        mock_callback = MagicMock(
+            __name__="mock_callback", side_effect=lambda body: finish.wait(5)
+        )
+        mocker.patch.dict(consumer.CALLBACK_LOOKUP, {routing_key: mock_callback})
+        message: Message = Message(
+            body=b"{}", delivery_info={"routing_key": routing_key}
+        )
+        mock_ack: Mock = mocker.patch.object(message, "ack")
+        generic_consumer = GenericConsumer(
+            Connection(), [Queue("dhos-audit-adapter-task-queue")], worker_count=4
+        )
+        generic_consumer.on_message(message.body, message)
+
+        # Act
+        generic_consumer.drain(timeout=0.1)
+
+        # Assert
+        assert mock_ack.call_count == 0
+        assert generic_consumer._in_flight == 1
+        finish.set()
+
+    def test_on_message_publishes_then_acks(self, mocker: MockFixture) -> None:
+        # Arrange
+        routing_key = "dhos.34837004"
+
+        def callback(body: bytes) -> None:
+            publishing.publish_message(routing_key="dhos.DM000005", body={})
+
+        mocker.patch.dict(consumer.CALLBACK_LOOKUP, {routing_key: callback})
+        mock_publisher: Mock = mocker.patch.object(
+            consumer, "ConfirmingPublisher"
+        ).return_value
+        mock_publisher.is_open = True
+        message: Message = Message(
+            body=b"{}", delivery_info={"routing_key": routing_key}
+        )
+        mock_ack: Mock = mocker.patch.object(message, "ack")
+        generic_consumer = GenericConsumer(Connection(), [])
+
+        # Act
+        generic_consumer.on_message(message.body, message)
+
+        # Assert
+        assert mock_ack.call_count == 0
+        assert mock_publisher.publish.call_count == 1
+        outgoing: List[OutgoingMessage] = mock_publisher.publish.call_args.args[0]
+        assert [m.routing_key for m in outgoing] == ["dhos.DM000005"]
+        mock_publisher.publish.call_args.kwargs["on_confirmed"]()
+        assert mock_ack.call_count == 1
+        assert generic_consumer._in_flight == 0
+
+    def test_on_message_publish_failed(self, mocker: MockFixture) -> None:
+        # Arrange
+        routing_key = "dhos.34837004"
+
+        def callback(body: bytes) -> None:
+            publishing.publish_message(routing_key="dhos.DM000005", body={})
+
+        mocker.patch.dict(consumer.CALLBACK_LOOKUP, {routing_key: callback})
+        mocker.patch.object(config, "RETRY_MAX_ATTEMPTS", 0)
+        mock_publisher: Mock = mocker.patch.object(
+            consumer, "ConfirmingPublisher"
+        ).return_value
+        mock_publisher.is_open = True
+        message: Message = Message(
+            body=b"{}", delivery_info={"routing_key": routing_key}
+        )
+        mock_requeue: Mock = mocker.patch.object(message, "requeue")
+
+        # Act
+        generic_consumer = GenericConsumer(Connection(), [])
+        generic_consumer.on_message(message.body, message)
+        mock_publisher.publish.call_args.kwargs["on_failed"]()
+
+        # Assert
+        assert mock_requeue.call_count == 1
+
+    def test_on_message_publisher_closed(self, mocker: MockFixture) -> None:
+        # Arrange
+        routing_key = "dhos.34837004"
+
+        def callback(body: bytes) -> None:
+            publishing.publish_message(routing_key="dhos.DM000005", body={})
+            # Publishing on another worker failed, closing the publisher.
+            mock_publisher.is_open = False
+
+        mocker.patch.dict(consumer.CALLBACK_LOOKUP, {routing_key: callback})
+        mocker.patch.object(config, "RETRY_MAX_ATTEMPTS", 0)
+        mock_publisher: Mock = mocker.patch.object(
+            consumer, "ConfirmingPublisher"
+        ).return_value
+        mock_publisher.is_open = True
+        message: Message = Message(
+            body=b"{}", delivery_info={"routing_key": routing_key}
+        )
+        mock_requeue: Mock = mocker.patch.object(message, "requeue")
+        generic_consumer = GenericConsumer(Connection(), [])
+        mock_release: Mock = mocker.patch.object(generic_consumer._acks, "release")
+
+        # Act
+        generic_consumer.on_message(message.body, message)
+
+        # Assert
+        assert mock_publisher.publish.call_count == 0
+        assert mock_requeue.call_count == 1
+        mock_release.assert_called_once_with(message)
+        assert generic_consumer._in_flight == 0
+
+    def test_local_dispatch_enabled(self, mocker: MockFixture) -> None:
+        mocker.patch.object(config, "LOCAL_DISPATCH_ENABLED", True)
+        mock_enable: Mock = mocker.patch.object(publishing, "enable_local_dispatch")
+        GenericConsumer(Connection(), [Queue("dhos-audit-adapter-task-queue")])
+        callbacks: Dict = mock_enable.call_args.args[0]
+        assert set(callbacks) == set(
+            consumer.ROUTING_TABLE["dhos-audit-adapter-task-queue"]
+        )
+
+    def test_on_message_deadline(self, mocker: MockFixture) -> None:
+        # Arrange
+        routing_key = "dhos.34837004"
+        remaining: List[Optional[float]] = []
+        mock_callback = MagicMock(
+            __name__="mock_callback",
+            side_effect=lambda body: remaining.append(deadline.get_remaining()),
+        )
+        mocker.patch.dict(consumer.CALLBACK_LOOKUP, {routing_key: mock_callback})
+        mocker.patch.dict(consumer.DEADLINE_LOOKUP, {routing_key: 10})
+        mocker.patch.object(Message, "ack")
+        message: Message = Message(
+            body=b"{}", delivery_info={"routing_key": routing_key}
+        )
+
+        # Act
+        GenericConsumer(Connection(), []).on_message(message.body, message)
+
+        # Assert
+        assert remaining[0] is not None and 9 < remaining[0] <= 10
+        assert deadline.get_remaining() is None
+
+    def test_on_message_deadline_exceeded(self, mocker: MockFixture) -> None:
+        # Arrange
+        routing_key = "dhos.34837004"
+        mock_callback = MagicMock(
+            __name__="mock_callback", side_effect=DeadlineExceededError
+        )
+        mocker.patch.dict(consumer.CALLBACK_LOOKUP, {routing_key: mock_callback})
+        mocker.patch.object(config, "RETRY_MAX_ATTEMPTS", 0)
+        deadline.reset_overrun_counts()
+        message: Message = Message(
+            body=b"{}", delivery_info={"routing_key": routing_key}
+        )
+        mock_requeue: Mock = mocker.patch.object(message, "requeue")
+
+        # Act
+        GenericConsumer(Connection(), []).on_message(message.body, message)
+
+        # Assert
+        assert mock_requeue.call_count == 1
+        assert deadline.get_overrun_counts() == {routing_key: 1}
+        deadline.reset_overrun_counts()
+
+
+def _wait_for_settlement(generic_consumer: GenericConsumer) -> None:
+    """Waits for a message processed in the background to be settled."""
+    deadline: float = time.monotonic() + 5
+    while generic_consumer._settlements.empty():
+        assert time.monotonic() < deadline, "Message was not processed"
+        time.sleep(0.01)
+    generic_consumer.settle_pending()
@@ -0,0 +1,159 @@
+import asyncio
+import threading
+import time
+from typing import Dict, List
+
+import pytest
+
+from dhos_async_adapter.executors import AsyncioExecutor, PartitionedExecutor
+
+
+class TestPartitionedExecutor:
+    def test_same_key_runs_in_order(self) -> None:
+        # Arrange
+        executor = PartitionedExecutor(lanes=4)
+        results: Dict[str, List[int]] = {"a": [], "b": []}
+
+        def task(key: str, i: int) -> None:
+            # Earlier tasks sleep for longer, so would finish last if run in parallel.
+            time.sleep((10 - i) / 1000)
+            results[key].append(i)
+
+        # Act
+        for i in range(10):
+            executor.submit("a", task, "a", i)
+            executor.submit("b", task, "b", i)
+        executor.shutdown(wait=True)
+
+        # Assert
+        assert results == {"a": list(range(10)), "b": list(range(10))}
+
+    def test_different_keys_run_in_parallel(self) -> None:
+        # Arrange
+        executor = PartitionedExecutor(lanes=2)
+        keys = ["a", "d"]
+        assert executor.lane_for(keys[0]) != executor.lane_for(keys[1])
+        barrier = threading.Barrier(2, timeout=5)
+
+        # Act
+        futures = [executor.submit(key, barrier.wait) for key in keys]
+
+        # Assert: both tasks must be running at once to pass the barrier.
+        for future in futures:
+            future.result(timeout=5)
+        executor.shutdown(wait=True)
+
+    def test_lane_for_is_stable(self) -> None:
+        executor = PartitionedExecutor(lanes=8)
+        assert executor.lane_for("patient") == executor.lane_for("patient")
+        executor.shutdown()
+
+    def test_unkeyed_tasks_are_spread(self) -> None:
+        executor = PartitionedExecutor(lanes=3)
+        assert [executor.lane_for(None) for _ in range(6)] == [0, 1, 2, 0, 1, 2]
+        executor.shutdown()
+
+    def test_shutdown_cancels_queued(self) -> None:
+        # Arrange
+        executor = PartitionedExecutor(lanes=1)
+        release = threading.Event()
+        started = executor.submit("key", release.wait, 5)
+        queued = executor.submit("key", time.sleep, 0)
+
+        # Act
+        executor.shutdown(wait=False, cancel_futures=True)
+        release.set()
+
+        # Assert
+        assert started.result(timeout=5) is True
+        assert queued.cancelled()
+
+    def test_no_lanes(self) -> None:
+        with pytest.raises(ValueError):
+            PartitionedExecutor(lanes=0)
+
+
+class TestAsyncioExecutor:
+    def test_same_key_runs_in_order(self) -> None:
+        # Arrange
+        executor = AsyncioExecutor(sync_workers=1)
+        results: List[int] = []
+
+        async def task(i: int) -> None:
+            # Earlier tasks sleep for longer, so would finish last if run concurrently.
+            await asyncio.sleep((10 - i) / 1000)
+            results.append(i)
+
+        # Act
+        futures = [executor.submit("key", task, i) for i in range(10)]
+        for future in futures:
+            future.result(timeout=5)
+        executor.shutdown()
+
+        # Assert
+        assert results == list(range(10))
+
+    def test_different_keys_run_concurrently(self) -> None:
+        # Arrange
+        executor = AsyncioExecutor(sync_workers=1)
+        started = asyncio.Event()
+
+        async def first() -> None:
+            await asyncio.wait_for(started.wait(), timeout=5)
+
+        async def second() -> None:
+            started.set()
+
+        # Act
+        futures = [executor.submit("a", first), executor.submit("b", second)]
+
+        # Assert: the first task can only finish once the second has run.
+        for future in futures:
+            future.result(timeout=5)
+        executor.shutdown()
+
+    def test_error_does_not_block_key(self) -> None:
+        # Arrange
+        executor = AsyncioExecutor(sync_workers=1)
+
+        async def fail() -> None:
+            raise ValueError()
+
+        async def succeed() -> str:
+            return "done"
+
+        # Act
+        failed = executor.submit("key", fail)
+        succeeded = executor.submit("key", succeed)
+
+        # Assert
+        with pytest.raises(ValueError):
+            failed.result(timeout=5)
+        assert succeeded.result(timeout=5) == "done"
+        executor.shutdown()
+
+    def test_shutdown_cancels_queued(self) -> None:
+        # Arrange
+        executor = AsyncioExecutor(sync_workers=1)
+        release = threading.Event()
+        calls: List[int] = []
+
+        def block(i: int) -> None:
+            calls.append(i)
+            release.wait(5)
+
+        async def task(i: int) -> None:
+            await executor.loop.run_in_executor(None, block, i)
+
+        executor.submit(None, task, 1)
+        executor.submit(None, task, 2)
+        while not calls or executor._sync_executor._work_queue.qsize() < 1:
+            time.sleep(0.001)
+
+        # Act
+        executor.shutdown(wait=False, cancel_futures=True)
+        release.set()
+        executor.shutdown(wait=True)
+
+        # Assert: the blocking function waiting for a thread never ran.
+        assert calls == [1]
@@ -0,0 +1,153 @@
+from typing import Callable, Dict, List, Set
+
+import pytest
+from kombu import Message
+from mock import MagicMock, Mock
+from pytest_mock import MockFixture
+
+from dhos_async_adapter import publisher
+from dhos_async_adapter.helpers.publishing import OutgoingMessage
+from dhos_async_adapter.publisher import ConfirmingPublisher
+
+
+def _outgoing(count: int) -> List[OutgoingMessage]:
+    return [
+        OutgoingMessage(
+            routing_key=f"dhos.{i}", body=b"{}", correlation_id="id", timestamp=0
+        )
+        for i in range(count)
+    ]
+
+
+class TestConfirmingPublisher:
+    @pytest.fixture
+    def mock_producer(self, mocker: MockFixture) -> Mock:
+        return mocker.patch.object(publisher, "Producer")
+
+    @pytest.fixture
+    def events(self) -> Dict[str, Set[Callable]]:
+        return {"basic_ack": set(), "basic_nack": set()}
+
+    @pytest.fixture
+    def confirming_publisher(
+        self, mock_producer: Mock, events: Dict[str, Set[Callable]]
+    ) -> ConfirmingPublisher:
+        mock_connection = Mock()
+        mock_connection.channel.return_value = MagicMock(events=events)
+        confirming_publisher = ConfirmingPublisher()
+        confirming_publisher.open(mock_connection)
+        mock_connection.channel.return_value.confirm_select.assert_called_once_with()
+        return confirming_publisher
+
+    def _ack(
+        self, events: Dict[str, Set[Callable]], tag: int, multiple: bool = False
+    ) -> None:
+        for callback in events["basic_ack"]:
+            callback(tag, multiple)
+
+    def _nack(
+        self, events: Dict[str, Set[Callable]], tag: int, multiple: bool = False
+    ) -> None:
+        for callback in events["basic_nack"]:
+            callback(tag, multiple)
+
+    def test_publish_not_open(self) -> None:
+        with pytest.raises(ValueError):
+            ConfirmingPublisher().publish(_outgoing(1), Mock(), Mock())
+
+    def test_confirmed_once_all_acked(
+        self,
+        confirming_publisher: ConfirmingPublisher,
+        events: Dict[str, Set[Callable]],
+        mock_producer: Mock,
+    ) -> None:
+        # Arrange
+        on_confirmed, on_failed = Mock(), Mock()
+
+        # Act
+        confirming_publisher.publish(_outgoing(2), on_confirmed, on_failed)
+        self._ack(events, 1)
+
+        # Assert
+        assert mock_producer.return_value.publish.call_count == 2
+        assert on_confirmed.call_count == 0
+        assert confirming_publisher.pending == 1
+        self._ack(events, 2)
+        on_confirmed.assert_called_once_with()
+        assert on_failed.call_count == 0
+        assert confirming_publisher.pending == 0
+
+    def test_republish(
+        self,
+        confirming_publisher: ConfirmingPublisher,
+        events: Dict[str, Set[Callable]],
+        mock_producer: Mock,
+    ) -> None:
+        # Arrange
+        on_confirmed, on_failed = Mock(), Mock()
+        message: Message = Message(
+            body=b"{}",
+            delivery_info={"routing_key": "dhos.1"},
+            properties={"correlation_id": "id"},
+            content_type="application/text",
+        )
+
+        # Act
+        confirming_publisher.republish(
+            message, "retry", {"x-retry-attempt": 1}, on_confirmed, on_failed
+        )
+        self._ack(events, 1)
+
+        # Assert
+        publish_kwargs: Dict = mock_producer.return_value.publish.call_args.kwargs
+        assert publish_kwargs["exchange"] == "retry"
+        assert publish_kwargs["routing_key"] == "dhos.1"
+        assert publish_kwargs["headers"] == {"x-retry-attempt": 1}
+        assert publish_kwargs["correlation_id"] == "id"
+        on_confirmed.assert_called_once_with()
+        assert on_failed.call_count == 0
+
+    def test_multiple_ack(
+        self,
+        confirming_publisher: ConfirmingPublisher,
+        events: Dict[str, Set[Callable]],
+    ) -> None:
+        callbacks: List[Mock] = [Mock(), Mock(), Mock()]
+        for callback in callbacks:
+            confirming_publisher.publish(_outgoing(1), callback, Mock())
+        self._ack(events, 2, multiple=True)
+        assert [c.call_count for c in callbacks] == [1, 1, 0]
+
+    def test_nack_fails_batch(
+        self,
+        confirming_publisher: ConfirmingPublisher,
+        events: Dict[str, Set[Callable]],
+    ) -> None:
+        on_confirmed, on_failed = Mock(), Mock()
+        confirming_publisher.publish(_outgoing(2), on_confirmed, on_failed)
+        self._nack(events, 1)
+        self._ack(events, 2)
+        on_failed.assert_called_once_with()
+        assert on_confirmed.call_count == 0
+
+    def test_reopen_fails_unconfirmed(
+        self,
+        confirming_publisher: ConfirmingPublisher,
+        mock_producer: Mock,
+    ) -> None:
+        on_confirmed, on_failed = Mock(), Mock()
+        confirming_publisher.publish(_outgoing(1), on_confirmed, on_failed)
+        confirming_publisher.open(MagicMock())
+        on_failed.assert_called_once_with()
+        assert confirming_publisher.pending == 0
+
+    def test_publish_error(
+        self,
+        confirming_publisher: ConfirmingPublisher,
+        mock_producer: Mock,
+    ) -> None:
+        mock_producer.return_value.publish.side_effect = ConnectionError()
+        on_confirmed, on_failed = Mock(), Mock()
+        confirming_publisher.publish(_outgoing(1), on_confirmed, on_failed)
+        on_failed.assert_called_once_with()
+        assert confirming_publisher.is_open is False
@@ -0,0 +1,191 @@
+import asyncio
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, List
+
+import pytest
+from mock import Mock
+from pytest_mock import MockFixture
+
+from dhos_async_adapter import clients
+from dhos_async_adapter.clients import single_flight
+from dhos_async_adapter.clients.single_flight import AsyncSingleFlight, SingleFlight
+from dhos_async_adapter.helpers import deadline
+from dhos_async_adapter.helpers.exceptions import (
+    DeadlineExceededError,
+    RejectMessageError,
+)
+
+
+class TestSingleFlight:
+    def _wait_for_waiters(self, flight: SingleFlight, key: str, waiters: int) -> None:
+        deadline: float = time.monotonic() + 5
+        while flight._calls[key].waiters < waiters:
+            assert time.monotonic() < deadline
+            time.sleep(0.001)
+
+    def test_concurrent_calls_coalesced(self) -> None:
+        flight: SingleFlight[List[int]] = SingleFlight()
+        release = threading.Event()
+        mock_fn = Mock(side_effect=lambda: release.wait() and [1])
+
+        with ThreadPoolExecutor(max_workers=4) as executor:
+            leader = executor.submit(flight.do, "key", mock_fn)
+            while "key" not in flight._calls:
+                time.sleep(0.001)
+            followers = [executor.submit(flight.do, "key", mock_fn) for _ in range(3)]
+            self._wait_for_waiters(flight, "key", 3)
+            release.set()
+            results: List[Any] = [f.result() for f in [leader, *followers]]
+
+        assert results == [[1]] * 4
+        assert mock_fn.call_count == 1
+        assert flight._calls == {}
+
+    def test_errors_raised_for_each_caller(self) -> None:
+        flight: SingleFlight[None] = SingleFlight()
+        release = threading.Event()
+
+        def fail() -> None:
+            release.wait()
+            raise RejectMessageError()
+
+        with ThreadPoolExecutor(max_workers=2) as executor:
+            leader = executor.submit(flight.do, "key", fail)
+            while "key" not in flight._calls:
+                time.sleep(0.001)
+            follower = executor.submit(flight.do, "key", fail)
+            self._wait_for_waiters(flight, "key", 1)
+            release.set()
+            with pytest.raises(RejectMessageError):
+                leader.result()
+            with pytest.raises(RejectMessageError):
+                follower.result()
+        assert leader.exception() is not follower.exception()
+
+    def test_follower_retries_after_leader_deadline(self) -> None:
+        flight: SingleFlight[int] = SingleFlight()
+        release = threading.Event()
+        calls: List[int] = []
+
+        def fetch() -> int:
+            calls.append(1)
+            if len(calls) == 1:
+                release.wait()
+                raise DeadlineExceededError()
+            return 42
+
+        def follow() -> int:
+            token = deadline.set_deadline(time.monotonic() + 5)
+            try:
+                return flight.do("key", fetch)
+            finally:
+                deadline.reset_deadline(token)
+
+        with ThreadPoolExecutor(max_workers=2) as executor:
+            leader = executor.submit(flight.do, "key", fetch)
+            while "key" not in flight._calls:
+                time.sleep(0.001)
+            follower = executor.submit(follow)
+            self._wait_for_waiters(flight, "key", 1)
+            release.set()
+            with pytest.raises(DeadlineExceededError):
+                leader.result()
+            assert follower.result() == 42
+        assert len(calls) == 2
+
+    def test_async_follower_retries_after_leader_deadline(self) -> None:
+        flight: AsyncSingleFlight[int] = AsyncSingleFlight()
+        calls: List[int] = []
+
+        async def fetch() -> int:
+            calls.append(1)
+            await asyncio.sleep(0.01)
+            if len(calls) == 1:
+                raise DeadlineExceededError()
+            return 42
+
+        async def run() -> List[Any]:
+            return list(
+                await asyncio.gather(
+                    flight.do("key", fetch),
+                    flight.do("key", fetch),
+                    return_exceptions=True,
+                )
+            )
+
+        leader_result, follower_result = asyncio.run(run())
+        assert isinstance(leader_result, DeadlineExceededError)
+        assert follower_result == 42
+        assert len(calls) == 2
+
+    def test_async_concurrent_calls_coalesced(self) -> None:
+        flight: AsyncSingleFlight[int] = AsyncSingleFlight()
+        calls: List[int] = []
+
+        async def fetch() -> int:
+            calls.append(1)
+            await asyncio.sleep(0.01)
+            return 42
+
+        async def run() -> List[int]:
+            return list(
+                await asyncio.gather(*[flight.do("key", fetch) for _ in range(5)])
+            )
+
+        assert asyncio.run(run()) == [42] * 5
+        assert len(calls) == 1
+        assert flight._tasks == {}
+
+    def test_async_errors_raised_for_each_caller(self) -> None:
+        flight: AsyncSingleFlight[int] = AsyncSingleFlight()
+
+        async def fail() -> int:
+            await asyncio.sleep(0.01)
+            raise RejectMessageError()
+
+        async def run() -> List[Any]:
+            return list(
+                await asyncio.gather(
+                    *[flight.do("key", fail) for _ in range(3)], return_exceptions=True
+                )
+            )
+
+        errors: List[Any] = asyncio.run(run())
+        assert all(isinstance(e, RejectMessageError) for e in errors)
+        assert len({id(e) for e in errors}) == 3
+
+    def test_get_request_key(self, mocker: MockFixture) -> None:
+        key = single_flight.get_request_key(
+            "get", "http://dhos-locations/x", {"a": 1, "b": 2}, None, False, 30, None
+        )
+        assert key == single_flight.get_request_key(
+            "get", "http://dhos-locations/x", {"b": 2, "a": 1}, None, False, 30, None
+        )
+        assert key != single_flight.get_request_key(
+            "get", "http://dhos-locations/x", {"a": 1, "b": 2}, None, True, 30, None
+        )
+        assert (
+            single_flight.get_request_key(
+                "post", "http://dhos-locations/x", None, None, False, 30, None
+            )
+            is None
+        )
+        mocker.patch.object(single_flight.config, "HTTP_SINGLE_FLIGHT_ENABLED", False)
+        assert (
+            single_flight.get_request_key(
+                "get", "http://dhos-locations/x", None, None, False, 30, None
+            )
+            is None
+        )
+
+    def test_do_request_get_coalesced(self, mocker: MockFixture) -> None:
+        mock_do: Mock = mocker.patch.object(clients, "_do_request")
+        mock_do_in_flight: Mock = mocker.patch.object(
+            clients._in_flight_requests, "do", wraps=clients._in_flight_requests.do
+        )
+        clients.do_request(url="http://dhos-locations/x", method="get")
+        clients.do_request(url="http://dhos-locations/x", method="post", payload={})
+        assert mock_do.call_count == 2
+        assert mock_do_in_flight.call_count == 1
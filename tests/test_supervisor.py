@@ -0,0 +1,91 @@
+from typing import List
+
+import pytest
+from mock import Mock
+from pytest_mock import MockFixture
+
+from dhos_async_adapter import supervisor
+from dhos_async_adapter.supervisor import Supervisor
+
+
+class TestSupervisor:
+    def test_assign_queues(self) -> None:
+        assignments: List[List[str]] = supervisor.assign_queues(
+            ["a", "b", "c", "d", "e"], processes=2, replicas={}
+        )
+        assert assignments == [["a", "c", "e"], ["b", "d"]]
+
+    def test_assign_queues_replicas(self) -> None:
+        assignments: List[List[str]] = supervisor.assign_queues(
+            ["a", "b", "c"], processes=3, replicas={"c": 2, "b": 5}
+        )
+        # Replicas are capped at the number of processes, and never on the same worker twice.
+        assert sum(q == "b" for a in assignments for q in a) == 3
+        assert sum(q == "c" for a in assignments for q in a) == 2
+        assert sum(q == "a" for a in assignments for q in a) == 1
+        for assignment in assignments:
+            assert len(assignment) == len(set(assignment))
+
+    def test_get_queue_replicas_skips_ordered_queues(self, mocker: MockFixture) -> None:
+        mocker.patch.dict(
+            supervisor.QUEUE_REPLICAS,
+            {
+                "dhos-audit-adapter-task-queue": 3,
+                "dhos-services-adapter-task-queue": 3,
+            },
+            clear=True,
+        )
+        assert supervisor.get_queue_replicas() == {"dhos-audit-adapter-task-queue": 3}
+
+    @pytest.fixture
+    def mock_process_cls(self, mocker: MockFixture) -> Mock:
+        return mocker.patch("multiprocessing.context.ForkContext.Process")
+
+    def test_check_workers_restarts_with_backoff(
+        self, mocker: MockFixture, mock_process_cls: Mock
+    ) -> None:
+        # Arrange
+        mock_monotonic: Mock = mocker.patch.object(
+            supervisor.time, "monotonic", return_value=100.0
+        )
+        sup = Supervisor([["a"], ["b"]])
+        sup.start_worker(0)
+        sup.start_worker(1)
+        assert mock_process_cls.return_value.start.call_count == 2
+        mock_process_cls.return_value.is_alive.return_value = False
+
+        # Act/Assert: both crashed, so are restarted after a delay.
+        sup.check_workers()
+        assert mock_process_cls.return_value.start.call_count == 2
+        mock_monotonic.return_value = 101.0
+        sup.check_workers()
+        assert mock_process_cls.return_value.start.call_count == 4
+
+        # Crashing again doubles the delay.
+        sup.check_workers()
+        mock_monotonic.return_value = 102.0
+        sup.check_workers()
+        assert mock_process_cls.return_value.start.call_count == 4
+        mock_monotonic.return_value = 103.0
+        sup.check_workers()
+        assert mock_process_cls.return_value.start.call_count == 6
+
+    def test_update_liveness(self, mocker: MockFixture, mock_process_cls: Mock) -> None:
+        mock_set_alive_file: Mock = mocker.patch.object(supervisor, "set_alive_file")
+        sup = Supervisor([["a"], ["b"]])
+        sup._alive_flags[0] = 1
+        sup.update_liveness()
+        mock_set_alive_file.assert_called_with(False)
+        sup._alive_flags[1] = 1
+        sup.update_liveness()
+        mock_set_alive_file.assert_called_with(True)
+
+    def test_run_worker(self, mocker: MockFixture) -> None:
+        mock_signal: Mock = mocker.patch.object(supervisor.signal, "signal")
+        mock_run: Mock = mocker.patch.object(supervisor.app, "run")
+        alive_flags = [0, 0]
+        supervisor._run_worker(["a"], alive_flags, 1)
+        assert mock_signal.call_count == 2
+        assert mock_run.call_args.kwargs["queue_names"] == ["a"]
+        mock_run.call_args.kwargs["set_alive"](True)
+        assert alive_flags == [0, 1]
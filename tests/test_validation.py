@@ -1,7 +1,9 @@
 import json
 
 import pytest
-from marshmallow import Schema, fields
+from marshmallow import EXCLUDE, INCLUDE, Schema, fields
+from mock import Mock
+from pytest_mock import MockFixture
 
 from dhos_async_adapter.helpers import validation
 from dhos_async_adapter.helpers.exceptions import RejectMessageError
@@ -50,3 +52,27 @@ class TestValidation:
         message_body = b"not json"
         with pytest.raises(RejectMessageError):
             validation.validate_message_body_list(message_body, schema=DummySchema)
+
+    def test_get_schema_shared(self) -> None:
+        schema = validation.get_schema(DummySchema, unknown=INCLUDE)
+        assert validation.get_schema(DummySchema, unknown=INCLUDE) is schema
+        assert validation.get_schema(DummySchema, unknown=EXCLUDE) is not schema
+        assert validation.get_schema(DummySchema, unknown=INCLUDE, many=True).many
+        assert schema.load({"dummy": "field", "extra": "field"}) == {
+            "dummy": "field",
+            "extra": "field",
+        }
+
+    def test_validate_message_body_dict_reuses_schema(
+        self, mocker: MockFixture
+    ) -> None:
+        message_body = json.dumps({"dummy": "field"})
+        validation.validate_message_body_dict(message_body, schema=DummySchema)
+        mock_init: Mock = mocker.patch.object(
+            DummySchema, "__init__", side_effect=AssertionError("Schema rebuilt")
+        )
+        validated = validation.validate_message_body_dict(
+            message_body, schema=DummySchema
+        )
+        assert validated == {"dummy": "field"}
+        assert mock_init.call_count == 0
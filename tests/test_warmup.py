@@ -0,0 +1,83 @@
+import socket
+import time
+from typing import Dict, Generator, List
+
+import pytest
+import requests
+from mock import Mock
+from pytest_mock import MockFixture
+from requests_mock import Mocker
+
+from dhos_async_adapter import config
+from dhos_async_adapter.clients import warmup
+from dhos_async_adapter.clients.warmup import Liveness
+
+
+class TestWarmup:
+    @pytest.fixture
+    def mock_getaddrinfo(self, mocker: MockFixture) -> Generator[Mock, None, None]:
+        mock: Mock = mocker.patch.object(
+            warmup, "_original_getaddrinfo", return_value=[("address",)]
+        )
+        warmup.install_dns_cache()
+        yield mock
+        warmup.uninstall_dns_cache()
+
+    def test_dns_cache(self, mocker: MockFixture, mock_getaddrinfo: Mock) -> None:
+        mock_monotonic: Mock = mocker.patch.object(
+            warmup.time, "monotonic", return_value=100.0
+        )
+        assert socket.getaddrinfo("dhos-users", 80) == [("address",)]
+        assert socket.getaddrinfo("dhos-users", 80) == [("address",)]
+        assert mock_getaddrinfo.call_count == 1
+        mock_monotonic.return_value = 100.0 + config.DNS_CACHE_TTL_SEC
+        socket.getaddrinfo("dhos-users", 80)
+        assert mock_getaddrinfo.call_count == 2
+
+    def test_dns_cache_failure_not_cached(self, mock_getaddrinfo: Mock) -> None:
+        mock_getaddrinfo.side_effect = socket.gaierror()
+        for _ in range(2):
+            with pytest.raises(socket.gaierror):
+                socket.getaddrinfo("dhos-users", 80)
+        assert mock_getaddrinfo.call_count == 2
+
+    def test_get_service_urls(self) -> None:
+        urls = warmup.get_service_urls()
+        assert "http://dhos-users" in urls
+        assert "http://dea-ingest" in urls
+        assert len(urls) == len(set(urls))
+
+    def test_warm_up(self, requests_mock: Mocker) -> None:
+        requests_mock.head("http://dhos-users", status_code=404)
+        requests_mock.head("http://dhos-pdf", exc=requests.ConnectionError)
+        results: Dict[str, bool] = warmup.warm_up(
+            ["http://dhos-users", "http://dhos-pdf"]
+        )
+        assert results == {"http://dhos-users": True, "http://dhos-pdf": False}
+        assert warmup.services_reachable(results) is True
+        assert warmup.services_reachable({"http://dhos-pdf": False}) is False
+
+    def test_warm_up_concurrent(self, mocker: MockFixture) -> None:
+        mock_head: Mock = mocker.patch.object(
+            requests.Session, "head", side_effect=lambda *a, **kw: time.sleep(0.2)
+        )
+        urls: List[str] = [f"http://service-{i}" for i in range(5)]
+        started: float = time.monotonic()
+        results: Dict[str, bool] = warmup.warm_up(urls)
+        assert time.monotonic() - started < 0.6
+        assert results == {url: True for url in urls}
+        assert mock_head.call_count == 5
+
+    def test_warm_up_no_urls(self) -> None:
+        assert warmup.warm_up([]) == {}
+
+    def test_liveness(self) -> None:
+        mock_set_alive = Mock()
+        liveness = Liveness(mock_set_alive)
+        liveness.set_connection_alive(True)
+        assert mock_set_alive.call_args.args[0] is True
+        liveness.set_services_reachable(False)
+        assert mock_set_alive.call_args.args[0] is False
+        liveness.set_services_reachable(True)
+        liveness.set_connection_alive(False)
+        assert mock_set_alive.call_args.args[0] is False